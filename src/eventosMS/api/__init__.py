@@ -13,6 +13,7 @@ def registrar_handlers():
 
 def importar_modelos_alchemy():
     import modulos.eventos.infraestructura.dto
+    import config.idempotencia
     import eventosMS.modulos.sagas.infraestructura.modelos 
 
 
@@ -60,15 +61,26 @@ def create_app(configuracion={}):
 
      # Inicializa la DB
     from config.db import init_db, db
+    from config.lecturas import configurar_replica, init_lecturas
     
+    configurar_replica(app)
     init_db(app)
+    init_lecturas(app)
     importar_modelos_alchemy()
     registrar_handlers()
 
     with app.app_context():
+        from config.retencion import preparar_tablas, asegurar_indices, comenzar_retencion
+        preparar_tablas()
         db.create_all()
+        asegurar_indices()
         if not app.config.get('TESTING'):
+            from eventosMS.modulos.sagas.infraestructura.recuperacion import recuperar_sagas, comenzar_snapshots
+            # El caché de sagas activas queda caliente antes de consumir
+            recuperar_sagas(app)
             comenzar_consumidor(app)
+            comenzar_retencion(app)
+            comenzar_snapshots(app)
 
      # Importa Blueprints
     from . import eventos
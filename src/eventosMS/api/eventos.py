@@ -13,6 +13,10 @@ from seedwork.aplicacion.queries import ejecutar_query
 # Creación del Blueprint. La URL base para todas las rutas en este archivo será '/eventos'
 bp = api.crear_blueprint('eventos', '/eventos')
 
+def _id_transaction():
+    # Read-your-writes: con el idTransaction de una escritura reciente se lee de la primaria
+    return request.headers.get('X-Id-Transaction') or request.args.get('idTransaction')
+
 @bp.route('/', methods=('POST',))
 def crear_evento():
     try:
@@ -39,7 +43,7 @@ def crear_evento():
 @bp.route('/<id_socio>', methods=('GET',))
 def dar_eventos_socio_usando_query(id_socio=None):
     if id_socio:
-        query_resultado = ejecutar_query(ObtenerEventosSocio(id_socio))
+        query_resultado = ejecutar_query(ObtenerEventosSocio(id_socio, id_transaction=_id_transaction()))
         map_evento = MapeadorEventoDTOJson()
 
         return map_evento.lista_dto_a_externo(query_resultado.resultado)
@@ -0,0 +1,65 @@
+import os
+import datetime
+import threading
+
+from sqlalchemy.exc import IntegrityError
+
+from config.db import db
+from seedwork.infraestructura.idempotencia import AlmacenIdempotencia, RepositorioMensajesProcesados
+
+
+class MensajeProcesado(db.Model):
+    __tablename__ = 'mensajes_procesados'
+    llave = db.Column(db.String(255), primary_key=True)
+    suscripcion = db.Column(db.String(120), nullable=False)
+    fecha_procesado = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False, index=True)
+
+
+class RepositorioMensajesProcesadosSQLAlchemy(RepositorioMensajesProcesados):
+    """Usa conexiones propias del engine para no mezclarse con la sesión de la UoW."""
+
+    def existe(self, llave: str) -> bool:
+        with db.engine.connect() as conexion:
+            fila = conexion.execute(
+                db.select(MensajeProcesado.llave).where(MensajeProcesado.llave == llave)
+            ).first()
+        return fila is not None
+
+    def registrar(self, llave: str, suscripcion: str) -> bool:
+        try:
+            with db.engine.begin() as conexion:
+                conexion.execute(db.insert(MensajeProcesado).values(
+                    llave=llave,
+                    suscripcion=suscripcion,
+                    fecha_procesado=datetime.datetime.utcnow()
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    def llaves(self, limite: int) -> list[str]:
+        with db.engine.connect() as conexion:
+            filas = conexion.execute(
+                db.select(MensajeProcesado.llave)
+                .order_by(MensajeProcesado.fecha_procesado.desc())
+                .limit(limite)
+            )
+            return [fila.llave for fila in filas]
+
+
+_almacen = None
+_lock = threading.Lock()
+
+def almacen_idempotencia() -> AlmacenIdempotencia:
+    """Almacén compartido por los consumidores del proceso. Requiere app context."""
+    global _almacen
+    if _almacen is None:
+        with _lock:
+            if _almacen is None:
+                almacen = AlmacenIdempotencia(
+                    RepositorioMensajesProcesadosSQLAlchemy(),
+                    capacidad_lru=int(os.getenv('IDEMPOTENCIA_LRU', 10_000))
+                )
+                almacen.calentar()
+                _almacen = almacen
+    return _almacen
@@ -0,0 +1,100 @@
+import os
+import time
+import logging
+import threading
+
+from sqlalchemy import text
+
+from config.db import db
+from seedwork.infraestructura.retencion import Retencion, PoliticaRetencion, ResultadoRetencion
+
+logger = logging.getLogger(__name__)
+
+RETENCION_DIAS = int(os.getenv('RETENCION_DIAS', 30))
+RETENCION_DIAS_SAGA_LOG = int(os.getenv('RETENCION_DIAS_SAGA_LOG', RETENCION_DIAS))
+RETENCION_INTERVALO_SEGUNDOS = int(os.getenv('RETENCION_INTERVALO_SEGUNDOS', 3600))
+RETENCION_PARTICIONAR = os.getenv('RETENCION_PARTICIONAR', 'false').lower() == 'true'
+
+
+def _retencion() -> Retencion:
+    """Requiere app context."""
+    return Retencion(
+        db.engine,
+        tamano_lote=int(os.getenv('RETENCION_TAMANO_LOTE', 1000)),
+        pausa_segundos=float(os.getenv('RETENCION_PAUSA_SEGUNDOS', 0.1)),
+        max_lag_segundos=float(os.getenv('RETENCION_MAX_LAG', 5.0)),
+        lock_timeout_ms=int(os.getenv('RETENCION_LOCK_TIMEOUT_MS', 2000))
+    )
+
+
+def politica_eventos(dias: int = RETENCION_DIAS) -> PoliticaRetencion:
+    from modulos.eventos.infraestructura.dto import EventoEntity
+    return PoliticaRetencion(EventoEntity.__table__, 'fecha_creacion', dias)
+
+
+def politica_saga_log(dias: int = RETENCION_DIAS_SAGA_LOG) -> PoliticaRetencion:
+    from eventosMS.modulos.sagas.infraestructura.modelos import SagaLog
+    return PoliticaRetencion(SagaLog.__table__, 'timestamp', dias)
+
+
+def purgar_eventos(dias: int = RETENCION_DIAS) -> ResultadoRetencion:
+    return _retencion().purgar(politica_eventos(dias))
+
+
+def purgar_saga_log(dias: int = RETENCION_DIAS_SAGA_LOG) -> ResultadoRetencion:
+    return _retencion().purgar(politica_saga_log(dias))
+
+
+def preparar_tablas():
+    """Se llama antes de ``db.create_all``.
+
+    Con RETENCION_PARTICIONAR=true las tablas nuevas se crean particionadas por
+    mes; las existentes se dejan como están y se limpian por lotes.
+    """
+    if not RETENCION_PARTICIONAR:
+        return
+    retencion = _retencion()
+    for politica in (politica_eventos(), politica_saga_log()):
+        retencion.crear_tabla_particionada(politica)
+
+
+def asegurar_indices():
+    """saga_log se creó sin índice en timestamp; create_all no altera tablas existentes.
+
+    El índice se construye con CREATE INDEX CONCURRENTLY en una conexión en
+    autocommit para no bloquear las escrituras de saga_log. Si un intento
+    anterior se interrumpió, el índice quedó inválido: se borra y se vuelve a
+    crear. Las tablas particionadas ya lo traen (crear_tabla_particionada).
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexion:
+        valido = conexion.execute(text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = 'ix_saga_log_timestamp'"
+        )).scalar()
+        if valido:
+            return
+        if valido is False:
+            conexion.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_saga_log_timestamp"))
+        particionada = conexion.execute(text(
+            "SELECT relkind = 'p' FROM pg_class WHERE relname = 'saga_log'"
+        )).scalar()
+        # PostgreSQL no admite CONCURRENTLY sobre la tabla padre de un particionamiento
+        concurrente = '' if particionada else 'CONCURRENTLY '
+        conexion.execute(text(f"CREATE INDEX {concurrente}IF NOT EXISTS ix_saga_log_timestamp ON saga_log (timestamp)"))
+
+
+def comenzar_retencion(app):
+    def ciclo():
+        while True:
+            time.sleep(RETENCION_INTERVALO_SEGUNDOS)
+            with app.app_context():
+                for purgar in (purgar_eventos, purgar_saga_log):
+                    try:
+                        resultado = purgar()
+                        print(f"🧹 Retención {resultado.tabla}: {resultado.particiones} particiones, {resultado.filas} filas eliminadas")
+                    except Exception as e:
+                        logger.error(f'Error en retención: {e}')
+
+    threading.Thread(target=ciclo, daemon=True, name='retencion').start()
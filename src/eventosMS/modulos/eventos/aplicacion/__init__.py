@@ -1,15 +1,16 @@
-from pydispatch import dispatcher
+from seedwork.infraestructura.bus import bus, Fase
 from .handlers import HandlerEventoIntegracion
 from ..dominio.eventos import EventoRegistrado
 
 # Conectar handlers de integración para eventos de notificaciones
-dispatcher.connect(HandlerEventoIntegracion.handle_evento_registrado, signal=f'{EventoRegistrado.__name__}Integracion')
+# La publicación a Pulsar se ejecuta en el pool del bus para no sumar su latencia al comando
+bus.suscribir(EventoRegistrado, HandlerEventoIntegracion.handle_evento_registrado, Fase.INTEGRACION, en_segundo_plano=True)
 
 # Importar comandos para auto-registro
 from .comandos.crear_evento import CrearEvento
 from .comandos.actualizar_evento_pago import ActualizarEventoPago
 
 # Conectar handlers para eventos de pagos (estos escuchan eventos externos)
-# Nota: Los eventos de pagos se manejan vía Pulsar, no pydispatch
+# Nota: Los eventos de pagos se manejan vía Pulsar, no por el bus de eventos
 print("✅ Módulo de eventos cargado - Handlers registrados")
 print("✅ Comandos registrados: CrearEvento, ActualizarEventoPago")
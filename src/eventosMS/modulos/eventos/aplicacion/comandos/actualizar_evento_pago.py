@@ -11,6 +11,7 @@ from .base import EventoBaseHandler
 from dataclasses import dataclass
 from seedwork.aplicacion.comandos import ejecutar_commando as comando
 from seedwork.infraestructura.uow import UnidadTrabajoPuerto
+from config.lecturas import enrutador_lecturas
 
 
 @dataclass
@@ -43,6 +44,7 @@ class ActualizarEventoPagoHandler(EventoBaseHandler):
     2. Actualizar los datos del evento con información del pago
     3. Disparar eventos de dominio correspondientes
     4. Persistir los cambios usando la unidad de trabajo
+    5. Registrar la escritura para que las lecturas siguientes no vayan a la réplica
     """
 
     def handle(self, comando: ActualizarEventoPago):
@@ -83,6 +85,8 @@ class ActualizarEventoPagoHandler(EventoBaseHandler):
         UnidadTrabajoPuerto.registrar_batch(repositorio.actualizar, evento_existente)
         UnidadTrabajoPuerto.savepoint()
         UnidadTrabajoPuerto.commit()
+        # El pago no trae idTransaction: las lecturas por socio también van a la primaria
+        enrutador_lecturas().registrar_escritura(evento_existente.id_transaction, str(evento_existente.id_socio))
 
 
 @comando.register(ActualizarEventoPago)
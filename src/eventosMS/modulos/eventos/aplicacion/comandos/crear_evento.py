@@ -14,6 +14,7 @@ from seedwork.aplicacion.comandos import ejecutar_commando as comando
 from seedwork.infraestructura.uow import UnidadTrabajoPuerto
 
 from typing import Optional
+from config.lecturas import enrutador_lecturas
 
 @dataclass
 class CrearEvento(Comando):
@@ -51,6 +52,7 @@ class CrearEventoHandler(EventoBaseHandler):
         UnidadTrabajoPuerto.registrar_batch(repositorio.agregar, evento)
         UnidadTrabajoPuerto.savepoint()
         UnidadTrabajoPuerto.commit()
+        enrutador_lecturas().registrar_escritura(comando.id_transaction)
 
 
 @comando.register(CrearEvento)
@@ -6,18 +6,22 @@ from modulos.eventos.infraestructura.mapeadores import MapeadorEvento
 from seedwork.aplicacion.queries import Query, QueryResultado
 from seedwork.aplicacion.queries import ejecutar_query as query
 from dataclasses import dataclass
+from typing import Optional
+from config.lecturas import enrutador_lecturas
 from .base import EventoQueryBaseHandler
 
 @dataclass
 class ObtenerEventosSocio(Query):
     id_socio: str
+    id_transaction: Optional[str] = None
 
 class ObtenerEventosSocioHandler(EventoQueryBaseHandler):
 
     def handle(self, query: ObtenerEventosSocio) -> QueryResultado:
         socio_uuid = UUID(query.id_socio)
         repositorio = self.fabrica_repositorio.crear_objeto(RepositorioEventos.__class__)
-        eventos =  self.fabrica_eventos.crear_lista_eventos(repositorio.obtener_por_id_socio(socio_uuid), MapeadorEvento())
+        with enrutador_lecturas().lectura(query.id_transaction, str(socio_uuid)):
+            eventos =  self.fabrica_eventos.crear_lista_eventos(repositorio.obtener_por_id_socio(socio_uuid), MapeadorEvento())
         return QueryResultado(resultado=eventos)
 
 @query.register(ObtenerEventosSocio)
@@ -6,7 +6,10 @@ from pulsar.schema import *
 
 from modulos.eventos.infraestructura.schema.v1.eventos import PagoCompletado, EventoCommand
 from seedwork.infraestructura import utils
+from seedwork.infraestructura.idempotencia import llave_mensaje
 from seedwork.aplicacion.comandos import ejecutar_commando
+from seedwork.infraestructura.esquemas import esquema_avro
+from config.idempotencia import almacen_idempotencia
 
 
 def suscribirse_a_eventos_pago(app):
@@ -31,12 +34,13 @@ def suscribirse_a_eventos_pago(app):
             'eventos-pagos', 
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='eventos-sub-eventos-pago',
-            schema=AvroSchema(PagoCompletado),
+            schema=esquema_avro(PagoCompletado),
             initial_position=_pulsar.InitialPosition.Earliest
         )
 
         print("✅ Conectado al tópico 'eventos-pagos'")
         print("📡 Esperando eventos de pagos...")
+        idempotencia = almacen_idempotencia()
 
         while True:
             try:
@@ -45,6 +49,11 @@ def suscribirse_a_eventos_pago(app):
                 if mensaje:
                     print(f'📨 Evento Pago Completado recibido en servicio eventos')
                     datos = mensaje.value()
+                    llave = llave_mensaje('eventos-sub-eventos-pago', mensaje, datos.idPago, datos.estado)
+                    if idempotencia.ya_procesado(llave):
+                        print(f"⏭️ Evento de pago {datos.idPago} ya procesado, se omite")
+                        consumidor.acknowledge(mensaje)
+                        continue
                     logger.info(f"Evento VentaReferidaConfirmada recibido: {datos}")
                     
                     # Convertir a dict para facilitar el manejo
@@ -81,6 +90,7 @@ def suscribirse_a_eventos_pago(app):
                         print(f"Ejecutar comando: {actualizar_dto}")
                         with app.app_context():
                             ejecutar_commando(comando)
+                        idempotencia.marcar_procesado(llave, 'eventos-sub-eventos-pago')
                         print(f"✅ Evento {actualizar_dto.id_evento} actualizado exitosamente")
                         
                     except Exception as e:
@@ -131,12 +141,13 @@ def suscribirse_a_comandos_evento(app):
             'eventos-comando', 
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='eventos-sub-comando-evento',
-            schema=AvroSchema(EventoCommand),
+            schema=esquema_avro(EventoCommand),
             initial_position=_pulsar.InitialPosition.Earliest
         )
 
         print("✅ Conectado al tópico 'comando-evento'")
         print("📡 Esperando comandos de eventos...")
+        idempotencia = almacen_idempotencia()
 
         while True:
             try:
@@ -149,6 +160,12 @@ def suscribirse_a_comandos_evento(app):
                     
                     comando_tipo = datos.comando  # "Iniciar" o "Cancelar"
                     id_transaction = datos.idTransaction if hasattr(datos, 'idTransaction') else None
+
+                    llave = llave_mensaje('eventos-sub-comando-evento', mensaje, id_transaction, comando_tipo)
+                    if idempotencia.ya_procesado(llave):
+                        print(f"⏭️ EventoCommand {comando_tipo} de la transacción {id_transaction} ya procesado, se omite")
+                        consumidor.acknowledge(mensaje)
+                        continue
                     
                     # Acceder a los datos del payload
                     payload_data = datos.data
@@ -190,6 +207,7 @@ def suscribirse_a_comandos_evento(app):
                         print(f"Ejecutar comando: {evento_dto}")
                         with app.app_context():
                             ejecutar_commando(comando)
+                        idempotencia.marcar_procesado(llave, 'eventos-sub-comando-evento')
                         print(f"✅ Evento {evento_dto.id_evento} actualizado exitosamente")
                         
                     except Exception as e:
@@ -11,6 +11,7 @@ from modulos.eventos.infraestructura.schema.v1.eventos import (
 from modulos.eventos.dominio.eventos import EventoRegistrado
 
 from seedwork.infraestructura import utils
+from seedwork.infraestructura.esquemas import esquema_avro
 
 epoch = datetime.datetime.utcfromtimestamp(0)
 
@@ -18,11 +19,12 @@ def unix_time_millis(dt):
     return (dt - epoch).total_seconds() * 1000.0
 
 class Despachador:
-    def _publicar_mensaje(self, mensaje, topico):
+    def _publicar_mensaje(self, mensaje, topico, llave: str = None):
         cliente = pulsar.Client(f'pulsar://{utils.broker_host()}:6650')
         # Obtenemos el schema del propio objeto del mensaje
-        publicador = cliente.create_producer(topico, schema=AvroSchema(EventoEventoRegistrado))
-        publicador.send(mensaje)
+        publicador = cliente.create_producer(topico, schema=esquema_avro(EventoEventoRegistrado))
+        # La llave (idSocio) ordena el mensaje en las suscripciones Key_Shared de los consumidores
+        publicador.send(mensaje, partition_key=llave) if llave else publicador.send(mensaje)
         cliente.close()
 
     def publicar_evento(self, evento, topico):
@@ -53,4 +55,4 @@ class Despachador:
             return
 
         # Publicamos el evento de integración que acabamos de crear
-        self._publicar_mensaje(evento_integracion, topico)
\ No newline at end of file
+        self._publicar_mensaje(evento_integracion, topico, llave=payload.idSocio)
\ No newline at end of file
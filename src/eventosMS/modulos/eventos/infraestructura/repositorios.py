@@ -6,6 +6,8 @@ from uuid import UUID
 
 from modulos.eventos.aplicacion.dto import ActualizarEventoPagoDTO, EventoDTO
 from config.db import db
+from config.retencion import purgar_eventos
+from seedwork.infraestructura.lecturas import sesion_lectura
 from modulos.eventos.dominio.repositorios import RepositorioEventos
 from modulos.eventos.dominio.entidades import Evento
 from modulos.eventos.dominio.fabricas import FabricaEventos
@@ -23,7 +25,7 @@ class RepositorioEventosPostgreSQL(RepositorioEventos):
         return self._fabrica_eventos
 
     def obtener_por_id(self, id: UUID) -> Evento:
-        evento_dto = db.session.query(EventoEntity).filter_by(id=str(id)).one()
+        evento_dto = db.session.query(EventoEntity).filter_by(id=UUID(str(id))).one()
         return self.fabrica_eventos.crear_objeto(evento_dto, MapeadorEvento())
 
     def obtener_todos(self) -> list[Evento]:
@@ -58,7 +60,7 @@ class RepositorioEventosPostgreSQL(RepositorioEventos):
     
     def obtener_por_id_socio(self, id_socio: UUID) -> Evento:
         # Consultar eventos del socio usando SQLAlchemy
-        eventos_entity = db.session.query(EventoEntity).filter_by(id_socio=str(id_socio)).all()
+        eventos_entity = sesion_lectura(db.session).query(EventoEntity).filter_by(id_socio=UUID(str(id_socio))).all()
         
         # Si necesitas transformar a DTOs usando la fábrica:
         eventos = []
@@ -71,4 +73,7 @@ class RepositorioEventosPostgreSQL(RepositorioEventos):
             eventos.append(evento_dominio)
 
         # Retornar la lista de eventos
-        return eventos
\ No newline at end of file
+        return eventos
+
+    def limpiar_eventos_antiguos(self, dias: int) -> int:
+        return purgar_eventos(dias).filas
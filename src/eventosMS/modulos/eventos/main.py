@@ -73,11 +73,11 @@ def limpiar_eventos_antiguos(dias: int = 30) -> int:
     Limpia eventos antiguos del sistema
     """
     try:
-        from .infraestructura.fabricas import obtener_fabrica_repositorio
+        from .infraestructura.fabricas import FabricaRepositorio
         from .dominio.repositorios import RepositorioEventos
         
-        fabrica = obtener_fabrica_repositorio()
-        repositorio = fabrica.crear_objeto(RepositorioEventos)
+        fabrica = FabricaRepositorio()
+        repositorio = fabrica.crear_objeto(RepositorioEventos.__class__)
         
         eventos_eliminados = repositorio.limpiar_eventos_antiguos(dias)
         logger.info(f"Eventos antiguos eliminados: {eventos_eliminados}")
@@ -0,0 +1,86 @@
+import threading
+
+from eventosMS.modulos.sagas.aplicacion.comandos.referidos import ReferidoCommand
+from eventosMS.modulos.sagas.dominio.eventos.eventos import CrearEvento, EventoRegistrado, EventoCompensacion
+from eventosMS.modulos.sagas.dominio.eventos.referidos import ReferidoProcesado
+from eventosMS.modulos.sagas.dominio.eventos.pagos import PagoProcesado, PagoRechazado
+from eventosMS.seedwork.aplicacion.sagas import CoordinadorCoreografia, ObservadorSaga, Transaccion, Inicio, Fin, compilar_saga
+from eventosMS.seedwork.dominio.eventos import EventoDominio
+from eventosMS.modulos.sagas.infraestructura.repositorio_saga import RepositorioSaga
+
+
+# Cada participante reacciona al evento del paso anterior:
+#   eventosMS crea el evento (comando-saga) -> eventos-tracking
+#   referidos reacciona a eventos-tracking  -> eventos-referido
+#   pagos reacciona a eventos-referido      -> eventos-pago
+# Ante un pago rechazado, referidos compensa su paso al oír eventos-pago y
+# eventosMS actualiza el evento con el estado del pago.
+SAGA_PAGOS_COREOGRAFIA = compilar_saga(
+    "SagaPagosCoreografia",
+    pasos=[
+        Inicio(index=0),
+        Transaccion(index=1, comando=None, evento=EventoRegistrado, error=None, compensacion=EventoCompensacion, exitosa=True),
+        Transaccion(index=2, comando=None, evento=ReferidoProcesado, error=None, compensacion=ReferidoCommand, exitosa=True),
+        Transaccion(index=3, comando=None, evento=PagoProcesado, error=PagoRechazado, compensacion=None, exitosa=True),
+        Fin(index=4)
+    ]
+)
+
+
+class CoordinadorPagosCoreografia(CoordinadorCoreografia):
+    definicion = SAGA_PAGOS_COREOGRAFIA
+
+    def __init__(self, correlacion_id: str | None = None, app=None):
+        self._correlacion_id = correlacion_id
+        self._repo = RepositorioSaga(app) if app else None
+
+    @property
+    def nombre_saga(self):
+        return self.definicion.nombre
+
+    def persistir_en_saga_log(self, mensaje):  # type: ignore[override]
+        if isinstance(mensaje, Inicio):
+            self.iniciar()
+        elif isinstance(mensaje, Fin):
+            self.terminar()
+
+    def iniciar(self):
+        self._repo.registrar_inicio(self._correlacion_id)
+
+    def terminar(self, exito: bool = True):
+        self._repo.registrar_fin(self._correlacion_id, paso=self.definicion.pasos[-1].index, exito=exito)
+
+    def registrar_paso(self, paso: Transaccion, evento: EventoDominio, exitoso: bool):
+        if exitoso:
+            self._repo.registrar_evento_ok(self._correlacion_id, type(evento).__name__, paso.index)
+        else:
+            self._repo.registrar_evento_error(self._correlacion_id, type(evento).__name__, paso.index)
+
+    def registrar_compensacion(self, paso_index: int, compensacion: type):
+        self._repo.registrar_comando(self._correlacion_id, compensacion.__name__, paso_index, pendiente=True)
+
+
+_observador = None
+_lock = threading.Lock()
+
+
+def _observador_para(app) -> ObservadorSaga:
+    global _observador
+    if _observador is None:
+        with _lock:
+            if _observador is None:
+                def procesar(evento: EventoDominio):
+                    coordinador = CoordinadorPagosCoreografia(correlacion_id=str(evento.idTransaction), app=app)
+                    coordinador.inicializar_pasos()
+                    if isinstance(evento, CrearEvento):
+                        coordinador.iniciar()
+                    else:
+                        coordinador.procesar_evento(evento)
+                _observador = ObservadorSaga(procesar)
+    return _observador
+
+
+def observar_mensaje(mensaje, app):
+    """Encola el evento para el saga log; no bloquea al consumidor."""
+    if isinstance(mensaje, EventoDominio) and getattr(mensaje, 'idTransaction', None):
+        _observador_para(app).observar(mensaje)
@@ -2,13 +2,70 @@ import re
 from eventosMS.modulos.sagas.aplicacion.comandos.eventos import EventoCommand, EventoCommandPayload, IniciarSagaPago
 from eventosMS.modulos.sagas.aplicacion.comandos.referidos import ReferidoCommand
 from eventosMS.modulos.sagas.dominio.eventos.eventos import CrearEvento, EventoError, EventoCompensacion, EventoRegistrado
-from eventosMS.seedwork.aplicacion.sagas import CoordinadorOrquestacion, Transaccion, Inicio, Fin
+from eventosMS.seedwork.aplicacion.sagas import CoordinadorOrquestacion, Transaccion, Inicio, Fin, compilar_saga
 from eventosMS.seedwork.aplicacion.comandos import Comando
 from eventosMS.seedwork.dominio.eventos import EventoDominio
 from eventosMS.modulos.sagas.aplicacion.comandos.pagos import PagoCommand
 from eventosMS.modulos.sagas.dominio.eventos.referidos import ReferidoProcesado
 from eventosMS.modulos.sagas.dominio.eventos.pagos import PagoProcesado
 from eventosMS.modulos.sagas.infraestructura.repositorio_saga import RepositorioSaga
+from eventosMS.seedwork.infraestructura.utils import es_coreografia
+
+
+def _comando_evento(evento: CrearEvento) -> EventoCommand:
+    return EventoCommand(
+        idTransaction=evento.id_transaction,
+        comando=evento.comando,
+        tipoEvento=evento.tipo,
+        idReferido=evento.id_referido,
+        idSocio=evento.id_socio,
+        monto=evento.monto,
+        fechaEvento=evento.fecha_evento
+    )
+
+
+def _comando_referido(evento: EventoRegistrado) -> ReferidoCommand:
+    return ReferidoCommand(
+        idSocio=evento.idSocio,
+        idReferido=evento.idReferido,
+        idEvento=evento.idEvento,
+        monto=evento.monto,
+        estado=evento.estado,
+        fechaEvento=evento.fechaEvento,
+        tipoEvento=evento.tipoEvento,
+        idTransaction=evento.idTransaction,
+        comando=evento.comando
+    )
+
+
+def _comando_pago(evento: ReferidoProcesado) -> PagoCommand:
+    return PagoCommand(
+        idTransaction=evento.idTransaction,
+        comando="Iniciar",
+        idEvento=evento.idEvento,
+        idSocio=evento.idSocio,
+        monto=evento.monto,
+        fechaEvento=evento.fechaEvento
+    )
+
+
+# Compilada una sola vez al importar; compartida por todas las instancias
+SAGA_PAGOS = compilar_saga(
+    "SagaPagos",
+    pasos=[
+        Inicio(index=0),
+        Transaccion(index=1, comando=EventoCommand, evento=CrearEvento, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
+        Transaccion(index=2, comando=ReferidoCommand, evento=EventoRegistrado, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
+        Transaccion(index=3, comando=PagoCommand, evento=ReferidoProcesado, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
+        Transaccion(index=4, comando=None, evento=PagoProcesado, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
+        Fin(index=5)
+    ],
+    constructores={
+        (CrearEvento, EventoCommand): _comando_evento,
+        (EventoRegistrado, ReferidoCommand): _comando_referido,
+        (ReferidoProcesado, PagoCommand): _comando_pago,
+    }
+)
 
 
 class CoordinadorPagos(CoordinadorOrquestacion):
@@ -16,19 +73,11 @@ class CoordinadorPagos(CoordinadorOrquestacion):
         self._correlacion_id = correlacion_id
         self._repo = RepositorioSaga(app) if app else None
 
+    definicion = SAGA_PAGOS
+
     @property
     def nombre_saga(self):
-        return "SagaPagos"
-
-    def inicializar_pasos(self):
-        self.pasos = [
-            Inicio(index=0),
-            Transaccion(index=1, comando=EventoCommand, evento=CrearEvento, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
-            Transaccion(index=2, comando=ReferidoCommand, evento=EventoRegistrado, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
-            Transaccion(index=3, comando=PagoCommand, evento=ReferidoProcesado, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
-            Transaccion(index=4, comando=None, evento=PagoProcesado, error=EventoError, compensacion=EventoCompensacion, exitosa=True),
-            Fin(index=5)
-        ]
+        return self.definicion.nombre
 
     def persistir_en_saga_log(self, mensaje):  # type: ignore[override]
         """Compatibilidad con la interfaz abstracta original.
@@ -42,7 +91,7 @@ class CoordinadorPagos(CoordinadorOrquestacion):
         from eventosMS.seedwork.aplicacion.sagas import Inicio as _Inicio, Fin as _Fin
         if isinstance(mensaje, _Inicio):
             # Evitar duplicar si ya existe un inicio para esa transacción
-            if not self._repo.ultimo(self._correlacion_id):
+            if not self._repo.ultimo_estado(self._correlacion_id):
                 self._repo.registrar_inicio(self._correlacion_id)
         elif isinstance(mensaje, _Fin):
             self._repo.registrar_fin(self._correlacion_id, paso=getattr(mensaje, 'index', -1), exito=True)
@@ -63,19 +112,12 @@ class CoordinadorPagos(CoordinadorOrquestacion):
     def publicar_comando(self, evento: EventoDominio, tipo_comando: type):  # type: ignore[override]
         """Publicar comando registrándolo primero en el saga_log.
 
-        Buscamos el índice de la transacción cuyo comando (o compensación) coincide con el tipo_comando.
+        El índice del paso sale de la tabla comando → paso de la definición.
         Guardamos el nombre del comando (clase) y marcamos PENDING.
         """
         if not self._correlacion_id:
             return
-        # Encontrar índice del paso asociado al comando o compensación
-        paso_index = None
-        for p in self.pasos:
-            if isinstance(p, Transaccion) and (p.comando == tipo_comando or p.compensacion == tipo_comando):
-                paso_index = p.index
-                break
-        if paso_index is None:
-            paso_index = -1
+        paso_index = self.definicion.indice_de_comando(tipo_comando)
         # Construir comando real
         comando = self.construir_comando(evento, tipo_comando)
         if comando is None:
@@ -108,58 +150,14 @@ class CoordinadorPagos(CoordinadorOrquestacion):
         # Delegar a la lógica de orquestación (publicará comando o terminará)
         super().procesar_evento(evento)
 
-    def construir_comando(self, evento: EventoDominio, tipo_comando: type):
-        # TODO Transforma un evento en la entrada de un comando
-        # Por ejemplo si el evento que llega es ReservaCreada y el tipo_comando es PagarReserva
-        # Debemos usar los atributos de ReservaCreada para crear el comando PagarReserva
-        print("construir_comando - Construyendo comando")
-        print("evento:", evento)
-        print("tipo_comando:", tipo_comando)
-
-        if isinstance(evento, CrearEvento) and tipo_comando == EventoCommand:
-            print("construir_comando - Construyendo comando para evento CrearEvento")
-            
-            comando = EventoCommand(
-                idTransaction=evento.id_transaction,
-                comando=evento.comando,
-                tipoEvento=evento.tipo,
-                idReferido=evento.id_referido,
-                idSocio=evento.id_socio,
-                monto=evento.monto,
-                fechaEvento=evento.fecha_evento
-                
-            )
-            print("construir_comando - Comando construido:", comando)
-            return comando
-        elif isinstance(evento, EventoRegistrado) and tipo_comando == ReferidoCommand:
-            print("construir_comando - Construyendo comando para evento EventoRegistrado")
-            comando = ReferidoCommand(
-                idSocio=evento.idSocio,
-                idReferido=evento.idReferido,
-                idEvento=evento.idEvento,
-                monto=evento.monto,
-                estado=evento.estado,
-                fechaEvento=evento.fechaEvento,
-                tipoEvento=evento.tipoEvento,
-                idTransaction=evento.idTransaction,
-                comando=evento.comando
-            )
-            return comando
-        elif isinstance(evento, ReferidoProcesado) and tipo_comando == PagoCommand:
-            print("construir_comando - Construyendo comando para evento ReferidoProcesado")
-            comando = PagoCommand(
-                idTransaction=evento.idTransaction,
-                comando="Iniciar",
-                idEvento=evento.idEvento,
-                idSocio=evento.idSocio,
-                monto=evento.monto,
-                fechaEvento=evento.fechaEvento
-            )
-            return comando
-
 
 # TODO Agregue un Listener/Handler para que se puedan redireccionar eventos de dominio
 def oir_mensaje(mensaje, app):
+    if es_coreografia():
+        from eventosMS.modulos.sagas.aplicacion.coordinadores.saga_pagos_coreografia import observar_mensaje
+        observar_mensaje(mensaje, app)
+        return
+
     if isinstance(mensaje, EventoDominio):
         correlation = (
             getattr(mensaje, 'idTransaction', None)
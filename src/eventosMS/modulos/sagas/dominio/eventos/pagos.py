@@ -12,4 +12,8 @@ class PagoProcesado(EventoDominio):
     idSocio : str = None
     monto : float = None
     estado : str = None
-    fechaEvento : str = None
\ No newline at end of file
+    fechaEvento : str = None
+
+@dataclass
+class PagoRechazado(PagoProcesado):
+    ...
@@ -8,12 +8,27 @@ from eventosMS.modulos.sagas.infraestructura.schema.v1.eventos import EventoEven
 from eventosMS.modulos.sagas.aplicacion.coordinadores.saga_reservas import oir_mensaje
 from modulos.eventos.infraestructura.schema.v1.eventos import PagoCompletado, EventoCommand
 from seedwork.infraestructura import utils
+from seedwork.infraestructura.utils import es_coreografia
 from seedwork.aplicacion.comandos import ejecutar_commando
+from seedwork.infraestructura.esquemas import esquema_avro
 from eventosMS.modulos.sagas.dominio.eventos.eventos import CrearEvento, EventoRegistrado
-from eventosMS.modulos.sagas.dominio.eventos.pagos import PagoProcesado as PagoProcesadoDominio
+from eventosMS.modulos.sagas.dominio.eventos.pagos import PagoProcesado as PagoProcesadoDominio, PagoRechazado
 from eventosMS.modulos.sagas.dominio.eventos.referidos import ReferidoProcesado as ReferidoProcesadoDominio
 
 
+def crear_evento_local(evento: CrearEvento):
+    from modulos.eventos.aplicacion.comandos.crear_evento import CrearEvento as CrearEventoComando
+    ejecutar_commando(CrearEventoComando(
+        tipo=evento.tipo,
+        id_socio=evento.id_socio,
+        id_referido=evento.id_referido,
+        monto=evento.monto,
+        fecha_evento=evento.fecha_evento,
+        comando=evento.comando,
+        id_transaction=evento.id_transaction
+    ))
+
+
 def subscribirse_a_eventos_bff(app):
     """
     Consumidor del tópico eventos-bff que procesa eventos de la BFF
@@ -35,7 +50,7 @@ def subscribirse_a_eventos_bff(app):
             'comando-saga',
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='SagaCommand',
-            schema=AvroSchema(IniciarSagaPago),
+            schema=esquema_avro(IniciarSagaPago),
             initial_position=_pulsar.InitialPosition.Earliest
         )
 
@@ -60,7 +75,10 @@ def subscribirse_a_eventos_bff(app):
                         id_transaction=datos.data.idTransaction,
                     )
                     print(f"🔗 correlation/id_transaction utilizado como traza: {datos.data.idTransaction}")
-                    
+
+                    if es_coreografia():
+                        # Sin el salto por eventos-comando: el evento se crea aquí mismo
+                        crear_evento_local(datos_dto)
                     oir_mensaje(datos_dto, app)
 
                     # acknowledge the message to remove it from the subscription
@@ -101,7 +119,7 @@ def subscribirse_a_eventos_tracking(app):
             'eventos-tracking',
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='saga-eventos-tracking',
-            schema=AvroSchema(EventoEventoRegistrado),
+            schema=esquema_avro(EventoEventoRegistrado),
             initial_position=_pulsar.InitialPosition.Earliest
         )
 
@@ -170,7 +188,7 @@ def subscribirse_a_evento_referido(app):
             'eventos-referido',
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='saga-evento-referido',
-            schema=AvroSchema(ReferidoProcesado),
+            schema=esquema_avro(ReferidoProcesado),
             initial_position=_pulsar.InitialPosition.Earliest
         )
 
@@ -234,7 +252,7 @@ def subscribirse_a_eventos_pago(app):
             'eventos-pago',
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='saga-evento-pago',
-            schema=AvroSchema(PagoProcesado),
+            schema=esquema_avro(PagoProcesado),
             initial_position=_pulsar.InitialPosition.Earliest
         )
 
@@ -252,7 +270,18 @@ def subscribirse_a_eventos_pago(app):
                     print(f"📋 Datos del evento: {datos}")
                     print(f"📋 Datos del data: {datos.__dict__}")
 
-                    if datos.estado.lower() == 'rechazado':
+                    if datos.estado.lower() == 'rechazado' and es_coreografia():
+                        # Referidos compensa por su cuenta al oír eventos-pago
+                        oir_mensaje(PagoRechazado(
+                            idTransaction=datos.idTransaction,
+                            idPago=datos.idPago,
+                            idEvento=datos.idEvento,
+                            idSocio=datos.idSocio,
+                            monto=datos.monto,
+                            estado=datos.estado,
+                            fechaEvento=datos.fechaEvento
+                        ), app)
+                    elif datos.estado.lower() == 'rechazado':
                         evento_dto = EventoRegistrado(
                             idTransaction=datos.idTransaction,
                             idEvento=datos.idEvento,
@@ -11,6 +11,7 @@ from modulos.sagas.infraestructura.schema.v1.comandos import (
 
 from pagos.seedworks.infraestructura.schema.v1.eventos import EventoIntegracion
 from seedwork.infraestructura import utils
+from seedwork.infraestructura.esquemas import esquema_avro
 
 epoch = datetime.datetime.utcfromtimestamp(0)
 
@@ -19,20 +20,12 @@ def unix_time_millis(dt):
 
 class Despachador:
 
-    def _publicar_mensaje(self, mensaje, topico):
+    def _publicar_mensaje(self, mensaje, topico, llave: str = None):
         cliente = pulsar.Client(f'pulsar://{utils.broker_host()}:6650')
-        # Selecciona el esquema según el tipo de mensaje
-        if isinstance(mensaje, EventoCommand):
-            schema = AvroSchema(EventoCommand)
-        elif isinstance(mensaje, ReferidoProcesado):
-            schema = AvroSchema(ReferidoProcesado)
-        # Agrega más tipos si lo necesitas
-        else:
-            schema = AvroSchema(mensaje.__class__)
-            #raise ValueError(f"Tipo de mensaje no soportado: {type(mensaje)}")
-        publicador = cliente.create_producer(topico, schema=AvroSchema(mensaje.__class__))
-        # publicador = cliente.create_producer(topico, schema=schema)
-        publicador.send(mensaje)
+        # Esquema compilado una sola vez por clase de mensaje
+        publicador = cliente.create_producer(topico, schema=esquema_avro(mensaje.__class__))
+        # La llave (idSocio) ordena el mensaje en las suscripciones Key_Shared de los consumidores
+        publicador.send(mensaje, partition_key=llave) if llave else publicador.send(mensaje)
         cliente.close()
 
     def publicar_evento_command(self, mensaje: dict):
@@ -82,7 +75,7 @@ class Despachador:
         print(f"Publicando {evento_integracion}")
 
         # Publicamos el evento de integración que acabamos de crear
-        self._publicar_mensaje(evento_integracion, 'comando-referido')
+        self._publicar_mensaje(evento_integracion, 'comando-referido', llave=payload.idSocio)
 
 
     def publicar_pago_command(self, mensaje: dict):
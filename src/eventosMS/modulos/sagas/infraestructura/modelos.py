@@ -11,4 +11,23 @@ class SagaLog(db.Model):
     nombre = db.Column(db.String(120), nullable=False)   # CrearEvento, ReferidoCommand, etc.
     paso = db.Column(db.Integer, nullable=True) # index del paso 
     estado = db.Column(db.String(30), nullable=False)    # RUNNING, OK, ERROR, COMPLETED, FAILED, PENDING
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class SagaSnapshot(db.Model):
+    """Estado de una saga activa según el saga_log hasta la marca vigente."""
+    __tablename__ = 'saga_snapshot'
+    id_transaction = db.Column(db.String(120), primary_key=True)
+    tipo = db.Column(db.String(40), nullable=False)
+    nombre = db.Column(db.String(120), nullable=False)
+    paso = db.Column(db.Integer, nullable=True)
+    estado = db.Column(db.String(30), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)   # del último registro aplicado
+    id_log = db.Column(db.String(36), nullable=False)
+
+
+class SagaSnapshotMarca(db.Model):
+    """Hasta dónde del saga_log cubren los snapshots (una sola fila)."""
+    __tablename__ = 'saga_snapshot_marca'
+    id = db.Column(db.Integer, primary_key=True)
+    hasta = db.Column(db.DateTime, nullable=False)
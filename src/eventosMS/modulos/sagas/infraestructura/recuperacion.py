@@ -0,0 +1,223 @@
+"""Snapshots y recuperación del estado de las sagas
+
+El estado de una saga es su último registro en saga_log. En lugar de
+recorrer el saga_log completo al arrancar:
+
+- Un job periódico condensa el tramo nuevo del saga_log en ``saga_snapshot``
+  (una fila por saga activa) y avanza la marca ``saga_snapshot_marca``.
+- Al arrancar se cargan los snapshots y se re-aplica sólo la cola del log
+  posterior a la marca, en paralelo por shard de id_transaction. El trabajo
+  queda acotado por el intervalo de snapshot, no por el tamaño del historial.
+- El resultado calienta ``sagas_activas`` antes de iniciar los consumidores;
+  luego RepositorioSaga lo mantiene al día con cada registro que inserta.
+
+"""
+
+import os
+import time
+import logging
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from sqlalchemy import select, delete, func, and_
+
+from config.db import db
+from eventosMS.modulos.sagas.infraestructura.modelos import SagaLog, SagaSnapshot, SagaSnapshotMarca
+
+logger = logging.getLogger(__name__)
+
+SAGA_SNAPSHOT_INTERVALO_SEGUNDOS = int(os.getenv('SAGA_SNAPSHOT_INTERVALO_SEGUNDOS', 60))
+SAGA_RECUPERACION_SHARDS = int(os.getenv('SAGA_RECUPERACION_SHARDS', 4))
+# Sin snapshot previo sólo se mira esta ventana del log
+SAGA_RECUPERACION_VENTANA_HORAS = int(os.getenv('SAGA_RECUPERACION_VENTANA_HORAS', 24))
+# Registros que confirman tarde con timestamp anterior a la marca
+MARGEN = datetime.timedelta(seconds=int(os.getenv('SAGA_SNAPSHOT_MARGEN_SEGUNDOS', 30)))
+
+ESTADOS_TERMINALES = {'COMPLETED', 'FAILED'}
+
+
+@dataclass
+class EstadoSaga:
+    id_transaction: str
+    tipo: str
+    nombre: str
+    paso: int
+    estado: str
+    timestamp: datetime.datetime
+    id_log: str
+
+    @property
+    def terminada(self) -> bool:
+        return self.tipo == 'fin' or self.estado in ESTADOS_TERMINALES
+
+    @classmethod
+    def desde_registro(cls, registro) -> 'EstadoSaga':
+        return cls(
+            id_transaction=registro.id_transaction,
+            tipo=registro.tipo,
+            nombre=registro.nombre,
+            paso=registro.paso,
+            estado=registro.estado,
+            timestamp=registro.timestamp,
+            id_log=getattr(registro, 'id_log', None) or registro.id
+        )
+
+    def es_posterior_a(self, otro: 'EstadoSaga') -> bool:
+        # id_log desempata registros con el mismo timestamp
+        return (self.timestamp, self.id_log or '') > (otro.timestamp, otro.id_log or '')
+
+
+class CacheSagasActivas:
+
+    def __init__(self):
+        self._estados: dict[str, EstadoSaga] = dict()
+        self._lock = threading.Lock()
+        self.lista = threading.Event()
+
+    def aplicar(self, estado: EstadoSaga) -> bool:
+        """Aplica el estado si es más reciente. Las sagas terminadas salen del caché."""
+        with self._lock:
+            actual = self._estados.get(estado.id_transaction)
+            if actual is not None and not estado.es_posterior_a(actual):
+                return False
+            if estado.terminada:
+                self._estados.pop(estado.id_transaction, None)
+            else:
+                self._estados[estado.id_transaction] = estado
+            return True
+
+    def aplicar_registro(self, registro):
+        self.aplicar(EstadoSaga.desde_registro(registro))
+
+    def obtener(self, id_transaction: str) -> EstadoSaga | None:
+        return self._estados.get(id_transaction)
+
+    def limpiar(self):
+        with self._lock:
+            self._estados.clear()
+        self.lista.clear()
+
+    def __len__(self) -> int:
+        return len(self._estados)
+
+
+sagas_activas = CacheSagasActivas()
+
+
+def _filtro_shard(engine, columna, shard: int, shards: int):
+    if shards == 1:
+        return True
+    return func.abs(func.hashtext(columna)) % shards == shard
+
+
+def _shards(engine) -> int:
+    # hashtext sólo existe en PostgreSQL
+    return SAGA_RECUPERACION_SHARDS if engine.dialect.name == 'postgresql' else 1
+
+
+def _leer_marca(conexion) -> datetime.datetime | None:
+    return conexion.execute(select(SagaSnapshotMarca.hasta).where(SagaSnapshotMarca.id == 1)).scalar()
+
+
+def _ultimos_por_saga(desde: datetime.datetime, hasta: datetime.datetime = None, filtro=True):
+    """Último registro de cada saga con actividad en (desde, hasta]."""
+    condiciones = [SagaLog.timestamp > desde, filtro]
+    if hasta is not None:
+        condiciones.append(SagaLog.timestamp <= hasta)
+    numerados = select(
+        SagaLog.id, SagaLog.id_transaction, SagaLog.tipo, SagaLog.nombre,
+        SagaLog.paso, SagaLog.estado, SagaLog.timestamp,
+        func.row_number().over(
+            partition_by=SagaLog.id_transaction,
+            order_by=(SagaLog.timestamp.desc(), SagaLog.id.desc())
+        ).label('orden')
+    ).where(and_(*condiciones)).subquery()
+    return select(numerados).where(numerados.c.orden == 1)
+
+
+def _recuperar_shard(engine, desde: datetime.datetime, shard: int, shards: int) -> list[EstadoSaga]:
+    estados: dict[str, EstadoSaga] = dict()
+    with engine.connect() as conexion:
+        for fila in conexion.execute(
+            select(SagaSnapshot).where(_filtro_shard(engine, SagaSnapshot.id_transaction, shard, shards))
+        ):
+            estados[fila.id_transaction] = EstadoSaga.desde_registro(fila)
+
+        for fila in conexion.execute(
+            _ultimos_por_saga(desde, filtro=_filtro_shard(engine, SagaLog.id_transaction, shard, shards))
+        ):
+            nuevo = EstadoSaga.desde_registro(fila)
+            actual = estados.get(nuevo.id_transaction)
+            if actual is None or nuevo.es_posterior_a(actual):
+                estados[nuevo.id_transaction] = nuevo
+    return [estado for estado in estados.values() if not estado.terminada]
+
+
+def recuperar_sagas(app) -> int:
+    """Carga snapshots + cola del log en ``sagas_activas``. Retorna las sagas activas."""
+    inicio = time.monotonic()
+    with app.app_context():
+        engine = db.engine
+    with engine.connect() as conexion:
+        marca = _leer_marca(conexion)
+    desde = (marca - MARGEN) if marca else datetime.datetime.utcnow() - datetime.timedelta(hours=SAGA_RECUPERACION_VENTANA_HORAS)
+
+    shards = _shards(engine)
+    with ThreadPoolExecutor(max_workers=shards, thread_name_prefix='recuperacion-saga') as pool:
+        resultados = pool.map(lambda shard: _recuperar_shard(engine, desde, shard, shards), range(shards))
+        sagas_activas.limpiar()
+        for estados in resultados:
+            for estado in estados:
+                sagas_activas.aplicar(estado)
+    sagas_activas.lista.set()
+
+    print(f"♻️ Sagas recuperadas: {len(sagas_activas)} activas en {time.monotonic() - inicio:.2f}s (desde {desde})")
+    return len(sagas_activas)
+
+
+def tomar_snapshot(app) -> int:
+    """Condensa el saga_log posterior a la marca en saga_snapshot y avanza la marca."""
+    with app.app_context():
+        engine = db.engine
+    hasta = datetime.datetime.utcnow() - MARGEN
+
+    with engine.begin() as conexion:
+        marca = _leer_marca(conexion)
+        desde = marca or hasta - datetime.timedelta(hours=SAGA_RECUPERACION_VENTANA_HORAS)
+        if desde >= hasta:
+            return 0
+
+        ultimos = [EstadoSaga.desde_registro(fila) for fila in conexion.execute(_ultimos_por_saga(desde, hasta))]
+        terminadas = [estado.id_transaction for estado in ultimos if estado.terminada]
+        activas = [estado for estado in ultimos if not estado.terminada]
+
+        if terminadas:
+            conexion.execute(delete(SagaSnapshot).where(SagaSnapshot.id_transaction.in_(terminadas)))
+        if activas:
+            _upsert(conexion, SagaSnapshot, [estado.__dict__ for estado in activas], ['id_transaction'])
+        _upsert(conexion, SagaSnapshotMarca, [dict(id=1, hasta=hasta)], ['id'])
+    return len(ultimos)
+
+
+def _upsert(conexion, modelo, filas: list[dict], llave: list[str]):
+    if conexion.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    sentencia = insert(modelo).values(filas)
+    columnas = {c: sentencia.excluded[c] for c in filas[0] if c not in llave}
+    conexion.execute(sentencia.on_conflict_do_update(index_elements=llave, set_=columnas))
+
+
+def comenzar_snapshots(app):
+    def ciclo():
+        while True:
+            time.sleep(SAGA_SNAPSHOT_INTERVALO_SEGUNDOS)
+            try:
+                tomar_snapshot(app)
+            except Exception as e:
+                logger.error(f'Error tomando snapshot de sagas: {e}')
+
+    threading.Thread(target=ciclo, daemon=True, name='snapshot-sagas').start()
@@ -1,5 +1,8 @@
 from config.db import db
 from eventosMS.modulos.sagas.infraestructura.modelos import SagaLog
+from config.retencion import purgar_saga_log
+from eventosMS.modulos.sagas.infraestructura.recuperacion import sagas_activas, EstadoSaga
+import datetime
 import uuid
 
 class RepositorioSaga:
@@ -14,10 +17,15 @@ class RepositorioSaga:
                 tipo=tipo,
                 nombre=nombre,
                 paso=paso,
-                estado=estado
+                estado=estado,
+                timestamp=datetime.datetime.utcnow()
             )
+            # Se arma antes del commit para no recargar el registro expirado; el id
+            # va explícito porque el default de la columna sólo se asigna en el flush
+            nuevo_estado = EstadoSaga.desde_registro(entry)
             db.session.add(entry)
             db.session.commit()
+            sagas_activas.aplicar(nuevo_estado)
             return entry
 
     def registrar_inicio(self, id_transaction):
@@ -65,6 +73,19 @@ class RepositorioSaga:
             id_transaction=id_transaction
         )
 
+    def estado(self, id_transaction) -> EstadoSaga | None:
+        """Estado en memoria de una saga activa (None si terminó o no existe)."""
+        return sagas_activas.obtener(str(id_transaction))
+
+    def ultimo_estado(self, id_transaction) -> EstadoSaga | None:
+        """Estado de la saga: del caché si está activa; si no, del último registro del saga_log."""
+        estado = self.estado(id_transaction)
+        if estado is not None:
+            return estado
+        with self.app.app_context():
+            registro = self.ultimo(id_transaction)
+            return EstadoSaga.desde_registro(registro) if registro else None
+
     def ultimo(self, id_transaction):
         with self.app.app_context():
             return (
@@ -72,3 +93,7 @@ class RepositorioSaga:
                 .order_by(SagaLog.timestamp.desc())
                 .first()
             )
+
+    def limpiar_antiguos(self, dias: int) -> int:
+        with self.app.app_context():
+            return purgar_saga_log(dias).filas
@@ -2,9 +2,16 @@ from abc import ABC, abstractmethod
 from seedwork.aplicacion.comandos import Comando
 from seedwork.dominio.eventos import EventoDominio
 from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional
 from .comandos import ejecutar_commando
 import uuid
+import queue
+import logging
 import datetime
+import threading
+
+logger = logging.getLogger(__name__)
 
 class CoordinadorSaga(ABC):
     id_correlacion: uuid.UUID
@@ -13,16 +20,6 @@ class CoordinadorSaga(ABC):
     def persistir_en_saga_log(self, mensaje):
         ...
 
-    @abstractmethod
-    def construir_comando(self, evento: EventoDominio, tipo_comando: type) -> Comando:
-        ...
-
-    def publicar_comando(self,evento: EventoDominio, tipo_comando: type):
-        comando = self.construir_comando(evento, tipo_comando)
-        print("publicar_comando - Publicando comando:", type(comando).__name__)
-        print(f"comando - {comando}")
-        ejecutar_commando(comando)
-
     @abstractmethod
     def inicializar_pasos(self):
         ...
@@ -63,28 +60,188 @@ class Transaccion(Paso):
     compensacion: Comando
     exitosa: bool
 
+def _buscar_por_tipo(tabla: Mapping, tipo: type):
+    """Busca por el tipo exacto y luego por sus ancestros (MRO)."""
+    for clase in tipo.__mro__:
+        if clase in tabla:
+            return tabla[clase]
+    return None
+
+
+@dataclass(frozen=True)
+class DefinicionSaga:
+    """Saga compilada en tablas de transición inmutables.
+
+    Se construye una sola vez al importar el coordinador y se comparte entre
+    todas las instancias, de modo que el despacho de un evento es una búsqueda
+    en diccionario sin importar cuántos pasos tenga la saga.
+    """
+    nombre: str
+    pasos: tuple
+    por_evento: Mapping[type, tuple]
+    por_comando: Mapping[type, int]
+    constructores: Mapping[tuple, Callable]
+    indice_ultima_transaccion: int
+
+    def paso_de_evento(self, evento: EventoDominio) -> tuple:
+        resultado = _buscar_por_tipo(self.por_evento, type(evento))
+        if resultado is None:
+            raise Exception("Evento no hace parte de la transacción")
+        return resultado
+
+    def indice_de_comando(self, tipo_comando: type) -> int:
+        return self.por_comando.get(tipo_comando, -1)
+
+    def constructor(self, evento: EventoDominio, tipo_comando: type) -> Optional[Callable]:
+        for clase in type(evento).__mro__:
+            constructor = self.constructores.get((clase, tipo_comando))
+            if constructor is not None:
+                return constructor
+        return None
+
+
+def compilar_saga(nombre: str, pasos: list[Paso], constructores: dict = None) -> DefinicionSaga:
+    """Compila la lista de pasos en tablas evento → paso y comando → índice.
+
+    Si un tipo de evento o comando aparece en varios pasos gana el primero,
+    igual que el recorrido lineal que reemplaza.
+    """
+    por_evento, por_comando = {}, {}
+    for i, paso in enumerate(pasos):
+        if not isinstance(paso, Transaccion):
+            continue
+        for tipo in (paso.evento, paso.error):
+            if tipo is not None:
+                por_evento.setdefault(tipo, (paso, i))
+        for tipo in (paso.comando, paso.compensacion):
+            if tipo is not None:
+                por_comando.setdefault(tipo, paso.index)
+
+    return DefinicionSaga(
+        nombre=nombre,
+        pasos=tuple(pasos),
+        por_evento=MappingProxyType(por_evento),
+        por_comando=MappingProxyType(por_comando),
+        constructores=MappingProxyType(dict(constructores or {})),
+        indice_ultima_transaccion=len(pasos) - 2
+    )
+
+
 class CoordinadorCoreografia(CoordinadorSaga, ABC):
-    # TODO Piense como podemos hacer un Coordinador con coreografía y Sagas
-    # Piense en como se tiene la clase Transaccion, donde se cuenta con un atributo de compensación
-    # ¿Tal vez un manejo de tuplas o diccionarios?
-    ...
+    """Coordinador pasivo de una saga coreografiada.
+
+    Los participantes reaccionan directamente a los eventos de integración de
+    los demás, así que este coordinador no publica comandos: sólo observa los
+    eventos para llevar el saga log. Cada paso declara su compensación; ante
+    un evento de error se registran como pendientes las compensaciones de los
+    pasos ya completados, en orden inverso. Las ejecuta el participante dueño
+    de cada paso al recibir el mismo evento de error.
+    """
+    definicion: DefinicionSaga
+    pasos: tuple[Paso, ...]
+
+    def inicializar_pasos(self):
+        self.pasos = self.definicion.pasos
+
+    def obtener_paso_dado_un_evento(self, evento: EventoDominio):
+        return self.definicion.paso_de_evento(evento)
+
+    def es_ultima_transaccion(self, index):
+        return index == self.definicion.indice_ultima_transaccion
+
+    def compensaciones(self, index: int) -> list[tuple[int, type]]:
+        return [
+            (paso.index, paso.compensacion)
+            for paso in reversed(self.definicion.pasos[1:index])
+            if isinstance(paso, Transaccion) and paso.compensacion is not None
+        ]
+
+    @abstractmethod
+    def registrar_paso(self, paso: Transaccion, evento: EventoDominio, exitoso: bool):
+        ...
+
+    @abstractmethod
+    def registrar_compensacion(self, paso_index: int, compensacion: type):
+        ...
+
+    def procesar_evento(self, evento: EventoDominio):
+        paso, index = self.obtener_paso_dado_un_evento(evento)
+        if paso.error is not None and isinstance(evento, paso.error):
+            self.registrar_paso(paso, evento, exitoso=False)
+            for paso_index, compensacion in self.compensaciones(index):
+                self.registrar_compensacion(paso_index, compensacion)
+            self.terminar(exito=False)
+            return
+
+        self.registrar_paso(paso, evento, exitoso=True)
+        if self.es_ultima_transaccion(index):
+            self.terminar(exito=True)
+
+
+class ObservadorSaga:
+    """Procesa en un hilo propio, en orden de llegada, los eventos observados.
+
+    Escribir el saga log no suma latencia al consumidor que recibió el
+    evento. La cola es acotada: si se llena, el consumidor espera.
+    """
+
+    def __init__(self, procesar: Callable[[EventoDominio], None], capacidad: int = 10_000):
+        self._procesar = procesar
+        self._cola: queue.Queue = queue.Queue(maxsize=capacidad)
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def observar(self, evento: EventoDominio):
+        if self._hilo is None:
+            with self._lock:
+                if self._hilo is None:
+                    self._hilo = threading.Thread(target=self._ciclo, daemon=True, name='observador-saga')
+                    self._hilo.start()
+        self._cola.put(evento)
+
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    def cerrar(self, timeout: float = 5.0):
+        if self._hilo is not None:
+            self._cola.put(None)
+            self._hilo.join(timeout)
+
+    def _ciclo(self):
+        while True:
+            evento = self._cola.get()
+            if evento is None:
+                break
+            try:
+                self._procesar(evento)
+            except Exception as e:
+                logger.error(f'Observador de saga: error procesando {type(evento).__name__}: {e}')
+            finally:
+                self._cola.task_done()
 
 class CoordinadorOrquestacion(CoordinadorSaga, ABC):
-    pasos: list[Paso]
+    definicion: DefinicionSaga
+    pasos: tuple[Paso, ...]
     index: int
-    
+
+    def inicializar_pasos(self):
+        self.pasos = self.definicion.pasos
+
     def obtener_paso_dado_un_evento(self, evento: EventoDominio):
-        for i, paso in enumerate(self.pasos):
-            if not isinstance(paso, Transaccion):
-                continue
-
-            if isinstance(evento, paso.evento) or isinstance(evento, paso.error):
-                return paso, i
-        raise Exception("Evento no hace parte de la transacción")
-                
+        return self.definicion.paso_de_evento(evento)
+
     def es_ultima_transaccion(self, index):
-        print(f"index: {index}, len(self.pasos): {len(self.pasos)}")
-        return index == len(self.pasos) - 2
+        return index == self.definicion.indice_ultima_transaccion
+
+    def construir_comando(self, evento: EventoDominio, tipo_comando: type) -> Comando:
+        constructor = self.definicion.constructor(evento, tipo_comando)
+        return constructor(evento) if constructor else None
+
+    def publicar_comando(self,evento: EventoDominio, tipo_comando: type):
+        comando = self.construir_comando(evento, tipo_comando)
+        print("publicar_comando - Publicando comando:", type(comando).__name__)
+        print(f"comando - {comando}")
+        ejecutar_commando(comando)
 
     def procesar_evento(self, evento: EventoDominio):
         paso, index = self.obtener_paso_dado_un_evento(evento)
@@ -0,0 +1,102 @@
+"""Enrutamiento de lecturas a réplica del seedwork
+
+En este archivo usted encontrará el enrutador que envía los queries de sólo
+lectura a una réplica, de modo que las consultas de dashboards no compitan
+con las escrituras de las sagas por conexiones y locks de la primaria.
+
+Se lee de la primaria cuando:
+- No hay réplica configurada.
+- El lag de la réplica supera la tolerancia configurada (o no se pudo medir).
+- El query trae una llave (idTransaction, idSocio) que este proceso escribió
+  hace menos de la ventana de read-your-writes.
+
+Los repositorios obtienen la sesión con ``sesion_lectura(db.session)``: fuera
+de un bloque ``lectura()`` siempre es la sesión primaria, así que los
+comandos no cambian de comportamiento.
+
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from seedwork.infraestructura.cache import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+_sesion_actual: ContextVar = ContextVar('sesion_lectura', default=None)
+
+
+def sesion_lectura(por_defecto):
+    sesion = _sesion_actual.get()
+    return sesion if sesion is not None else por_defecto
+
+
+class EnrutadorLecturas:
+
+    def __init__(self, fabrica_sesion_replica: Optional[Callable] = None, medir_lag: Optional[Callable] = None,
+                 tolerancia_segundos: float = 5.0, ventana_escritura_segundos: float = 30.0,
+                 intervalo_medicion_segundos: float = 1.0, capacidad_transacciones: int = 10_000):
+        self._fabrica_sesion_replica = fabrica_sesion_replica
+        self._medir_lag = medir_lag
+        self.tolerancia_segundos = tolerancia_segundos
+        self.ventana_escritura_segundos = ventana_escritura_segundos
+        self._intervalo_medicion = intervalo_medicion_segundos
+        self._escrituras = CacheLRU(capacidad_transacciones)
+        self._lag = float('inf')
+        self._lag_medido_en = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def tiene_replica(self) -> bool:
+        return self._fabrica_sesion_replica is not None
+
+    def registrar_escritura(self, *llaves: str):
+        ahora = time.monotonic()
+        for llave in llaves:
+            if llave:
+                self._escrituras.guardar(str(llave), ahora)
+
+    def escritura_reciente(self, llave: str) -> bool:
+        if not llave:
+            return False
+        escrito_en = self._escrituras.obtener(str(llave))
+        return escrito_en is not None and time.monotonic() - escrito_en < self.ventana_escritura_segundos
+
+    def lag_replica(self) -> float:
+        """Lag en segundos, medido como máximo una vez por intervalo."""
+        if self._medir_lag is None:
+            return 0.0
+        ahora = time.monotonic()
+        if ahora - self._lag_medido_en >= self._intervalo_medicion:
+            with self._lock:
+                if ahora - self._lag_medido_en >= self._intervalo_medicion:
+                    try:
+                        self._lag = float(self._medir_lag())
+                    except Exception as e:
+                        logger.warning(f'No se pudo medir el lag de la réplica: {e}')
+                        self._lag = float('inf')
+                    self._lag_medido_en = ahora
+        return self._lag
+
+    def usar_replica(self, *llaves: str) -> bool:
+        if not self.tiene_replica or any(self.escritura_reciente(llave) for llave in llaves):
+            return False
+        return self.lag_replica() <= self.tolerancia_segundos
+
+    @contextmanager
+    def lectura(self, *llaves: str):
+        if not self.usar_replica(*llaves):
+            yield None
+            return
+
+        sesion = self._fabrica_sesion_replica()
+        token = _sesion_actual.set(sesion)
+        try:
+            yield sesion
+        finally:
+            _sesion_actual.reset(token)
+            sesion.close()
@@ -0,0 +1,230 @@
+"""Retención de tablas append-only del seedwork
+
+En este archivo usted encontrará la limpieza de filas antiguas para tablas que
+crecen sin límite (eventos, saga_log).
+
+Dos estrategias, elegidas por tabla en tiempo de ejecución:
+- Tabla particionada por mes (PostgreSQL, PARTITION BY RANGE): se crean las
+  particiones de los próximos meses y las vencidas se hacen DETACH + DROP.
+- Tabla normal: DELETE por lotes acotados guiados por el índice de la columna
+  de fecha, un commit por lote, con pausa entre lotes y espera cuando el lag
+  de replicación supera el umbral.
+
+Todas las sentencias corren con lock_timeout para que la limpieza ceda ante
+el tráfico en vivo en lugar de encolarse detrás de él.
+
+"""
+
+import datetime
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import Table, select, delete, text, inspect as sa_inspect
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoliticaRetencion:
+    tabla: Table
+    columna_fecha: str
+    dias: int
+
+    @property
+    def nombre(self) -> str:
+        return self.tabla.name
+
+    def corte(self, ahora: datetime.datetime = None) -> datetime.datetime:
+        return (ahora or datetime.datetime.utcnow()) - datetime.timedelta(days=self.dias)
+
+
+@dataclass
+class ResultadoRetencion:
+    tabla: str
+    particiones: int = 0
+    filas: int = 0
+
+
+def inicio_mes(fecha: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(fecha: datetime.datetime, meses: int) -> datetime.datetime:
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return datetime.datetime(indice // 12, indice % 12 + 1, 1)
+
+
+class Retencion:
+
+    def __init__(self, engine, tamano_lote: int = 1000, pausa_segundos: float = 0.1,
+                 max_lag_segundos: float = 5.0, lock_timeout_ms: int = 2000, meses_adelante: int = 2):
+        self.engine = engine
+        self.tamano_lote = tamano_lote
+        self.pausa_segundos = pausa_segundos
+        self.max_lag_segundos = max_lag_segundos
+        self.lock_timeout_ms = lock_timeout_ms
+        self.meses_adelante = meses_adelante
+
+    @property
+    def es_postgres(self) -> bool:
+        return self.engine.dialect.name == 'postgresql'
+
+    # ------------------ Particiones ------------------ #
+    def es_particionada(self, politica: PoliticaRetencion) -> bool:
+        if not self.es_postgres:
+            return False
+        with self.engine.connect() as conexion:
+            return conexion.execute(text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :tabla"
+            ), dict(tabla=politica.nombre)).first() is not None
+
+    def crear_tabla_particionada(self, politica: PoliticaRetencion) -> bool:
+        """Crea la tabla particionada por mes si todavía no existe.
+
+        Debe llamarse antes de ``create_all``. La llave primaria incluye la
+        columna de fecha porque PostgreSQL lo exige en tablas particionadas.
+        """
+        if not self.es_postgres or sa_inspect(self.engine).has_table(politica.nombre):
+            return False
+
+        dialecto = self.engine.dialect
+        columnas = [
+            f"{c.name} {c.type.compile(dialect=dialecto)}{'' if c.nullable else ' NOT NULL'}"
+            for c in politica.tabla.columns
+        ]
+        llave = [c.name for c in politica.tabla.primary_key.columns]
+        if politica.columna_fecha not in llave:
+            llave.append(politica.columna_fecha)
+
+        with self.engine.begin() as conexion:
+            conexion.execute(text(
+                f"CREATE TABLE {politica.nombre} ({', '.join(columnas)}, PRIMARY KEY ({', '.join(llave)})) "
+                f"PARTITION BY RANGE ({politica.columna_fecha})"
+            ))
+            conexion.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {politica.nombre}_default PARTITION OF {politica.nombre} DEFAULT"
+            ))
+            # create_all omite la tabla ya existente, así que los índices se crean aquí
+            for indice in politica.tabla.indexes:
+                indice.create(conexion, checkfirst=True)
+        self.asegurar_particiones(politica)
+        logger.info(f'Retención: tabla {politica.nombre} creada con particiones mensuales')
+        return True
+
+    def asegurar_particiones(self, politica: PoliticaRetencion, ahora: datetime.datetime = None):
+        mes = inicio_mes(ahora or datetime.datetime.utcnow())
+        with self.engine.begin() as conexion:
+            self._lock_timeout(conexion)
+            for i in range(self.meses_adelante + 1):
+                desde, hasta = sumar_meses(mes, i), sumar_meses(mes, i + 1)
+                conexion.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {self._nombre_particion(politica, desde)} "
+                    f"PARTITION OF {politica.nombre} FOR VALUES FROM ('{desde:%Y-%m-%d}') TO ('{hasta:%Y-%m-%d}')"
+                ))
+
+    def _particiones(self, conexion, politica: PoliticaRetencion) -> list[str]:
+        filas = conexion.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :tabla"
+        ), dict(tabla=politica.nombre))
+        return [fila.relname for fila in filas]
+
+    def _eliminar_particiones(self, politica: PoliticaRetencion, ahora: datetime.datetime = None) -> int:
+        corte = politica.corte(ahora)
+        eliminadas = 0
+        with self.engine.connect() as conexion:
+            particiones = self._particiones(conexion, politica)
+
+        for particion in particiones:
+            sufijo = particion.rsplit('_p', 1)[-1]
+            if not sufijo.isdigit() or len(sufijo) != 6:
+                continue
+            fin_particion = sumar_meses(datetime.datetime(int(sufijo[:4]), int(sufijo[4:]), 1), 1)
+            if fin_particion > corte:
+                continue
+            try:
+                with self.engine.begin() as conexion:
+                    self._lock_timeout(conexion)
+                    conexion.execute(text(f"ALTER TABLE {politica.nombre} DETACH PARTITION {particion}"))
+                    conexion.execute(text(f"DROP TABLE {particion}"))
+                eliminadas += 1
+                logger.info(f'Retención: partición {particion} eliminada')
+            except OperationalError as e:
+                # lock_timeout: se reintenta en la siguiente ejecución
+                logger.warning(f'Retención: no se pudo eliminar {particion}: {e}')
+        return eliminadas
+
+    @staticmethod
+    def _nombre_particion(politica: PoliticaRetencion, mes: datetime.datetime) -> str:
+        return f"{politica.nombre}_p{mes:%Y%m}"
+
+    # ------------------ Borrado por lotes ------------------ #
+    def _sentencia_lote(self, politica: PoliticaRetencion, ahora: datetime.datetime = None):
+        """DELETE de un lote; en PostgreSQL salta las filas bloqueadas (SKIP LOCKED)."""
+        tabla = politica.tabla
+        columna = tabla.c[politica.columna_fecha]
+        llave = list(tabla.primary_key.columns)[0]
+
+        sub = (
+            select(llave)
+            .where(columna < politica.corte(ahora))
+            .order_by(columna)
+            .limit(self.tamano_lote)
+            .with_for_update(skip_locked=True)
+        )
+        return delete(tabla).where(llave.in_(sub.scalar_subquery()))
+
+    def _eliminar_por_lotes(self, politica: PoliticaRetencion, ahora: datetime.datetime = None,
+                            max_lotes: int = None) -> int:
+        sentencia = self._sentencia_lote(politica, ahora)
+        total, lotes = 0, 0
+        while max_lotes is None or lotes < max_lotes:
+            self._esperar_replicacion()
+            with self.engine.begin() as conexion:
+                self._lock_timeout(conexion)
+                borradas = conexion.execute(sentencia).rowcount
+            total += borradas
+            lotes += 1
+            if borradas < self.tamano_lote:
+                break
+            time.sleep(self.pausa_segundos)
+        return total
+
+    def _lag_replicacion(self) -> float:
+        if not self.es_postgres:
+            return 0.0
+        with self.engine.connect() as conexion:
+            lag = conexion.execute(text(
+                "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) FROM pg_stat_replication"
+            )).scalar()
+        return float(lag or 0)
+
+    def _esperar_replicacion(self, max_espera_segundos: float = 60.0):
+        inicio = time.monotonic()
+        while self._lag_replicacion() > self.max_lag_segundos:
+            if time.monotonic() - inicio > max_espera_segundos:
+                raise TimeoutError('Retención: lag de replicación sostenido, se pospone la limpieza')
+            time.sleep(max(self.pausa_segundos, 1.0))
+
+    def _lock_timeout(self, conexion):
+        if self.es_postgres:
+            conexion.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+
+    # ------------------ API ------------------ #
+    def purgar(self, politica: PoliticaRetencion, ahora: datetime.datetime = None,
+               max_lotes: int = None) -> ResultadoRetencion:
+        """Elimina lo anterior al corte de la política.
+
+        En tablas particionadas, después de soltar las particiones vencidas el
+        borrado por lotes sólo alcanza la partición DEFAULT (partition pruning).
+        """
+        resultado = ResultadoRetencion(tabla=politica.nombre)
+        if self.es_particionada(politica):
+            self.asegurar_particiones(politica, ahora)
+            resultado.particiones = self._eliminar_particiones(politica, ahora)
+        resultado.filas = self._eliminar_por_lotes(politica, ahora, max_lotes=max_lotes)
+        return resultado
@@ -7,3 +7,9 @@ def time_millis():
 def broker_host():
     return os.getenv('BROKER_HOST', default="localhost")
 
+def modo_saga():
+    """orquestacion (por defecto) o coreografia"""
+    return os.getenv('SAGA_MODO', default='orquestacion').lower()
+
+def es_coreografia():
+    return modo_saga() == 'coreografia'
@@ -0,0 +1,115 @@
+"""
+Bus de eventos: despacho por tipo (MRO) y fase, en línea o en segundo plano,
+handlers async, y métricas consistentes con publicaciones concurrentes.
+"""
+import threading
+
+import pytest
+
+from seedwork.infraestructura.bus import BusEventos, Fase
+
+
+class EventoBase:
+    pass
+
+
+class EventoHijo(EventoBase):
+    pass
+
+
+@pytest.fixture
+def bus():
+    bus = BusEventos(max_workers=4)
+    yield bus
+    bus.cerrar()
+
+
+def test_despacho_por_tipo_y_fase(bus):
+    recibidos = []
+    bus.suscribir(EventoBase, lambda evento: recibidos.append(('base', type(evento).__name__)), Fase.INTEGRACION)
+    bus.suscribir(EventoHijo, lambda evento: recibidos.append(('dominio', type(evento).__name__)), Fase.DOMINIO)
+
+    bus.publicar(EventoHijo(), Fase.INTEGRACION)
+    assert recibidos == [('base', 'EventoHijo')]
+
+    # Un handler nuevo invalida la tabla ya resuelta; los de la subclase van primero (MRO)
+    bus.suscribir(EventoHijo, lambda evento: recibidos.append(('hijo', type(evento).__name__)), Fase.INTEGRACION)
+    bus.publicar_lote([EventoHijo(), EventoBase()], Fase.INTEGRACION)
+    assert recibidos[1:] == [('hijo', 'EventoHijo'), ('base', 'EventoHijo'), ('base', 'EventoBase')]
+
+    bus.publicar(EventoHijo(), Fase.DOMINIO)
+    assert recibidos[-1] == ('dominio', 'EventoHijo')
+
+
+def test_handler_en_linea_propaga_el_error_y_en_segundo_plano_no(bus):
+    hecho = threading.Event()
+
+    def falla(_evento):
+        raise ValueError('handler')
+
+    def falla_y_avisa(_evento):
+        hecho.set()
+        raise ValueError('handler')
+
+    bus.suscribir(EventoHijo, falla_y_avisa, en_segundo_plano=True)
+    bus.publicar(EventoHijo())
+    assert hecho.wait(2)
+
+    bus.suscribir(EventoBase, falla)
+    with pytest.raises(ValueError):
+        bus.publicar(EventoBase())
+
+    bus.cerrar()
+    metricas = bus.metricas()
+    assert {m['errores'] for m in metricas.values()} == {1}
+
+
+def test_segundo_plano_no_bloquea_el_lote(bus):
+    liberar, en_linea = threading.Event(), []
+    bus.suscribir(EventoBase, lambda _evento: liberar.wait(2), en_segundo_plano=True)
+    bus.suscribir(EventoBase, lambda evento: en_linea.append(evento))
+
+    bus.publicar_lote([EventoBase(), EventoBase()])
+    assert len(en_linea) == 2
+    liberar.set()
+
+
+def test_handler_async(bus):
+    recibidos = []
+
+    async def handler(evento):
+        recibidos.append(threading.current_thread().name)
+
+    bus.suscribir(EventoBase, handler)
+    bus.publicar(EventoBase())
+    assert recibidos == ['bus-eventos-loop']
+
+
+def _en_segundo_plano(_evento):
+    pass
+
+
+def _en_linea(_evento):
+    pass
+
+
+def test_metricas_con_publicaciones_concurrentes(bus):
+    bus.suscribir(EventoBase, _en_segundo_plano, en_segundo_plano=True)
+    bus.suscribir(EventoBase, _en_linea)
+
+    def publicar():
+        for _ in range(200):
+            bus.publicar(EventoBase())
+
+    hilos = [threading.Thread(target=publicar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    bus.cerrar()
+
+    metricas = bus.metricas()
+    assert metricas[f'{__name__}._en_segundo_plano']['invocaciones'] == 1600
+    assert metricas[f'{__name__}._en_linea']['invocaciones'] == 1600
+    bus.limpiar()
+    assert bus.metricas() == {}
@@ -0,0 +1,76 @@
+"""
+Read-your-writes con una réplica real (otra base SQLite): tras actualizar un
+evento con su pago, las lecturas del socio van a la primaria dentro de la
+ventana, y las de otros socios siguen en la réplica.
+"""
+import datetime
+import uuid
+
+import pytest
+from flask import Flask
+from sqlalchemy.orm import Session
+
+import config.lecturas
+from config.db import db, init_db
+from modulos.eventos.aplicacion.comandos.actualizar_evento_pago import ActualizarEventoPago, ActualizarEventoPagoHandler
+from modulos.eventos.aplicacion.queries.obtener_eventos_socio import ObtenerEventosSocio, ObtenerEventosSocioHandler
+from modulos.eventos.infraestructura.dto import EventoEntity
+from seedwork.infraestructura.lecturas import EnrutadorLecturas
+
+SOCIO, OTRO_SOCIO = uuid.uuid4(), uuid.uuid4()
+EVENTO, EVENTO_OTRO = uuid.uuid4(), uuid.uuid4()
+
+
+def _eventos(sesion):
+    for id_evento, id_socio in ((EVENTO, SOCIO), (EVENTO_OTRO, OTRO_SOCIO)):
+        sesion.add(EventoEntity(id=id_evento, id_socio=id_socio, id_referido=uuid.uuid4(), tipo='venta_creada',
+                                estado='pendiente', monto=100.0, ganancia=0.0,
+                                fecha_creacion=datetime.datetime(2025, 1, 1), fecha_evento=datetime.datetime(2025, 1, 1)))
+    sesion.commit()
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_BINDS'] = {config.lecturas.BIND_REPLICA: 'sqlite://'}
+    init_db(app)
+    with app.app_context():
+        db.create_all()
+        replica = db.engines[config.lecturas.BIND_REPLICA]
+        db.metadata.create_all(replica)
+        _eventos(db.session)
+        with Session(bind=replica) as sesion:
+            _eventos(sesion)
+        enrutador = EnrutadorLecturas(fabrica_sesion_replica=lambda: Session(bind=replica), medir_lag=lambda: 0.0)
+        monkeypatch.setattr(config.lecturas, '_enrutador', enrutador)
+        yield app
+    # init_app registra el bind en el db compartido; las demás pruebas no lo tienen
+    db.metadatas.pop(config.lecturas.BIND_REPLICA, None)
+
+
+def _estados(id_socio):
+    return [evento.estado for evento in ObtenerEventosSocioHandler().handle(ObtenerEventosSocio(str(id_socio))).resultado]
+
+
+def test_lecturas_del_socio_van_a_la_primaria_tras_el_pago(app):
+    # Sin escrituras recientes, el query se sirve desde la réplica
+    assert _estados(SOCIO) == ['pendiente']
+
+    ActualizarEventoPagoHandler().handle(ActualizarEventoPago(
+        id_evento=str(EVENTO), id_pago='p-1', estado_pago='completado', ganancia=10.0,
+        fecha_pago='2025-01-02T00:00:00Z', monto_pago=100.0))
+
+    # La réplica no tiene el pago aún: la lectura del socio debe ir a la primaria
+    assert _estados(SOCIO) == ['pago_completado']
+    assert _estados(OTRO_SOCIO) == ['pendiente']
+    assert config.lecturas.enrutador_lecturas().usar_replica(None, str(OTRO_SOCIO))
+
+
+def test_fuera_de_la_ventana_vuelve_a_la_replica(app):
+    enrutador = config.lecturas.enrutador_lecturas()
+    enrutador.ventana_escritura_segundos = 0
+    ActualizarEventoPagoHandler().handle(ActualizarEventoPago(
+        id_evento=str(EVENTO), id_pago='p-1', estado_pago='completado', ganancia=10.0,
+        fecha_pago='2025-01-02T00:00:00Z', monto_pago=100.0))
+    assert _estados(SOCIO) == ['pendiente']
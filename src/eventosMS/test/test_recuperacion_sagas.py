@@ -0,0 +1,90 @@
+"""
+Recuperación de sagas: snapshot + cola del saga_log, y el coordinador leyendo
+el estado del caché antes que de la base.
+"""
+import datetime
+import uuid
+import pytest
+from flask import Flask
+
+from config.db import db, init_db
+from eventosMS.modulos.sagas.infraestructura.modelos import SagaLog, SagaSnapshot
+from eventosMS.modulos.sagas.infraestructura import recuperacion
+from eventosMS.modulos.sagas.infraestructura.recuperacion import sagas_activas, recuperar_sagas, tomar_snapshot
+from eventosMS.modulos.sagas.infraestructura.repositorio_saga import RepositorioSaga
+from eventosMS.modulos.sagas.aplicacion.coordinadores.saga_reservas import CoordinadorPagos
+from eventosMS.seedwork.aplicacion.sagas import Inicio
+
+AHORA = datetime.datetime.utcnow()
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    init_db(app)
+    with app.app_context():
+        db.create_all()
+    sagas_activas.limpiar()
+    yield app
+    sagas_activas.limpiar()
+
+
+def _log(app, id_transaction, tipo, paso, estado, hace_segundos):
+    with app.app_context():
+        db.session.add(SagaLog(id=str(uuid.uuid4()), id_transaction=id_transaction, tipo=tipo, nombre=tipo, paso=paso,
+                               estado=estado, timestamp=AHORA - datetime.timedelta(seconds=hace_segundos)))
+        db.session.commit()
+
+
+def test_snapshot_mas_cola_del_log(app):
+    _log(app, 'a', 'inicio', 0, 'RUNNING', 600)
+    _log(app, 'a', 'evento_ok', 1, 'OK', 500)
+    _log(app, 'b', 'inicio', 0, 'RUNNING', 600)
+    _log(app, 'b', 'fin', 5, 'COMPLETED', 500)
+    assert tomar_snapshot(app) == 2
+    with app.app_context():
+        assert [fila.id_transaction for fila in SagaSnapshot.query.all()] == ['a']
+        # El historial anterior a la marca ya no hace falta para recuperar
+        SagaLog.query.delete()
+        db.session.commit()
+
+    # Cola posterior a la marca
+    _log(app, 'a', 'evento_ok', 2, 'OK', 0)
+    _log(app, 'c', 'inicio', 0, 'RUNNING', 0)
+
+    assert recuperar_sagas(app) == 2
+    assert sagas_activas.obtener('a').paso == 2
+    assert sagas_activas.obtener('c').tipo == 'inicio'
+    assert sagas_activas.obtener('b') is None
+
+
+def test_registro_nuevo_entra_al_cache_con_su_id(app):
+    repositorio = RepositorioSaga(app)
+    entry = repositorio.registrar_inicio('t-1')
+    with app.app_context():
+        id_log = db.session.merge(entry).id
+    assert repositorio.estado('t-1').id_log == id_log
+
+    # Mismo timestamp: desempata el id del registro, sin comparar None
+    estado = repositorio.estado('t-1')
+    otro = recuperacion.EstadoSaga(**{**estado.__dict__, 'id_log': None})
+    assert estado.es_posterior_a(otro) and not otro.es_posterior_a(estado)
+
+
+def test_coordinador_lee_el_estado_del_cache(app, monkeypatch):
+    coordinador = CoordinadorPagos(correlacion_id='t-1', app=app)
+    coordinador._repo.registrar_inicio('t-1')
+    monkeypatch.setattr(RepositorioSaga, 'ultimo', lambda *_: pytest.fail('no debe ir a la base'))
+
+    coordinador.persistir_en_saga_log(Inicio(index=0))
+    with app.app_context():
+        assert SagaLog.query.filter_by(id_transaction='t-1', tipo='inicio').count() == 1
+
+
+def test_coordinador_consulta_la_base_si_no_esta_en_cache(app):
+    _log(app, 't-2', 'fin', 5, 'COMPLETED', 10)  # Terminada: no está en el caché
+    coordinador = CoordinadorPagos(correlacion_id='t-2', app=app)
+    coordinador.persistir_en_saga_log(Inicio(index=0))
+    with app.app_context():
+        assert SagaLog.query.filter_by(id_transaction='t-2', tipo='inicio').count() == 0
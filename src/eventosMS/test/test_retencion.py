@@ -0,0 +1,88 @@
+"""
+Retención sobre SQLite: borrado por lotes hasta el corte. Las ramas sólo de
+PostgreSQL (particiones, SKIP LOCKED, lock_timeout, lag) quedan apagadas.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, event, func, select
+from sqlalchemy.dialects import postgresql
+
+from seedwork.infraestructura import retencion as modulo
+from seedwork.infraestructura.retencion import PoliticaRetencion, Retencion, inicio_mes, sumar_meses
+
+AHORA = datetime.datetime(2025, 6, 15, 12, 0)
+
+metadata = MetaData()
+eventos = Table('eventos_prueba', metadata,
+                Column('id', String, primary_key=True),
+                Column('tipo', String, nullable=False),
+                Column('fecha', DateTime, nullable=False, index=True))
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as conexion:
+        conexion.execute(eventos.insert(), [
+            dict(id=f'e-{dias}', tipo='venta', fecha=AHORA - datetime.timedelta(days=dias)) for dias in range(0, 100, 10)
+        ])
+    return engine
+
+
+def _fechas(engine):
+    with engine.connect() as conexion:
+        return conexion.execute(select(func.min(eventos.c.fecha), func.count())).one()
+
+
+def test_borra_por_lotes_hasta_el_corte(engine, monkeypatch):
+    sentencias = []
+    event.listen(engine, 'before_cursor_execute', lambda _c, _cur, sentencia, *_: sentencias.append(sentencia))
+    monkeypatch.setattr(modulo.time, 'sleep', lambda _segundos: None)
+
+    resultado = Retencion(engine, tamano_lote=2).purgar(PoliticaRetencion(eventos, 'fecha', dias=45), AHORA)
+
+    # 50, 60, 70, 80 y 90 días: tres lotes de a dos
+    assert (resultado.tabla, resultado.particiones, resultado.filas) == ('eventos_prueba', 0, 5)
+    minimo, cantidad = _fechas(engine)
+    assert cantidad == 5 and minimo == AHORA - datetime.timedelta(days=40)
+    assert sum(s.startswith('DELETE') for s in sentencias) == 3
+    assert not any('lock_timeout' in s or 'pg_' in s or 'FOR UPDATE' in s for s in sentencias)
+
+
+def test_max_lotes_acota_la_ejecucion(engine):
+    retencion = Retencion(engine, tamano_lote=2, pausa_segundos=0)
+    assert retencion.purgar(PoliticaRetencion(eventos, 'fecha', dias=45), AHORA, max_lotes=1).filas == 2
+    assert _fechas(engine)[1] == 8
+
+
+def test_particiones_apagadas_fuera_de_postgres(engine):
+    retencion = Retencion(engine)
+    politica = PoliticaRetencion(eventos, 'fecha', dias=45)
+    assert not retencion.es_postgres
+    assert not retencion.es_particionada(politica)
+    assert not retencion.crear_tabla_particionada(politica)
+    assert retencion._lag_replicacion() == 0.0
+
+
+def test_lag_sostenido_pospone_la_limpieza(engine, monkeypatch):
+    retencion = Retencion(engine, max_lag_segundos=5.0)
+    monkeypatch.setattr(retencion, '_lag_replicacion', lambda: 30.0)
+    monkeypatch.setattr(modulo.time, 'sleep', lambda _segundos: None)
+    with pytest.raises(TimeoutError):
+        retencion._esperar_replicacion(max_espera_segundos=0)
+    assert _fechas(engine)[1] == 10
+
+
+def test_en_postgres_el_lote_salta_filas_bloqueadas(engine):
+    sentencia = Retencion(engine, tamano_lote=10)._sentencia_lote(PoliticaRetencion(eventos, 'fecha', 45), AHORA)
+    assert 'FOR UPDATE SKIP LOCKED' in str(sentencia.compile(dialect=postgresql.dialect()))
+    assert 'FOR UPDATE' not in str(sentencia.compile(dialect=engine.dialect))
+
+
+def test_meses_de_las_particiones():
+    assert inicio_mes(AHORA) == datetime.datetime(2025, 6, 1)
+    assert sumar_meses(datetime.datetime(2025, 11, 1), 3) == datetime.datetime(2026, 2, 1)
+    assert Retencion._nombre_particion(PoliticaRetencion(eventos, 'fecha', 30), datetime.datetime(2025, 2, 1)) \
+        == 'eventos_prueba_p202502'
@@ -0,0 +1,48 @@
+"""
+Saga de pagos coreografiada: el coordinador sólo lleva el saga log y registra
+las compensaciones pendientes en orden inverso.
+"""
+from unittest.mock import MagicMock
+
+from eventosMS.modulos.sagas.aplicacion.coordinadores.saga_pagos_coreografia import CoordinadorPagosCoreografia
+from eventosMS.modulos.sagas.aplicacion.comandos.referidos import ReferidoCommand
+from eventosMS.modulos.sagas.dominio.eventos.eventos import EventoRegistrado, EventoCompensacion
+from eventosMS.modulos.sagas.dominio.eventos.referidos import ReferidoProcesado
+from eventosMS.modulos.sagas.dominio.eventos.pagos import PagoProcesado, PagoRechazado
+from eventosMS.seedwork.aplicacion.sagas import CoordinadorOrquestacion
+
+
+def _coordinador():
+    coordinador = CoordinadorPagosCoreografia(correlacion_id='t-1')
+    coordinador._repo = MagicMock()
+    coordinador.inicializar_pasos()
+    return coordinador
+
+
+def test_coreografia_no_publica_comandos():
+    assert not hasattr(CoordinadorPagosCoreografia, 'publicar_comando')
+    assert hasattr(CoordinadorOrquestacion, 'publicar_comando')
+
+
+def test_camino_exitoso_registra_pasos_y_fin():
+    coordinador = _coordinador()
+    for evento in (EventoRegistrado(idTransaction='t-1'), ReferidoProcesado(idTransaction='t-1'),
+                   PagoProcesado(idTransaction='t-1')):
+        coordinador.procesar_evento(evento)
+
+    repo = coordinador._repo
+    assert [c.args[2] for c in repo.registrar_evento_ok.call_args_list] == [1, 2, 3]
+    repo.registrar_fin.assert_called_once_with('t-1', paso=4, exito=True)
+    repo.registrar_comando.assert_not_called()
+
+
+def test_pago_rechazado_registra_compensaciones_en_orden_inverso():
+    coordinador = _coordinador()
+    coordinador.procesar_evento(PagoRechazado(idTransaction='t-1'))
+
+    repo = coordinador._repo
+    repo.registrar_evento_error.assert_called_once_with('t-1', 'PagoRechazado', 3)
+    assert [c.args[1:3] for c in repo.registrar_comando.call_args_list] == [
+        (ReferidoCommand.__name__, 2), (EventoCompensacion.__name__, 1)
+    ]
+    repo.registrar_fin.assert_called_once_with('t-1', paso=4, exito=False)
@@ -0,0 +1,60 @@
+"""
+UoW del seedwork: un agregado registrado en varios batches publica sus
+eventos una sola vez por commit.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from seedwork.dominio.entidades import AgregacionRaiz
+from seedwork.infraestructura import uow as modulo_uow
+from seedwork.infraestructura.bus import Fase
+
+
+class UnidadTrabajoMemoria(modulo_uow.UnidadTrabajo):
+
+    def __init__(self):
+        self._batches = list()
+
+    @property
+    def batches(self):
+        return self._batches
+
+    @property
+    def savepoints(self):
+        return list()
+
+    def _limpiar_batches(self):
+        self._batches = list()
+
+    def rollback(self, savepoint=None):
+        self._limpiar_batches()
+
+    def savepoint(self):
+        pass
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = MagicMock()
+    monkeypatch.setattr(modulo_uow, 'bus', bus)
+    return bus
+
+
+def _publicados(bus, fase):
+    return [evento for llamada in bus.publicar_lote.call_args_list if llamada.args[1] == fase
+            for evento in llamada.args[0]]
+
+
+def test_agregado_en_varios_batches_publica_una_vez(bus):
+    agregado, otro = AgregacionRaiz(), AgregacionRaiz()
+    agregado.agregar_evento('creado')
+    otro.agregar_evento('otro')
+
+    uow = UnidadTrabajoMemoria()
+    uow.registrar_batch(lambda _: None, agregado)
+    uow.registrar_batch(lambda _: None, agregado)
+    uow.registrar_batch(lambda *_: None, otro, agregado)
+    uow.commit()
+
+    assert _publicados(bus, Fase.INTEGRACION) == ['creado', 'otro']
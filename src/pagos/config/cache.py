@@ -0,0 +1,14 @@
+from config.pulsar_config import settings
+from seedworks.infraestructura.cache import CacheLRUTTL
+
+# Respuestas de ObtenerEstadoPagoQuery por idPago, en memoria de cada proceso.
+# PagoCommandHandler invalida la entrada en cada transición, pero sólo en su
+# propio proceso: con workers (CONSUMIR_COMANDOS_EN_API=false) o varias réplicas
+# de la API, las transiciones no desalojan el caché de la API y un GET (o un
+# 304 con el ETag anterior) puede devolver el estado previo hasta
+# ESTADO_CACHE_TTL_SEGUNDOS después del cambio. Ese TTL es la cota de
+# desactualización; bajarlo a 0 desactiva el caché.
+cache_estado_pagos = CacheLRUTTL(
+    capacidad=settings.ESTADO_CACHE_CAPACIDAD,
+    ttl_segundos=settings.ESTADO_CACHE_TTL_SEGUNDOS
+)
@@ -1,7 +1,11 @@
 import os
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import case, create_engine, delete, event, func, inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
 
 # Configuración de base de datos desde variables de entorno
@@ -12,19 +16,124 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
 DATABASE_URL = os.getenv('DB_URL', f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
 
+# Pool de conexiones: un solo engine por proceso compartido por API, consumers y handlers
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
 
 # URL de conexión
 #DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Engine y sesión
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine y sesión (se crean una sola vez con init_db)
+_engine = None
+_SessionLocal = None
+_lock = threading.Lock()
+_contadores = {"conexiones": 0, "checkouts": 0, "invalidaciones": 0}
+
+# Engine async (asyncpg) para los endpoints HTTP; los consumers siguen con el engine sync
+_engine_async = None
+_SesionesAsync = None
+_contadores_async = {"conexiones": 0, "checkouts": 0, "invalidaciones": 0}
+
+
+def _opciones_pool(url: str) -> dict:
+    opciones = dict(pool_pre_ping=DB_POOL_PRE_PING)
+    if not url.startswith("sqlite"):
+        opciones.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return opciones
+
+
+def _contar_uso(engine_, contadores: dict):
+    def contar(nombre):
+        def listener(*_):
+            contadores[nombre] += 1
+        return listener
+
+    event.listen(engine_, "connect", contar("conexiones"))
+    event.listen(engine_, "checkout", contar("checkouts"))
+    event.listen(engine_, "invalidate", contar("invalidaciones"))
+
+
+def crear_engine(url: str = DATABASE_URL):
+    """Crea un engine con el pool configurado y contadores de uso."""
+    nuevo = create_engine(url, future=True, **_opciones_pool(url))
+    _contar_uso(nuevo, _contadores)
+    return nuevo
+
+
+def url_async(url: str = DATABASE_URL) -> str:
+    """Misma base de datos con el driver async (asyncpg / aiosqlite)."""
+    if os.getenv('DB_ASYNC_URL'):
+        return os.environ['DB_ASYNC_URL']
+    url_ = make_url(url)
+    driver = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}.get(url_.get_backend_name())
+    return url_.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+
+def crear_engine_async(url: str = DATABASE_URL):
+    url_ = url_async(url)
+    nuevo = create_async_engine(url_, **_opciones_pool(url_))
+    _contar_uso(nuevo.sync_engine, _contadores_async)
+    return nuevo
+
+
+def init_db(url: str = DATABASE_URL):
+    """Inicializa el engine y la fábrica de sesiones del proceso (idempotente)."""
+    global _engine, _SessionLocal
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                engine_ = crear_engine(url)
+                _SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False,
+                                             bind=engine_, class_=Session)
+                _engine = engine_
+    return _engine
+
+
+def init_db_async(url: str = DATABASE_URL):
+    """Inicializa el engine async y su fábrica de sesiones (idempotente, en el event loop)."""
+    global _engine_async, _SesionesAsync
+    if _engine_async is None:
+        _engine_async = crear_engine_async(url)
+        _SesionesAsync = async_sessionmaker(_engine_async, expire_on_commit=False, class_=AsyncSession)
+    return _engine_async
+
+
+def obtener_sesiones_async() -> async_sessionmaker:
+    init_db_async()
+    return _SesionesAsync
+
+
+async def cerrar_db_async():
+    global _engine_async, _SesionesAsync
+    if _engine_async is not None:
+        await _engine_async.dispose()
+        _engine_async = _SesionesAsync = None
+
+
+def obtener_engine():
+    return init_db()
+
+
+def obtener_sesiones() -> sessionmaker:
+    """Fábrica de sesiones compartida; se inyecta en repositorios y handlers."""
+    init_db()
+    return _SessionLocal
+
 
 def get_db():
     """Dependencia para obtener sesión de base de datos"""
-    db = SessionLocal()
+    db = obtener_sesiones()()
     try:
         yield db
     finally:
@@ -33,9 +142,117 @@ def get_db():
 
 def create_tables():
     """Crear tablas en la base de datos"""
-    Base.metadata.create_all(bind=engine)
+    import config.idempotencia  # noqa: F401 registra mensajes_procesados en Base
+    from modulos.infraestructura.repositorio_postgresql import Base as BasePagos
+    engine_ = obtener_engine()
+    Base.metadata.create_all(bind=engine_)
+    BasePagos.metadata.create_all(bind=engine_)
+    asegurar_indices(BasePagos)
+
+
+def asegurar_indices(base):
+    """create_all no agrega índices a tablas existentes; se crean aquí si faltan.
+
+    En PostgreSQL se crean con CONCURRENTLY para no bloquear las escrituras de
+    la tabla mientras se construyen. Si un índice no se puede crear, el
+    arranque falla: sin ux_pagos_id_evento todo upsert ON CONFLICT (idEvento)
+    falla en PostgreSQL.
+    """
+    engine_ = obtener_engine()
+    migrar_id_evento_unico(engine_)
+    for tabla in base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            crear_indice(engine_, indice)
+
+
+def crear_indice(engine_, indice):
+    if engine_.dialect.name != "postgresql":
+        indice.create(bind=engine_, checkfirst=True)
+        return
+    preparador = engine_.dialect.identifier_preparer
+    columnas = ", ".join(preparador.quote(columna.name) for columna in indice.columns)
+    # CONCURRENTLY no corre dentro de una transacción: conexión en autocommit
+    with engine_.connect().execution_options(isolation_level="AUTOCOMMIT") as conexion:
+        if _indice_valido(conexion, indice.name) is False:
+            # Quedó inválido por un CREATE INDEX CONCURRENTLY interrumpido
+            conexion.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {preparador.quote(indice.name)}")
+        conexion.exec_driver_sql(
+            f"CREATE {'UNIQUE ' if indice.unique else ''}INDEX CONCURRENTLY IF NOT EXISTS "
+            f"{preparador.quote(indice.name)} ON {preparador.format_table(indice.table)} ({columnas})"
+        )
+
+
+def _indice_valido(conexion, nombre: str):
+    """True/False según pg_index.indisvalid, o None si el índice no existe."""
+    return conexion.execute(
+        text("SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = :nombre"),
+        {"nombre": nombre}
+    ).scalar()
+
+
+def migrar_id_evento_unico(engine_):
+    """Migración a ux_pagos_id_evento (índice único sobre pagos.idEvento).
+
+    Antes del upsert, el pago se creaba con un check-then-insert que dejaba
+    pasar idEvento duplicados bajo concurrencia. Se conserva un pago por
+    idEvento (el que llegó a un estado final, y entre ellos el más antiguo),
+    se borran los demás y se crea el índice. Si al terminar el índice no
+    existe (o quedó inválido), el arranque falla.
+    """
+    from modulos.infraestructura.repositorio_postgresql import ESTADOS_FINALES, PagoORM
+
+    indice = next(indice for indice in PagoORM.__table__.indexes if indice.name == "ux_pagos_id_evento")
+    if _existe_indice(engine_, indice.name):
+        return
+
+    orden = func.row_number().over(
+        partition_by=PagoORM.idEvento,
+        order_by=(case((PagoORM.estado.in_(ESTADOS_FINALES), 0), else_=1), PagoORM.fechaEvento, PagoORM.idPago)
+    ).label("orden")
+    pagos = select(PagoORM.idPago, orden).subquery()
+    with engine_.begin() as conexion:
+        borrados = conexion.execute(
+            delete(PagoORM).where(PagoORM.idPago.in_(select(pagos.c.idPago).where(pagos.c.orden > 1)))
+        ).rowcount
+    if borrados:
+        print(f"🧹 {borrados} pagos con idEvento duplicado eliminados; "
+              f"reconstruya pagos_rollup con `python -m pagos.reportes` (consumers detenidos)")
+
+    crear_indice(engine_, indice)
+    if not _existe_indice(engine_, indice.name):
+        raise RuntimeError(f"No existe el índice único {indice.name} sobre pagos.idEvento")
+
+
+def _existe_indice(engine_, nombre: str) -> bool:
+    if engine_.dialect.name == "postgresql":
+        with engine_.connect() as conexion:
+            return bool(_indice_valido(conexion, nombre))
+    return any(indice["name"] == nombre for indice in inspect(engine_).get_indexes("pagos"))
+
+
+def _metricas(engine_, contadores: dict) -> dict:
+    if engine_ is None:
+        return {"inicializado": False}
+    pool = engine_.pool
+    metricas = {"inicializado": True, "estado": pool.status(), **contadores}
+    if isinstance(pool, QueuePool):
+        metricas.update(
+            size=pool.size(),
+            checkedin=pool.checkedin(),
+            checkedout=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    return metricas
+
+
+def metricas_pool() -> dict:
+    """Estado de los pools (sync y async) y contadores acumulados del proceso."""
+    metricas = _metricas(_engine, _contadores)
+    metricas["async"] = _metricas(_engine_async.sync_engine if _engine_async else None, _contadores_async)
+    return metricas
 
 
 def get_db_url():
     """Obtener URL de base de datos"""
-    return DATABASE_URL
\ No newline at end of file
+    return DATABASE_URL
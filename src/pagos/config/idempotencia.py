@@ -0,0 +1,116 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Text, select, insert
+from sqlalchemy.exc import IntegrityError
+
+from config.db import Base, obtener_engine
+from seedworks.infraestructura.idempotencia import (
+    AlmacenIdempotencia, RepositorioMensajesProcesados, AlmacenResultadosComandos, RepositorioResultadosComandos
+)
+
+
+class MensajeProcesadoORM(Base):
+    __tablename__ = "mensajes_procesados"
+    llave = Column(String(255), primary_key=True)
+    suscripcion = Column(String(120), nullable=False)
+    fecha_procesado = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class ResultadoComandoORM(Base):
+    __tablename__ = "resultados_comandos"
+    llave = Column(String(255), primary_key=True)  # idTransaction|comando
+    resultado = Column(Text, nullable=False)
+    fecha = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class RepositorioMensajesProcesadosPG(RepositorioMensajesProcesados):
+    def __init__(self, engine_=None):
+        self.engine = engine_ or obtener_engine()
+
+    def existe(self, llave: str) -> bool:
+        with self.engine.connect() as conexion:
+            fila = conexion.execute(
+                select(MensajeProcesadoORM.llave).where(MensajeProcesadoORM.llave == llave)
+            ).first()
+        return fila is not None
+
+    def registrar(self, llave: str, suscripcion: str) -> bool:
+        try:
+            with self.engine.begin() as conexion:
+                conexion.execute(insert(MensajeProcesadoORM).values(
+                    llave=llave,
+                    suscripcion=suscripcion,
+                    fecha_procesado=datetime.utcnow()
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    def llaves(self, limite: int) -> list[str]:
+        with self.engine.connect() as conexion:
+            filas = conexion.execute(
+                select(MensajeProcesadoORM.llave)
+                .order_by(MensajeProcesadoORM.fecha_procesado.desc())
+                .limit(limite)
+            )
+            return [fila.llave for fila in filas]
+
+
+class RepositorioResultadosComandosPG(RepositorioResultadosComandos):
+    def __init__(self, engine_=None):
+        self.engine = engine_ or obtener_engine()
+
+    def obtener(self, llaves: list[str]) -> dict[str, dict]:
+        with self.engine.connect() as conexion:
+            filas = conexion.execute(
+                select(ResultadoComandoORM.llave, ResultadoComandoORM.resultado)
+                .where(ResultadoComandoORM.llave.in_(llaves))
+            )
+            return {fila.llave: json.loads(fila.resultado) for fila in filas}
+
+    def sentencia_guardar(self, resultados: dict[str, dict]):
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as insert_
+        else:
+            from sqlalchemy.dialects.sqlite import insert as insert_
+        ahora = datetime.utcnow()
+        return insert_(ResultadoComandoORM).values([
+            dict(llave=llave, resultado=json.dumps(resultado), fecha=ahora)
+            for llave, resultado in resultados.items()
+        ]).on_conflict_do_nothing(index_elements=[ResultadoComandoORM.llave])
+
+    def recientes(self, limite: int) -> list[tuple[str, dict]]:
+        with self.engine.connect() as conexion:
+            filas = conexion.execute(
+                select(ResultadoComandoORM.llave, ResultadoComandoORM.resultado)
+                .order_by(ResultadoComandoORM.fecha.desc())
+                .limit(limite)
+            )
+            return [(fila.llave, json.loads(fila.resultado)) for fila in filas]
+
+
+_almacenes = dict()
+_lock = threading.Lock()
+
+def _compartido(nombre: str, crear):
+    """Un almacén por proceso, con el LRU configurado y calentado al crearlo."""
+    almacen = _almacenes.get(nombre)
+    if almacen is None:
+        with _lock:
+            almacen = _almacenes.get(nombre)
+            if almacen is None:
+                almacen = crear(capacidad_lru=int(os.getenv('IDEMPOTENCIA_LRU', 10_000)))
+                almacen.calentar()
+                _almacenes[nombre] = almacen
+    return almacen
+
+def almacen_idempotencia() -> AlmacenIdempotencia:
+    """Almacén compartido por los consumidores del proceso."""
+    return _compartido('mensajes', lambda **opciones: AlmacenIdempotencia(RepositorioMensajesProcesadosPG(), **opciones))
+
+def almacen_resultados() -> AlmacenResultadosComandos:
+    """Resultados de comandos compartidos por los handlers del proceso."""
+    return _compartido('resultados', lambda **opciones: AlmacenResultadosComandos(RepositorioResultadosComandosPG(), **opciones))
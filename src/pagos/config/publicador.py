@@ -0,0 +1,106 @@
+import json
+import threading
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from pulsar import BatchingType, Client
+
+from config.db import obtener_sesiones
+from config.pulsar_config import settings
+from modulos.infraestructura.repositorio_postgresql import OutboxORM
+from schema.eventos_pagos import PagoProcesado
+from seedworks.infraestructura.esquemas import esquema_avro
+from seedworks.infraestructura.publicador import AlmacenDesborde, PublicadorAsincrono
+
+
+def _a_dict(record) -> dict:
+    return {campo: valor for campo, valor in record.__dict__.items() if not campo.startswith('_')}
+
+
+class OutboxPagosPG(AlmacenDesborde):
+    """Desborde del publicador en la tabla outbox_pagos."""
+
+    def __init__(self, topico: str, record_cls=PagoProcesado, sesiones=None):
+        self.topico = topico
+        self._record_cls = record_cls
+        self._sesiones = sesiones
+
+    @property
+    def sesiones(self):
+        return self._sesiones or obtener_sesiones()
+
+    def guardar(self, record, llave):
+        with self.sesiones() as session:
+            session.add(OutboxORM(
+                id=str(uuid4()),
+                topico=self.topico,
+                key=llave,
+                payload=json.dumps(_a_dict(record)),
+                status="PENDING",
+                fecha_creacion=datetime.now(timezone.utc)
+            ))
+            session.commit()
+
+    def pendientes(self, limite):
+        with self.sesiones() as session:
+            filas = (session.query(OutboxORM)
+                     .filter_by(topico=self.topico, status="PENDING")
+                     .order_by(OutboxORM.fecha_creacion)
+                     .limit(limite)
+                     .all())
+            return [(fila.id, self._record_cls(**json.loads(fila.payload)), fila.key) for fila in filas]
+
+    def confirmar(self, id_desborde):
+        with self.sesiones() as session:
+            session.query(OutboxORM).filter_by(id=id_desborde).update({"status": "SENT"})
+            session.commit()
+
+
+_cliente = None
+_publicador = None
+_lock = threading.Lock()
+
+
+def _crear_producer():
+    global _cliente
+    if _cliente is None:
+        _cliente = Client(settings.PULSAR_URL)
+    return _cliente.create_producer(
+        settings.TOPIC_PAGOS,
+        schema=esquema_avro(PagoProcesado),
+        batching_enabled=True,
+        # Lotes por llave: con Key_Shared cada lote va entero al consumidor de su llave
+        batching_type=BatchingType.KeyBased,
+        batching_max_publish_delay_ms=settings.PUBLICADOR_BATCH_DELAY_MS,
+        max_pending_messages=settings.PUBLICADOR_MAX_PENDIENTES,
+        block_if_queue_full=False
+    )
+
+
+def publicador_pagos() -> PublicadorAsincrono:
+    """Publicador de PagoProcesado compartido por el proceso."""
+    global _publicador
+    if _publicador is None:
+        with _lock:
+            if _publicador is None:
+                _publicador = PublicadorAsincrono(
+                    _crear_producer,
+                    OutboxPagosPG(settings.TOPIC_PAGOS),
+                    max_pendientes=settings.PUBLICADOR_MAX_PENDIENTES,
+                    intervalo_reenvio_segundos=settings.PUBLICADOR_REENVIO_SEGUNDOS,
+                    lote_reenvio=settings.OUTBOX_BATCH_SIZE
+                )
+    return _publicador
+
+
+def iniciar_publicador():
+    publicador_pagos().iniciar()
+
+
+def cerrar_publicador():
+    global _cliente
+    if _publicador is not None:
+        _publicador.cerrar()
+    if _cliente is not None:
+        _cliente.close()
+        _cliente = None
@@ -12,7 +12,17 @@ class Settings(BaseSettings):
     SERVICE_NAME: str = "pagos-api"
     TOPIC_PAGOS: str = "eventos-pago"  # Unificado a singular según contrato
     TOPIC_REFERIDO_CONFIRMADO: str = "eventos-referido-confirmado"
-    OUTBOX_BATCH_SIZE: int = 100  # Ya no se usa, dejado por compatibilidad
+    OUTBOX_BATCH_SIZE: int = 100  # Filas del outbox reenviadas por ciclo
+    SAGA_MODO: str = "orquestacion"  # orquestacion | coreografia
+    PUBLICADOR_MAX_PENDIENTES: int = 1000  # Mensajes en vuelo antes de desbordar al outbox
+    PUBLICADOR_BATCH_DELAY_MS: int = 10
+    PUBLICADOR_REENVIO_SEGUNDOS: float = 5.0
+    COMANDO_PAGO_LOTE_MAX: int = 100  # Mensajes por batch_receive del consumer de comando-pago
+    COMANDO_PAGO_LOTE_ESPERA_MS: int = 100
+    CONSUMIR_COMANDOS_EN_API: bool = True  # False cuando corren workers (python -m pagos.worker)
+    WORKER_DRENADO_SEGUNDOS: float = 30.0
+    ESTADO_CACHE_CAPACIDAD: int = 10000  # Respuestas de GET /pagos/{idPago} en memoria
+    ESTADO_CACHE_TTL_SEGUNDOS: float = 5.0  # Máximo que GET /pagos/{idPago} puede ir atrasado (ver config/cache.py)
 
     class Config:
         env_file = ".env"
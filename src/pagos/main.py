@@ -1,15 +1,17 @@
 from fastapi import FastAPI
 from presentacion.api import router
-from config.db import create_tables
+from config.db import init_db, init_db_async, cerrar_db_async, create_tables
 from config.pulsar_config import Settings
+from config.publicador import iniciar_publicador, cerrar_publicador
 import threading
 
     # ✅ Importar módulo para auto-registro de handlers CQRS
 import modulos.aplicacion.comandos.pago_command_handler
 import modulos.aplicacion.queries.obtener_estado_pago_handler
+import modulos.aplicacion.queries.reporte_pagos_handler
 
 # ✅ Importar consumer de comando-pago
-from modulos.infraestructura.comando_pago_consumer import main_comando_pago_consumer
+from modulos.infraestructura.comando_pago_consumer import main_comando_pago_consumer, suscribirse_a_referidos_procesados
 
 app = FastAPI(title="API de Pagos", version="1.0.0")
 
@@ -21,14 +23,28 @@ def health_check():
 @app.on_event("startup")
 def on_startup():
     print("🚀 Iniciando servicio de Pagos...")
+    init_db()
     create_tables()
+    init_db_async()
     print("✅ Base de datos inicializada")
+    iniciar_publicador()
+    print("✅ Publicador de eventos-pago listo")
     print("🎯 Handlers CQRS cargados y listos")
     
-    # ✅ Iniciar consumer de comando-pago en hilo separado
-    print("🔄 Iniciando consumer de comando-pago...")
-    comando_consumer_thread = threading.Thread(target=main_comando_pago_consumer, daemon=True)
-    comando_consumer_thread.start()
-    print("✅ Consumer de comando-pago iniciado en hilo separado")
+    # ✅ Iniciar consumer de comando-pago en hilo separado (salvo que lo atiendan los workers)
+    if Settings().CONSUMIR_COMANDOS_EN_API:
+        print("🔄 Iniciando consumer de comando-pago...")
+        comando_consumer_thread = threading.Thread(target=main_comando_pago_consumer, daemon=True)
+        comando_consumer_thread.start()
+        print("✅ Consumer de comando-pago iniciado en hilo separado")
+
+    if Settings().SAGA_MODO.lower() == "coreografia":
+        threading.Thread(target=suscribirse_a_referidos_procesados, daemon=True).start()
+        print("✅ Consumer de eventos-referido (coreografía) iniciado")
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    cerrar_publicador()
+    await cerrar_db_async()
 
 app.include_router(router)
@@ -13,6 +13,8 @@ try:
     # Importar query handlers
     from .queries.obtener_estado_pago_handler import ObtenerEstadoPagoHandler
     print("✅ ObtenerEstadoPagoHandler registrado")
+    from .queries.reporte_pagos_handler import ReportePagosHandler
+    print("✅ ReportePagosHandler registrado")
     
     print("🎯 Módulo de pagos cargado - Handlers CQRS esenciales registrados")
     
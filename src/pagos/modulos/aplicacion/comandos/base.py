@@ -1,9 +1,17 @@
+from typing import Optional
 from seedworks.aplicacion.comandos import ComandoHandler
+from ...infraestructura.repositorio_postgresql import RepositorioPagosPG
 
 class PagoBaseHandler(ComandoHandler):
     """
     Handler base para comandos de pagos.
     Sigue el patrón de EventosMS simplificado.
     """
-    def __init__(self):
-        pass
\ No newline at end of file
+    def __init__(self, repositorio: Optional[RepositorioPagosPG] = None):
+        self._repositorio = repositorio
+
+    @property
+    def repositorio(self) -> RepositorioPagosPG:
+        if self._repositorio is None:
+            self._repositorio = RepositorioPagosPG()
+        return self._repositorio
\ No newline at end of file
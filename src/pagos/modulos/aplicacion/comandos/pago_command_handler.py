@@ -1,155 +1,239 @@
-from seedworks.aplicacion.comandos import ejecutar_commando
+from seedworks.aplicacion.comandos import ejecutar_commando, ejecutar_commando_async
+from seedworks.infraestructura.idempotencia import AlmacenResultadosComandos, llave_comando
 from .base import PagoBaseHandler
 from .pago_command import PagoCommand, TipoComandoPago
-from ...infraestructura.repositorio_postgresql import RepositorioPagosPG, PagoORM
-from config.pulsar_config import Settings
-from pulsar import Client
-from pulsar.schema import AvroSchema
+from ...infraestructura.repositorio_postgresql import PagoORM, RepositorioPagosPGAsync
+from config.cache import cache_estado_pagos
+from config.idempotencia import almacen_resultados
+from config.publicador import publicador_pagos
 from schema.eventos_pagos import ProcesarPago, PagoProcesado
 import json
+import asyncio
 from datetime import datetime
 from uuid import uuid4
-import time
+
+MONTO_MAXIMO_APROBACION = 500
+CAMPOS_PAGO = ("idPago", "idEvento", "idSocio", "monto", "estado", "fechaEvento", "idTransaction")
+
+
+def _llave(comando: PagoCommand):
+    """Sin idTransaction no hay forma de reconocer un reintento."""
+    return llave_comando(comando.idTransaction, comando.comando.value) if comando.idTransaction else None
+
+
+def _serializar(resultado) -> dict:
+    if isinstance(resultado, Exception):
+        return {"error": str(resultado)}
+    campos = {campo: getattr(resultado, campo) for campo in CAMPOS_PAGO}
+    campos["monto"] = float(campos["monto"])
+    campos["fechaEvento"] = campos["fechaEvento"].isoformat() if isinstance(campos["fechaEvento"], datetime) \
+        else campos["fechaEvento"]
+    return campos
+
+
+def _reproducir(resultado: dict):
+    """Resultado guardado como lo retornaría el handler (sin tocar la base de datos ni el broker)."""
+    if "error" in resultado:
+        return ValueError(resultado["error"])
+    return PagoORM(**{**resultado, "fechaEvento": _fecha(resultado["fechaEvento"])})
+
+
+def _evaluar(pago, transicionado: bool, estado: str):
+    """Resultado del comando según el upsert: el pago, o el error si ya estaba en otro estado final."""
+    if not transicionado and pago.estado != estado:
+        return ValueError(f"No se puede pasar el pago {pago.idPago} de '{pago.estado}' a '{estado}'")
+    return pago
+
+
+def _fecha(valor: str):
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        return valor  # PostgreSQL hace el cast de otros formatos
+
+
 class PagoCommandHandler(PagoBaseHandler):
     """
     Handler unificado para PagoCommand.
     Maneja tanto comando 'Iniciar' como 'Cancelar' según especificación.
     """
     
+    def __init__(self, repositorio=None, resultados: AlmacenResultadosComandos = None):
+        super().__init__(repositorio)
+        self._resultados = resultados
+
+    @property
+    def resultados(self) -> AlmacenResultadosComandos:
+        if self._resultados is None:
+            self._resultados = almacen_resultados()
+        return self._resultados
+
     def handle(self, comando: PagoCommand):
         print(f"🔄 Ejecutando PagoCommandHandler - Comando: {comando.comando}")
-        self._iniciar_pago(comando)
-        if comando.data.monto <= 500:
-            return self._completar_pago(comando)
+        resultado = self._ejecutar([comando])[0]
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    def handle_lote(self, comandos: list) -> list:
+        """Aplica un lote de comandos en una transacción y publica los eventos en un solo flush.
+
+        Retorna por comando el pago resultante o la excepción que lo rechazó.
+        """
+        print(f"🔄 Ejecutando PagoCommandHandler - Lote de {len(comandos)} comandos")
+        resultados = self._ejecutar(comandos)
+        publicador_pagos().flush()
+        return resultados
+
+    def _ejecutar(self, comandos: list) -> list:
+        """Reproduce el resultado guardado de los comandos repetidos y aplica el resto."""
+        llaves = [_llave(comando) for comando in comandos]
+        previos = self.resultados.obtener([llave for llave in llaves if llave])
+
+        resultados, pendientes, repetidos, vistas = [None] * len(comandos), [], dict(), set()
+        for i, llave in enumerate(llaves):
+            if llave in previos:
+                print(f"⏭️ Comando {llave} ya ejecutado, se reproduce su resultado")
+                resultados[i] = self._republicar(comandos[i], _reproducir(previos[llave]))
+            elif llave in vistas:
+                repetidos[i] = llave  # Repetido dentro del lote: toma el resultado de la primera aparición
+            else:
+                pendientes.append(i)
+                if llave:
+                    vistas.add(llave)
+        if not pendientes:
+            return resultados
+
+        transiciones = [self._transicion(comandos[i]) for i in pendientes]
+        nuevos = dict()
+        aplicadas = self.repositorio.aplicar_transiciones(
+            transiciones, self._registrador([llaves[i] for i in pendientes], transiciones, nuevos)
+        )
+        self.resultados.recordar(nuevos)
+        for i, transicion, (pago, transicionado) in zip(pendientes, transiciones, aplicadas):
+            resultados[i] = self._resultado_o_error(comandos[i], pago, transicionado, transicion["estado"])
+        for i, llave in repetidos.items():
+            resultados[i] = _reproducir(nuevos[llave])
+        return resultados
+
+    def _registrador(self, llaves: list, transiciones: list, nuevos: dict):
+        """Guarda el resultado de cada comando en la transacción que lo aplica (ver aplicar_transiciones).
+
+        Los resultados serializados quedan en ``nuevos`` para pasarlos al LRU después del commit.
+        """
+        def registrar(aplicadas):
+            for llave, transicion, (pago, transicionado) in zip(llaves, transiciones, aplicadas):
+                if llave:
+                    nuevos[llave] = _serializar(_evaluar(pago, transicionado, transicion["estado"]))
+            return [self.resultados.sentencia_guardar(nuevos)] if nuevos else []
+        return registrar
+
+    def _transicion(self, comando: PagoCommand) -> dict:
+        """Estado final del pago según el monto; se aplica en un solo round trip
+        (ver RepositorioPagosPG.aplicar_transicion)."""
+        if comando.data.monto <= MONTO_MAXIMO_APROBACION:
+            estado, fechaEvento = "completado", datetime.utcnow()
         else:
-            return self._cancelar_pago(comando)
-        
+            estado, fechaEvento = "rechazado", _fecha(comando.data.fechaEvento)
+        return dict(
+            idPago=str(uuid4()),
+            idEvento=comando.data.idEvento,
+            idSocio=comando.data.idSocio,
+            monto=comando.data.monto,
+            estado=estado,
+            fechaEvento=fechaEvento,
+            idTransaction=comando.idTransaction
+        )
+
+    def _resultado_o_error(self, comando: PagoCommand, pago, transicionado: bool, estado: str):
+        resultado = _evaluar(pago, transicionado, estado)
+        if isinstance(resultado, Exception):
+            return resultado
+        if not transicionado:
+            print(f"ℹ️ Pago {pago.idPago} ya estaba {estado}")
+            return self._republicar(comando, pago)
+
+        # Sólo el caché de este proceso; en los demás la entrada vence por TTL (config/cache.py)
+        cache_estado_pagos.eliminar(pago.idPago)
+        self._publicar_evento_procesado(self.repositorio, pago, comando.idTransaction, estado)
+        print(f"✅ Pago {pago.idPago} {estado} exitosamente")
+        return pago
+
+    def _republicar(self, comando: PagoCommand, resultado):
+        """Redelivery de un comando ya aplicado: se vuelve a publicar su PagoProcesado.
+
+        El proceso pudo caer entre el commit y la publicación; los consumidores
+        de eventos-pago son idempotentes, así que un duplicado no hace daño.
+        """
+        if not isinstance(resultado, Exception):
+            self._publicar_evento_procesado(self.repositorio, resultado, comando.idTransaction, resultado.estado)
+        return resultado
 
-    
-    def _iniciar_pago(self, comando: PagoCommand):
-        """Lógica para iniciar un pago"""
-        settings = Settings()
-        repo = RepositorioPagosPG(settings.DB_URL)
-        
-        with repo.SessionLocal() as session:
-            # Verificar si ya existe
-            pago_existente = session.query(PagoORM).filter_by(
-                idEvento=comando.data.idEvento
-            ).first()
-            
-            if pago_existente:
-                print(f"⚠️ Pago ya existe para evento {comando.data.idEvento}")
-                return pago_existente
-            
-            # Crear nuevo pago
-            idPago = str(uuid4())
-            pago_orm = PagoORM(
-                idPago=idPago,
-                idEvento=comando.data.idEvento,
-                idSocio=comando.data.idSocio,
-                monto=comando.data.monto,
-                estado="solicitado",
-                fechaEvento=comando.data.fechaEvento,
-                idTransaction=comando.idTransaction
-            )
-            session.add(pago_orm)
-            session.commit()
-            
-            # Publicar evento PagoProcesado
-            # self._publicar_evento_procesado(repo, pago_orm, comando.idTransaction, "solicitado")
-            print(f"✅ Pago {idPago} iniciado exitosamente")
-            
-            return pago_orm
-    
-    def _cancelar_pago(self, comando: PagoCommand):
-        """Lógica para cancelar un pago"""
-        settings = Settings()
-        repo = RepositorioPagosPG(settings.DB_URL)
-        
-        with repo.SessionLocal() as session:
-            # Buscar pago existente
-            pago_existente = session.query(PagoORM).filter_by(
-                idEvento=comando.data.idEvento
-            ).first()
-            
-            if not pago_existente:
-                raise ValueError(f"Pago no encontrado para evento {comando.data.idEvento}")
-            
-            # Cancelar pago
-            pago_existente.estado = "rechazado"
-            session.commit()
-            
-            # Publicar evento PagoProcesado
-            self._publicar_evento_procesado(repo, pago_existente, comando.idTransaction, "rechazado")
-            print(f"✅ Pago {pago_existente.idPago} cancelado exitosamente")
-            
-            return pago_existente
-
-    def _completar_pago(self, comando: PagoCommand):
-        """Lógica para completar un pago (transición a estado 'completado')."""
-        settings = Settings()
-        repo = RepositorioPagosPG(settings.DB_URL)
-
-        with repo.SessionLocal() as session:
-            pago_existente = session.query(PagoORM).filter_by(
-                idEvento=comando.data.idEvento
-            ).first()
-
-            if not pago_existente:
-                raise ValueError(f"Pago no encontrado para evento {comando.data.idEvento}")
-
-            if pago_existente.estado == "completado":
-                print(f"ℹ️ Pago {pago_existente.idPago} ya estaba completado")
-                return pago_existente
-
-            if pago_existente.estado == "rechazado":
-                raise ValueError(f"No se puede completar un pago rechazado (idPago={pago_existente.idPago})")
-
-            pago_existente.estado = "completado"
-            pago_existente.fechaEvento = datetime.utcnow()
-            session.commit()
-
-            self._publicar_evento_procesado(repo, pago_existente, comando.idTransaction, "completado")
-            print(f"✅ Pago {pago_existente.idPago} completado exitosamente")
-            return pago_existente
-    
     def _publicar_evento_procesado(self, repo, pago, idTransaction, estado):
-        """Publica evento PagoProcesado directamente a Pulsar (sin outbox) con retries simples."""
-
-        settings = Settings()
-        client = Client(settings.PULSAR_URL)
-        producer = client.create_producer(settings.TOPIC_PAGOS, schema=AvroSchema(PagoProcesado))
-        try:
-            record = PagoProcesado(
-                idTransaction=idTransaction,
-                idPago=pago.idPago,
-                idEvento=pago.idEvento,
-                idSocio=pago.idSocio,
-                monto=float(pago.monto),
-                fechaEvento=str(pago.fechaEvento),
-                estado=estado
-            )
-            intentos = 0
-            max_intentos = 3
-            backoff = 0.5
-            while True:
-                try:
-                    producer.send(record)
-                    print(f"📤 Evento PagoProcesado publicado idPago={pago.idPago} estado={estado}")
-                    break
-                except Exception as e:
-                    intentos += 1
-                    if intentos >= max_intentos:
-                        print(f"❌ Fallo publicando evento PagoProcesado tras {intentos} intentos: {e}")
-                        break
-                    time.sleep(backoff)
-                    backoff *= 2
-        finally:
-            producer.close()
-            client.close()
+        """Encola el evento PagoProcesado en el publicador del proceso (no bloquea)."""
+        record = PagoProcesado(
+            idTransaction=idTransaction,
+            idPago=pago.idPago,
+            idEvento=pago.idEvento,
+            idSocio=pago.idSocio,
+            monto=float(pago.monto),
+            fechaEvento=str(pago.fechaEvento),
+            estado=estado
+        )
+        # idSocio como llave: referidos consume eventos-pago con Key_Shared por socio
+        if publicador_pagos().publicar(record, llave=pago.idSocio):
+            print(f"📤 Evento PagoProcesado encolado idPago={pago.idPago} estado={estado}")
+        else:
+            print(f"📦 Evento PagoProcesado guardado en outbox idPago={pago.idPago} estado={estado}")
 
 # Registrar handler usando singledispatch
 @ejecutar_commando.register(PagoCommand)
 def ejecutar_pago_command(comando: PagoCommand):
     handler = PagoCommandHandler()
-    return handler.handle(comando)
\ No newline at end of file
+    return handler.handle(comando)
+
+def ejecutar_lote_pago_commands(comandos: list) -> list:
+    handler = PagoCommandHandler()
+    return handler.handle_lote(comandos)
+
+
+class PagoCommandHandlerAsync(PagoCommandHandler):
+    """Misma lógica sobre el repositorio async (asyncpg), para los endpoints HTTP."""
+
+    @property
+    def repositorio(self) -> RepositorioPagosPGAsync:
+        if self._repositorio is None:
+            self._repositorio = RepositorioPagosPGAsync()
+        return self._repositorio
+
+    async def handle(self, comando: PagoCommand):
+        print(f"🔄 Ejecutando PagoCommandHandlerAsync - Comando: {comando.comando}")
+        llave = _llave(comando)
+        resultado = await self._previo(llave) if llave else None
+        if resultado is not None:
+            self._republicar(comando, resultado)
+        else:
+            transicion, nuevos = self._transicion(comando), dict()
+            pago, transicionado = await self.repositorio.aplicar_transicion(
+                **transicion, registrar=self._registrador([llave], [transicion], nuevos)
+            )
+            self.resultados.recordar(nuevos)
+            resultado = self._resultado_o_error(comando, pago, transicionado, transicion["estado"])
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    async def _previo(self, llave: str):
+        # El almacén de resultados es sync: fuera del LRU se consulta en un hilo
+        previo = self.resultados.en_memoria(llave)
+        if previo is None:
+            previo = (await asyncio.to_thread(self.resultados.obtener, [llave])).get(llave)
+        if previo is None:
+            return None
+        print(f"⏭️ Comando {llave} ya ejecutado, se reproduce su resultado")
+        return _reproducir(previo)
+
+@ejecutar_commando_async.register(PagoCommand)
+async def ejecutar_pago_command_async(comando: PagoCommand):
+    handler = PagoCommandHandlerAsync()
+    return await handler.handle(comando)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
 from seedworks.aplicacion.queries import QueryHandler
+from ...infraestructura.repositorio_postgresql import RepositorioPagosPG
 
 
 class Query(ABC):
@@ -11,8 +12,14 @@ class Query(ABC):
 class PagoQueryBaseHandler(QueryHandler):
     """Handler base para queries de pagos"""
     
-    def __init__(self):
-        pass
+    def __init__(self, repositorio: Optional[RepositorioPagosPG] = None):
+        self._repositorio = repositorio
+
+    @property
+    def repositorio(self) -> RepositorioPagosPG:
+        if self._repositorio is None:
+            self._repositorio = RepositorioPagosPG()
+        return self._repositorio
 
     @abstractmethod
     def handle(self, query: Query) -> Any:
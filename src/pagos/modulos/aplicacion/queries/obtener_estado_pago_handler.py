@@ -1,8 +1,17 @@
-from seedworks.aplicacion.queries import ejecutar_query, QueryResultado
+import hashlib
+from config.cache import cache_estado_pagos
+from seedworks.aplicacion.queries import ejecutar_query, ejecutar_query_async, QueryResultado
 from .base import PagoQueryBaseHandler
 from .obtener_estado_pago import ObtenerEstadoPagoQuery
-from ...infraestructura.repositorio_postgresql import RepositorioPagosPG, PagoORM
-from config.pulsar_config import Settings
+from ...infraestructura.repositorio_postgresql import PagoORM, RepositorioPagosPGAsync
+
+
+def etag_estado(pago_response: dict) -> str:
+    """ETag de la respuesta: cambia sólo cuando cambia el estado o su fecha."""
+    huella = hashlib.blake2b(
+        f"{pago_response['estadoPago']}|{pago_response['fechaPago']}".encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return f'"{huella}"'
 
 
 class ObtenerEstadoPagoHandler(PagoQueryBaseHandler):
@@ -13,33 +22,61 @@ class ObtenerEstadoPagoHandler(PagoQueryBaseHandler):
     
     def handle(self, query: ObtenerEstadoPagoQuery) -> QueryResultado:
         print(f"🔍 Ejecutando ObtenerEstadoPagoHandler para pago: {query.idPago}")
-        
-        settings = Settings()
-        repo = RepositorioPagosPG(settings.DB_URL)
-        
+        en_cache = cache_estado_pagos.obtener(query.idPago)
+        if en_cache is not None:
+            return QueryResultado(resultado=en_cache)
+
+        repo = self.repositorio
+
         with repo.SessionLocal() as session:
             # Buscar pago por ID
             pago = session.query(PagoORM).filter_by(idPago=query.idPago).first()
-            
-            if not pago:
-                print(f"❌ Pago {query.idPago} no encontrado")
-                return QueryResultado(resultado=None)
-            
-            # Response según especificación (camelCase + valores reales persistidos)
-            pago_response = {
-                "idTransaction": pago.idTransaction,
-                "idPago": pago.idPago,
-                "idSocio": pago.idSocio,
-                "pago": float(pago.monto),  # Se expone como 'pago' según contrato
-                "estadoPago": pago.estado,  # camelCase
-                "fechaPago": pago.fechaEvento.isoformat()
-            }
-            
-            print(f"✅ Pago {query.idPago} encontrado: {pago_response['estadoPago']}")
-            return QueryResultado(resultado=pago_response)
+            return self._resultado(query, pago)
+
+    def _resultado(self, query: ObtenerEstadoPagoQuery, pago) -> QueryResultado:
+        if not pago:
+            print(f"❌ Pago {query.idPago} no encontrado")
+            return QueryResultado(resultado=None)
+
+        # Response según especificación (camelCase + valores reales persistidos)
+        pago_response = {
+            "idTransaction": pago.idTransaction,
+            "idPago": pago.idPago,
+            "idSocio": pago.idSocio,
+            "pago": float(pago.monto),  # Se expone como 'pago' según contrato
+            "estadoPago": pago.estado,  # camelCase
+            "fechaPago": pago.fechaEvento.isoformat()
+        }
+
+        cache_estado_pagos.guardar(query.idPago, pago_response)
+        print(f"✅ Pago {query.idPago} encontrado: {pago_response['estadoPago']}")
+        return QueryResultado(resultado=pago_response)
+
+
+class ObtenerEstadoPagoHandlerAsync(ObtenerEstadoPagoHandler):
+    """Misma consulta sobre el repositorio async (asyncpg), para los endpoints HTTP."""
+
+    @property
+    def repositorio(self) -> RepositorioPagosPGAsync:
+        if self._repositorio is None:
+            self._repositorio = RepositorioPagosPGAsync()
+        return self._repositorio
+
+    async def handle(self, query: ObtenerEstadoPagoQuery) -> QueryResultado:
+        print(f"🔍 Ejecutando ObtenerEstadoPagoHandlerAsync para pago: {query.idPago}")
+        en_cache = cache_estado_pagos.obtener(query.idPago)
+        if en_cache is not None:
+            return QueryResultado(resultado=en_cache)
+        pago = await self.repositorio.obtener(query.idPago)
+        return self._resultado(query, pago)
 
 # Registrar handler usando singledispatch
 @ejecutar_query.register(ObtenerEstadoPagoQuery)
 def ejecutar_query_obtener_estado_pago(query: ObtenerEstadoPagoQuery):
     handler = ObtenerEstadoPagoHandler()
     return handler.handle(query)
+
+@ejecutar_query_async.register(ObtenerEstadoPagoQuery)
+async def ejecutar_query_obtener_estado_pago_async(query: ObtenerEstadoPagoQuery):
+    handler = ObtenerEstadoPagoHandlerAsync()
+    return await handler.handle(query)
@@ -0,0 +1,16 @@
+from datetime import date
+from pydantic import BaseModel, model_validator
+from typing import Literal, Optional
+from seedworks.aplicacion.queries import Query
+
+class ReportePagosQuery(BaseModel, Query):
+    idSocio: Optional[str] = None  # Sin idSocio: totales de todos los socios
+    desde: date
+    hasta: date
+    granularidad: Literal["dia", "mes"] = "dia"
+
+    @model_validator(mode="after")
+    def validar_rango(self):
+        if self.desde > self.hasta:
+            raise ValueError("desde debe ser <= hasta")
+        return self
@@ -0,0 +1,63 @@
+from seedworks.aplicacion.queries import ejecutar_query, ejecutar_query_async, QueryResultado
+from .base import PagoQueryBaseHandler
+from .reporte_pagos import ReportePagosQuery
+from ...infraestructura.repositorio_reportes import RepositorioReportesPG, RepositorioReportesPGAsync
+
+
+class ReportePagosHandler(PagoQueryBaseHandler):
+    """
+    Handler que arma el reporte de pagos por periodo desde pagos_rollup,
+    sin recorrer la tabla pagos.
+    """
+
+    @property
+    def repositorio(self) -> RepositorioReportesPG:
+        if self._repositorio is None:
+            self._repositorio = RepositorioReportesPG()
+        return self._repositorio
+
+    def handle(self, query: ReportePagosQuery) -> QueryResultado:
+        filas = self.repositorio.consultar(query.idSocio, query.desde, query.hasta, query.granularidad)
+        return self._resultado(query, filas)
+
+    def _resultado(self, query: ReportePagosQuery, filas) -> QueryResultado:
+        periodos = dict()
+        for fila in filas:
+            periodos.setdefault(fila.periodo, dict())[fila.estado] = {
+                "cantidad": fila.cantidad,
+                "monto": float(fila.monto)
+            }
+        return QueryResultado(resultado={
+            "idSocio": query.idSocio,
+            "granularidad": query.granularidad,
+            "desde": query.desde.isoformat(),
+            "hasta": query.hasta.isoformat(),
+            "periodos": [
+                {"periodo": periodo.isoformat(), "totales": totales} for periodo, totales in periodos.items()
+            ]
+        })
+
+
+class ReportePagosHandlerAsync(ReportePagosHandler):
+    """Misma consulta sobre el repositorio async (asyncpg), para los endpoints HTTP."""
+
+    @property
+    def repositorio(self) -> RepositorioReportesPGAsync:
+        if self._repositorio is None:
+            self._repositorio = RepositorioReportesPGAsync()
+        return self._repositorio
+
+    async def handle(self, query: ReportePagosQuery) -> QueryResultado:
+        filas = await self.repositorio.consultar(query.idSocio, query.desde, query.hasta, query.granularidad)
+        return self._resultado(query, filas)
+
+# Registrar handler usando singledispatch
+@ejecutar_query.register(ReportePagosQuery)
+def ejecutar_query_reporte_pagos(query: ReportePagosQuery):
+    handler = ReportePagosHandler()
+    return handler.handle(query)
+
+@ejecutar_query_async.register(ReportePagosQuery)
+async def ejecutar_query_reporte_pagos_async(query: ReportePagosQuery):
+    handler = ReportePagosHandlerAsync()
+    return await handler.handle(query)
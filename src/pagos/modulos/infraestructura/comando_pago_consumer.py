@@ -1,8 +1,10 @@
 import pulsar
 import pulsar as _pulsar
-from pulsar.schema import AvroSchema
 from seedworks.aplicacion.comandos import ejecutar_commando
+from seedworks.infraestructura.idempotencia import llave_mensaje
+from seedworks.infraestructura.esquemas import esquema_avro
 from ..aplicacion.comandos.pago_command import PagoCommand, PagoData
+from ..aplicacion.comandos.pago_command_handler import ejecutar_lote_pago_commands
 try:
     from config.pulsar_config import PulsarConfig, settings  # type: ignore
 except ImportError:
@@ -12,14 +14,25 @@ except ImportError:
         def __init__(self):
             self.pulsar_url = getattr(settings, 'PULSAR_URL', 'pulsar://pulsar:6650')
             self.topic_pagos = getattr(settings, 'TOPIC_PAGOS', 'eventos-pago')
-from pagos.schema.eventos_pagos import ProcesarPago
+from pagos.schema.eventos_pagos import ProcesarPago, ReferidoProcesado
 import logging
 from datetime import datetime
 
-def suscribirse_a_comando_pago():
+def suscribirse_a_comando_pago(detener=None):
     """
     Consumer para comandos PagoCommand del tópico comando-pago.
     Según especificación actualizada.
+
+    Recibe lotes (batch_receive) y los aplica con PagoCommandHandler.handle_lote:
+    una consulta de resultados previos, una transacción y un flush del producer
+    por lote. Los redespachos los resuelve resultados_comandos por
+    (idTransaction, comando), sin consultar mensajes_procesados por mensaje.
+    Cada mensaje se confirma según su propio resultado; si falla el lote
+    completo se reintenta mensaje por mensaje y sólo se hace nack de los que
+    vuelven a fallar.
+
+    ``detener`` (un Event) permite un apagado ordenado: se termina el lote en
+    curso, se vacía el producer y se cierra la suscripción.
     """
     cliente = None
     try:
@@ -31,64 +44,158 @@ def suscribirse_a_comando_pago():
             "comando-pago",  # Tópico según especificación
             consumer_type=_pulsar.ConsumerType.Shared,
             subscription_name='pagos-comando-sub',
-            schema=AvroSchema(ProcesarPago),
-            initial_position=_pulsar.InitialPosition.Earliest
+            schema=esquema_avro(ProcesarPago),
+            initial_position=_pulsar.InitialPosition.Earliest,
+            batch_receive_policy=_pulsar.ConsumerBatchReceivePolicy(
+                settings.COMANDO_PAGO_LOTE_MAX, -1, settings.COMANDO_PAGO_LOTE_ESPERA_MS
+            )
         )
 
         print("✅ [COMANDO-PAGO CONSUMER] Conectado al tópico 'comando-pago'")
 
+        while detener is None or not detener.is_set():
+            try:
+                mensajes = consumidor.batch_receive()
+            except Exception as e:
+                print(f"❌ [COMANDO-PAGO CONSUMER] Error recibiendo lote: {e}")
+                continue
+            if len(mensajes):
+                procesar_lote_comandos(consumidor, list(mensajes))
+
+        print("🛑 [COMANDO-PAGO CONSUMER] Drenado, cerrando suscripción")
+        consumidor.close()
+
+    except Exception as e:
+        logging.error(f'ERROR: [COMANDO-PAGO CONSUMER] Suscribiéndose al tópico comando-pago: {e}')
+    finally:
+        if cliente:
+            cliente.close()
+
+def procesar_lote_comandos(consumidor, mensajes):
+    print(f'📨 [COMANDO-PAGO CONSUMER] Lote de {len(mensajes)} PagoCommand recibido')
+    pendientes = []  # (mensaje, comando)
+    for mensaje in mensajes:
+        try:
+            datos = mensaje.value()
+            # ✅ Convertir mensaje Avro a comando interno
+            comando = PagoCommand(
+                comando=datos.comando,
+                idTransaction=datos.idTransaction,
+                data=PagoData(
+                    idEvento=datos.idEvento,
+                    idSocio=datos.idSocio,
+                    monto=datos.monto,
+                    fechaEvento=str(datos.fechaEvento)
+                )
+            )
+            pendientes.append((mensaje, comando))
+        except Exception as e:
+            # Mensaje inválido: reintentarlo no lo arregla
+            print(f"❌ [COMANDO-PAGO CONSUMER] Comando inválido: {e}")
+            consumidor.acknowledge(mensaje)
+
+    if not pendientes:
+        return
+
+    try:
+        # 🎯 DELEGACIÓN al sistema CQRS, un lote por transacción
+        resultados = ejecutar_lote_pago_commands([comando for _, comando in pendientes])
+    except Exception as e:
+        print(f"⚠️ [COMANDO-PAGO CONSUMER] Error aplicando lote, se aplica mensaje por mensaje: {e}")
+        logging.error(f"Error aplicando lote de comandos: {e}")
+        for mensaje, comando in pendientes:
+            _procesar_comando(consumidor, mensaje, comando)
+        return
+
+    for (mensaje, comando), resultado in zip(pendientes, resultados):
+        _confirmar(consumidor, mensaje, comando, resultado)
+    print(f"✅ [COMANDO-PAGO CONSUMER] Lote de {len(pendientes)} comandos aplicado")
+
+def _procesar_comando(consumidor, mensaje, comando):
+    """Aplica un comando solo; si vuelve a fallar es el mensaje problemático y se reentrega."""
+    try:
+        resultado = ejecutar_lote_pago_commands([comando])[0]
+    except Exception as e:
+        print(f"❌ [COMANDO-PAGO CONSUMER] Comando {comando.comando} para evento {comando.data.idEvento} falló, se reentregará: {e}")
+        logging.error(f"Error aplicando comando {comando.comando}: {e}")
+        consumidor.negative_acknowledge(mensaje)
+        return
+    _confirmar(consumidor, mensaje, comando, resultado)
+
+def _confirmar(consumidor, mensaje, comando, resultado):
+    if isinstance(resultado, Exception):
+        # Transición inválida (p.ej. completar un pago rechazado): error de negocio, no se reintenta
+        print(f"❌ [COMANDO-PAGO CONSUMER] Comando {comando.comando} para evento {comando.data.idEvento} rechazado: {resultado}")
+    consumidor.acknowledge(mensaje)
+
+def suscribirse_a_referidos_procesados():
+    """
+    Coreografía: inicia el pago al oír ReferidoProcesado en eventos-referido,
+    sin esperar el comando-pago del orquestador.
+    """
+    cliente = None
+    try:
+        pulsar_config = PulsarConfig()
+        cliente = pulsar.Client(pulsar_config.pulsar_url)
+
+        consumidor = cliente.subscribe(
+            "eventos-referido",
+            consumer_type=_pulsar.ConsumerType.Shared,
+            subscription_name='pagos-eventos-referido-sub',
+            schema=esquema_avro(ReferidoProcesado),
+            initial_position=_pulsar.InitialPosition.Earliest
+        )
+
+        print("✅ [REFERIDO-PROCESADO CONSUMER] Conectado al tópico 'eventos-referido'")
+        from config.idempotencia import almacen_idempotencia
+        idempotencia = almacen_idempotencia()
+
         while True:
             try:
                 mensaje = consumidor.receive(timeout_millis=5000)
-                
-                if mensaje:
-                    print(f'📨 [COMANDO-PAGO CONSUMER] PagoCommand recibido')
-                    datos = mensaje.value()
-                    
-                    try:
-                        # ✅ Convertir mensaje Avro a comando interno
-                        pago_data = PagoData(
-                            idEvento=datos.idEvento,
-                            idSocio=datos.idSocio,
-                            monto=datos.monto,
-                            fechaEvento=str(datos.fechaEvento)
-                        )
-                        
-                        comando = PagoCommand(
-                            comando=datos.comando,
-                            idTransaction=datos.idTransaction,
-                            data=pago_data
-                        )
-                        
-                        # 🎯 DELEGACIÓN TOTAL al sistema CQRS!
-                        print(f"🔄 [COMANDO-PAGO CONSUMER] Ejecutando comando {datos.comando}")
-                        ejecutar_commando(comando)
-                        print(f"✅ [COMANDO-PAGO CONSUMER] Comando ejecutado exitosamente")
-                        
-                    except Exception as e:
-                        print(f"❌ [COMANDO-PAGO CONSUMER] Error ejecutando comando 2: {e}")
-                        logging.error(f"Error ejecutando comando: {e}")
-                    
-                    consumidor.acknowledge(mensaje)
-                    
             except pulsar.Timeout:
                 continue
+
+            try:
+                datos = mensaje.value()
+                if (datos.data.estadoEvento or '').lower() == 'rechazado':
+                    consumidor.acknowledge(mensaje)
+                    continue
+
+                llave = llave_mensaje('pagos-eventos-referido-sub', mensaje, datos.idTransaction, 'Iniciar')
+                if idempotencia.ya_procesado(llave):
+                    consumidor.acknowledge(mensaje)
+                    continue
+
+                ejecutar_commando(PagoCommand(
+                    comando="Iniciar",
+                    idTransaction=datos.idTransaction,
+                    data=PagoData(
+                        idEvento=datos.data.idEvento,
+                        idSocio=datos.data.idSocio,
+                        monto=datos.data.monto,
+                        fechaEvento=str(datos.data.fechaEvento)
+                    )
+                ))
+                idempotencia.marcar_procesado(llave, 'pagos-eventos-referido-sub')
+                print(f"✅ [REFERIDO-PROCESADO CONSUMER] Pago iniciado para evento {datos.data.idEvento}")
             except Exception as e:
-                print(f"❌ [COMANDO-PAGO CONSUMER] Error recibiendo mensaje: {e}")
-                continue
+                print(f"❌ [REFERIDO-PROCESADO CONSUMER] Error ejecutando comando: {e}")
+                logging.error(f"Error ejecutando comando: {e}")
+            consumidor.acknowledge(mensaje)
 
     except Exception as e:
-        logging.error(f'ERROR: [COMANDO-PAGO CONSUMER] Suscribiéndose al tópico comando-pago: {e}')
+        logging.error(f'ERROR: [REFERIDO-PROCESADO CONSUMER] Suscribiéndose al tópico eventos-referido: {e}')
     finally:
         if cliente:
             cliente.close()
 
-def main_comando_pago_consumer():
+def main_comando_pago_consumer(detener=None):
     """
     Función principal del consumer de comandos.
     """
     print("🎯 [COMANDO-PAGO CONSUMER] Iniciando consumer para comando-pago")
-    suscribirse_a_comando_pago()
+    suscribirse_a_comando_pago(detener)
 
 if __name__ == "__main__":
     main_comando_pago_consumer()
\ No newline at end of file
@@ -1,12 +1,20 @@
-from sqlalchemy import create_engine, Column, String, Float, DateTime, Numeric
-from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from sqlalchemy import func, select, Column, String, Float, Date, DateTime, Numeric, Integer, Text, Index
+from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.exc import IntegrityError
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 from ..dominio.entidades import Pago
 from ..dominio.repositorios import RepoPagos
 
 Base = declarative_base()
 
+ESTADO_SOLICITADO = "solicitado"
+ESTADOS_FINALES = ("completado", "rechazado")
+GRANULARIDADES = ("dia", "mes")
+
+
 class PagoORM(Base):
     __tablename__ = "pagos"
     idPago = Column(String, primary_key=True)
@@ -17,12 +25,108 @@ class PagoORM(Base):
     fechaEvento = Column(DateTime(timezone=True), nullable=False)
     idTransaction = Column(String, nullable=True)  # Nuevo campo según especificación
 
+    __table_args__ = (Index("ux_pagos_id_evento", "idEvento", unique=True),)
+
+
+class OutboxORM(Base):
+    """Eventos que no se pudieron entregar al broker en línea (desborde del publicador)."""
+    __tablename__ = "outbox_pagos"
+    id = Column(String, primary_key=True)
+    topico = Column(String, nullable=False)
+    key = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="PENDING")
+    fecha_creacion = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_outbox_pagos_status_fecha", "status", "fecha_creacion"),)
+
+
+class PagoRollupORM(Base):
+    """Totales por periodo (día/mes), socio y estado final.
+
+    No hay una fila por periodo para todos los socios: sería la misma fila en
+    cada transición y serializaría a todos los escritores. Ese total se suma
+    al consultar desde las filas por socio.
+    """
+    __tablename__ = "pagos_rollup"
+    granularidad = Column(String(3), primary_key=True)
+    idSocio = Column(String, primary_key=True)
+    periodo = Column(Date, primary_key=True)
+    estado = Column(String, primary_key=True)
+    cantidad = Column(Integer, nullable=False, default=0)
+    monto = Column(Numeric(18,2), nullable=False, default=0)
+
+    __table_args__ = (Index("ix_pagos_rollup_granularidad_periodo", "granularidad", "periodo", "estado"),)
+
+
+def periodo(granularidad: str, fecha) -> date:
+    if isinstance(fecha, datetime):
+        fecha = (fecha.astimezone(timezone.utc) if fecha.tzinfo else fecha).date()
+    return fecha if granularidad == "dia" else fecha.replace(day=1)
+
+
+def _insert(dialecto: str):
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _sentencia_rollup(dialecto: str, pagos):
+    """Upsert que suma los pagos recién transicionados a pagos_rollup (None si no hay nada que sumar)."""
+    incrementos = defaultdict(lambda: [0, Decimal(0)])
+    for pago in pagos:
+        if pago.estado not in ESTADOS_FINALES:
+            continue
+        for granularidad in GRANULARIDADES:
+            incremento = incrementos[(granularidad, pago.idSocio, periodo(granularidad, pago.fechaEvento), pago.estado)]
+            incremento[0] += 1
+            incremento[1] += Decimal(str(pago.monto))
+    if not incrementos:
+        return None
+
+    # Orden fijo de llaves: transacciones concurrentes toman los locks en el mismo orden
+    valores = [
+        dict(granularidad=g, idSocio=socio, periodo=p, estado=e, cantidad=cantidad, monto=monto)
+        for (g, socio, p, e), (cantidad, monto) in sorted(incrementos.items())
+    ]
+    sentencia = _insert(dialecto)(PagoRollupORM).values(valores)
+    return sentencia.on_conflict_do_update(
+        index_elements=[PagoRollupORM.granularidad, PagoRollupORM.idSocio, PagoRollupORM.periodo, PagoRollupORM.estado],
+        set_=dict(
+            cantidad=PagoRollupORM.cantidad + sentencia.excluded.cantidad,
+            monto=PagoRollupORM.monto + sentencia.excluded.monto
+        )
+    )
+
+
+def _sentencia_transicion(dialecto: str, valores):
+    """INSERT ... ON CONFLICT (idEvento) DO UPDATE ... WHERE estado = 'solicitado' RETURNING.
+
+    ``valores`` es un dict o una lista de dicts (multi-fila) con idEvento únicos.
+    """
+    sentencia = _insert(dialecto)(PagoORM).values(valores)
+    return sentencia.on_conflict_do_update(
+        index_elements=[PagoORM.idEvento],
+        set_=dict(
+            estado=sentencia.excluded.estado,
+            fechaEvento=sentencia.excluded.fechaEvento,
+            idTransaction=func.coalesce(sentencia.excluded.idTransaction, PagoORM.idTransaction)
+        ),
+        where=PagoORM.estado == ESTADO_SOLICITADO
+    ).returning(PagoORM)
+
 
 class RepositorioPagosPG(RepoPagos):
-    def __init__(self, db_url: str):
-        self.engine = create_engine(db_url, future=True)
-        self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False, class_=Session)
-        Base.metadata.create_all(self.engine)
+    def __init__(self, sesiones: Optional[sessionmaker] = None):
+        # La fábrica de sesiones (y su engine/pool) es la del proceso; las
+        # tablas se crean una sola vez en el arranque (config.db.create_tables)
+        if sesiones is None:
+            from config.db import obtener_sesiones
+            sesiones = obtener_sesiones()
+        self.SessionLocal = sesiones
+        self.engine = sesiones.kw["bind"]
 
     def by_id(self, idPago: str) -> Optional[Pago]:
         with self.SessionLocal() as session:
@@ -59,5 +163,115 @@ class RepositorioPagosPG(RepoPagos):
                 session.add(pago_orm)
             session.commit()
 
+    def aplicar_transicion(self, idPago: str, idEvento: str, idSocio: str, monto: float, estado: str,
+                           fechaEvento, idTransaction: Optional[str],
+                           registrar: Optional[Callable] = None) -> Tuple[Optional[PagoORM], bool]:
+        """Crea el pago en su estado final o lo transiciona desde 'solicitado', en un solo statement.
+
+        INSERT ... ON CONFLICT (idEvento) DO UPDATE ... WHERE estado = 'solicitado' RETURNING:
+        - Retorna (pago, True) si este comando creó o transicionó el pago.
+        - Retorna (pago_actual, False) si el pago ya estaba en un estado final
+          (redelivery o comando concurrente); sólo en ese caso hay una segunda lectura.
+        """
+        return self.aplicar_transiciones([dict(
+            idPago=idPago,
+            idEvento=idEvento,
+            idSocio=idSocio,
+            monto=monto,
+            estado=estado,
+            fechaEvento=fechaEvento,
+            idTransaction=idTransaction
+        )], registrar)[0]
+
+    def aplicar_transiciones(self, transiciones: List[dict],
+                             registrar: Optional[Callable] = None) -> List[Tuple[Optional[PagoORM], bool]]:
+        """Versión por lote de aplicar_transicion, en una sola transacción.
+
+        Un upsert multi-fila para todo el lote y una sola lectura (idEvento IN ...)
+        de los pagos que no transicionaron. Si un idEvento se repite en el lote,
+        sólo la primera aparición puede transicionar. Retorna un resultado por
+        transición, en el mismo orden.
+
+        ``registrar`` recibe esos resultados antes del commit y retorna las
+        sentencias que deben quedar en la misma transacción (p.ej. el resultado
+        del comando en resultados_comandos).
+        """
+        unicas = dict()
+        for transicion in transiciones:
+            unicas.setdefault(transicion["idEvento"], transicion)
+
+        with self.SessionLocal() as session:
+            sentencia = _sentencia_transicion(self.engine.dialect.name, list(unicas.values()))
+            transicionados = {
+                pago.idEvento: pago
+                for pago in session.scalars(sentencia, execution_options={"populate_existing": True})
+            }
+            rollup = _sentencia_rollup(self.engine.dialect.name, transicionados.values())
+            if rollup is not None:
+                session.execute(rollup)
+            faltantes = [idEvento for idEvento in unicas if idEvento not in transicionados]
+            actuales = dict()
+            if faltantes:
+                actuales = {
+                    pago.idEvento: pago
+                    for pago in session.scalars(select(PagoORM).where(PagoORM.idEvento.in_(faltantes)))
+                }
+
+            resultados, entregados = [], set()
+            for transicion in transiciones:
+                idEvento = transicion["idEvento"]
+                if idEvento in transicionados and idEvento not in entregados:
+                    entregados.add(idEvento)
+                    resultados.append((transicionados[idEvento], True))
+                else:
+                    resultados.append((transicionados.get(idEvento) or actuales.get(idEvento), False))
+            for sentencia in (registrar(resultados) if registrar else []):
+                session.execute(sentencia)
+            session.commit()
+        return resultados
+
     def init_db(self):
         Base.metadata.create_all(self.engine)
+
+
+class RepositorioPagosPGAsync:
+    """Versión async (asyncpg) de las operaciones que usan los endpoints HTTP."""
+
+    def __init__(self, sesiones=None):
+        if sesiones is None:
+            from config.db import obtener_sesiones_async
+            sesiones = obtener_sesiones_async()
+        self.SessionLocal = sesiones
+        self.engine = sesiones.kw["bind"]
+
+    async def obtener(self, idPago: str) -> Optional[PagoORM]:
+        async with self.SessionLocal() as session:
+            return await session.get(PagoORM, idPago)
+
+    async def aplicar_transicion(self, idPago: str, idEvento: str, idSocio: str, monto: float, estado: str,
+                                 fechaEvento, idTransaction: Optional[str],
+                                 registrar: Optional[Callable] = None) -> Tuple[Optional[PagoORM], bool]:
+        """Ver RepositorioPagosPG.aplicar_transicion."""
+        valores = dict(
+            idPago=idPago,
+            idEvento=idEvento,
+            idSocio=idSocio,
+            monto=monto,
+            estado=estado,
+            fechaEvento=fechaEvento,
+            idTransaction=idTransaction
+        )
+        async with self.SessionLocal() as session:
+            sentencia = _sentencia_transicion(self.engine.dialect.name, valores)
+            pago = (await session.scalars(sentencia, execution_options={"populate_existing": True})).first()
+            rollup = _sentencia_rollup(self.engine.dialect.name, [pago] if pago is not None else [])
+            if rollup is not None:
+                await session.execute(rollup)
+            if pago is not None:
+                resultado = (pago, True)
+            else:
+                resultado = ((await session.execute(select(PagoORM).filter_by(idEvento=idEvento))).scalars().first(), False)
+            for sentencia in (registrar([resultado]) if registrar else []):
+                await session.execute(sentencia)
+            await session.commit()
+            return resultado
@@ -0,0 +1,114 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import Date, cast, delete, func, insert, literal, literal_column, select
+from sqlalchemy.orm import sessionmaker
+from .repositorio_postgresql import (
+    PagoORM, PagoRollupORM, ESTADOS_FINALES, GRANULARIDADES, periodo
+)
+
+
+def _sentencia_reporte(idSocio: Optional[str], desde: date, hasta: date, granularidad: str):
+    filtros = [
+        PagoRollupORM.granularidad == granularidad,
+        PagoRollupORM.periodo.between(periodo(granularidad, desde), hasta)
+    ]
+    if idSocio:
+        return (
+            select(PagoRollupORM.periodo, PagoRollupORM.estado, PagoRollupORM.cantidad, PagoRollupORM.monto)
+            .where(PagoRollupORM.idSocio == idSocio, *filtros)
+            .order_by(PagoRollupORM.periodo, PagoRollupORM.estado)
+        )
+    # Todos los socios: suma de las filas por socio
+    return (
+        select(PagoRollupORM.periodo, PagoRollupORM.estado,
+               func.sum(PagoRollupORM.cantidad).label("cantidad"), func.sum(PagoRollupORM.monto).label("monto"))
+        .where(*filtros)
+        .group_by(PagoRollupORM.periodo, PagoRollupORM.estado)
+        .order_by(PagoRollupORM.periodo, PagoRollupORM.estado)
+    )
+
+
+def _truncar(dialecto: str, granularidad: str, columna):
+    """Periodo (en UTC) de una fecha, igual que ``periodo`` pero en SQL."""
+    if dialecto == "postgresql":
+        # Literales en línea: con parámetros el GROUP BY no reconoce la misma expresión del SELECT
+        unidad = literal_column("'day'" if granularidad == "dia" else "'month'")
+        return cast(func.date_trunc(unidad, func.timezone(literal_column("'UTC'"), columna)), Date)
+    if granularidad == "dia":
+        return func.date(columna)
+    return func.date(columna, "start of month")
+
+
+def _inicio_utc(fecha: date) -> datetime:
+    return datetime.combine(fecha, time.min, tzinfo=timezone.utc)
+
+
+def _siguiente_mes(fecha: date) -> date:
+    return (fecha.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class RepositorioReportesPG:
+    """Reportes de pagos servidos desde pagos_rollup."""
+
+    def __init__(self, sesiones: Optional[sessionmaker] = None):
+        if sesiones is None:
+            from config.db import obtener_sesiones
+            sesiones = obtener_sesiones()
+        self.SessionLocal = sesiones
+        self.engine = sesiones.kw["bind"]
+
+    def consultar(self, idSocio: Optional[str], desde: date, hasta: date, granularidad: str) -> List:
+        with self.SessionLocal() as session:
+            return session.execute(_sentencia_reporte(idSocio, desde, hasta, granularidad)).all()
+
+    def reconstruir(self, desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+        """Recalcula pagos_rollup desde la tabla pagos (backfill), en una transacción.
+
+        El rango se extiende a meses completos para que los totales mensuales
+        queden consistentes. Retorna las filas de rollup escritas.
+
+        No es seguro con consumidores activos: una transición que se confirma
+        entre el DELETE y el INSERT ... SELECT se pierde o se cuenta dos veces.
+        """
+        dialecto = self.engine.dialect.name
+        filtros_rollup, filtros_pagos = [], [PagoORM.estado.in_(ESTADOS_FINALES)]
+        if desde:
+            desde = desde.replace(day=1)
+            filtros_rollup.append(PagoRollupORM.periodo >= desde)
+            filtros_pagos.append(PagoORM.fechaEvento >= _inicio_utc(desde))
+        if hasta:
+            hasta = _siguiente_mes(hasta)
+            filtros_rollup.append(PagoRollupORM.periodo < hasta)
+            filtros_pagos.append(PagoORM.fechaEvento < _inicio_utc(hasta))
+
+        escritas = 0
+        with self.SessionLocal() as session:
+            session.execute(delete(PagoRollupORM).where(*filtros_rollup))
+            for granularidad in GRANULARIDADES:
+                periodo_sql = _truncar(dialecto, granularidad, PagoORM.fechaEvento)
+                origen = (
+                    select(literal(granularidad), PagoORM.idSocio, periodo_sql, PagoORM.estado,
+                           func.count(), func.sum(PagoORM.monto))
+                    .where(*filtros_pagos)
+                    .group_by(periodo_sql, PagoORM.estado, PagoORM.idSocio)
+                )
+                resultado = session.execute(insert(PagoRollupORM).from_select(
+                    ["granularidad", "idSocio", "periodo", "estado", "cantidad", "monto"], origen
+                ))
+                escritas += max(resultado.rowcount, 0)
+            session.commit()
+        return escritas
+
+
+class RepositorioReportesPGAsync:
+    """Versión async (asyncpg) de la consulta de reportes, para el endpoint HTTP."""
+
+    def __init__(self, sesiones=None):
+        if sesiones is None:
+            from config.db import obtener_sesiones_async
+            sesiones = obtener_sesiones_async()
+        self.SessionLocal = sesiones
+
+    async def consultar(self, idSocio: Optional[str], desde: date, hasta: date, granularidad: str) -> List:
+        async with self.SessionLocal() as session:
+            return (await session.execute(_sentencia_reporte(idSocio, desde, hasta, granularidad))).all()
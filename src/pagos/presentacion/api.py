@@ -1,8 +1,16 @@
-from fastapi import APIRouter, status, HTTPException
-from seedworks.aplicacion.comandos import ejecutar_commando
-from seedworks.aplicacion.queries import ejecutar_query
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, status, HTTPException, Request, Response
+from pydantic import ValidationError
+from seedworks.aplicacion.comandos import ejecutar_commando_async
+from seedworks.aplicacion.queries import ejecutar_query_async
 from modulos.aplicacion.comandos.pago_command import PagoCommand
 from modulos.aplicacion.queries.obtener_estado_pago import ObtenerEstadoPagoQuery
+from modulos.aplicacion.queries.reporte_pagos import ReportePagosQuery
+from modulos.aplicacion.queries.obtener_estado_pago_handler import etag_estado
+from config.db import metricas_pool
+from config.cache import cache_estado_pagos
+from config.publicador import publicador_pagos
 
 router = APIRouter()
 
@@ -11,8 +19,24 @@ router = APIRouter()
 def health_check():
     return {"status": "ok", "service": "pagos"}
 
+@router.get("/metricas/db")
+def metricas_db():
+    """Métricas del pool de conexiones del proceso"""
+    return metricas_pool()
+
+@router.get("/metricas/publicador")
+def metricas_publicador():
+    """Métricas del publicador de eventos-pago"""
+    publicador = publicador_pagos()
+    return {**publicador.metricas, "en_vuelo": publicador.en_vuelo}
+
+@router.get("/metricas/cache")
+def metricas_cache():
+    """Aciertos/fallos del caché de estado de pagos"""
+    return {**cache_estado_pagos.metricas, "entradas": len(cache_estado_pagos)}
+
 @router.post("/pagos", status_code=status.HTTP_202_ACCEPTED)
-def procesar_pago_command(cmd: PagoCommand):
+async def procesar_pago_command(cmd: PagoCommand):
     """
     Endpoint unificado para PagoCommand según especificación.
     Maneja comandos "Iniciar" y "Cancelar".
@@ -20,13 +44,26 @@ def procesar_pago_command(cmd: PagoCommand):
     print(f"📥 API recibió PagoCommand: {cmd.comando} para evento {cmd.data.idEvento}")
     
     # ✅ Delegación total al sistema CQRS
-    pago = ejecutar_commando(cmd)
+    pago = await ejecutar_commando_async(cmd)
     
     # Response HTTP 202 Accepted según especificación
     return {"message": f"Comando {cmd.comando} procesado exitosamente"}
 
+@router.get("/pagos/reportes")
+async def reporte_pagos(desde: date, hasta: date, idSocio: str = None, granularidad: Literal["dia", "mes"] = "dia"):
+    """
+    Totales de pagos por periodo (día o mes) y estado, servidos desde pagos_rollup.
+    Sin idSocio retorna los totales de todos los socios.
+    """
+    try:
+        query = ReportePagosQuery(idSocio=idSocio, desde=desde, hasta=hasta, granularidad=granularidad)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    resultado = await ejecutar_query_async(query)
+    return resultado.resultado
+
 @router.get("/pagos/{idPago}")
-def obtener_estado_pago(idPago: str, idTransaction: str = None):
+async def obtener_estado_pago(idPago: str, request: Request, response: Response, idTransaction: str = None):
     """
     Endpoint para ObtenerEstadoPagoQuery según especificación.
     Response con estructura específica requerida.
@@ -35,10 +72,18 @@ def obtener_estado_pago(idPago: str, idTransaction: str = None):
     
     # ✅ Delegación total al sistema de queries  
     query = ObtenerEstadoPagoQuery(idPago=idPago, idTransaction=idTransaction)
-    resultado = ejecutar_query(query)
+    resultado = await ejecutar_query_async(query)
     
     if not resultado.resultado:
         raise HTTPException(status_code=404, detail="Pago no encontrado")
-    
+
+    # GET condicional: si el estado no cambió desde el último poll, 304 sin cuerpo.
+    # Si la transición la hizo otro proceso, el estado puede venir del caché hasta
+    # ESTADO_CACHE_TTL_SEGUNDOS atrasado (config/cache.py)
+    etag = etag_estado(resultado.resultado)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     # Response según especificación exacta
     return resultado.resultado
@@ -0,0 +1,41 @@
+"""Backfill de los rollups de reportes de pagos
+
+    python -m pagos.reportes [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+
+Recalcula pagos_rollup desde la tabla pagos (por defecto, todo el historial).
+Los rollups se mantienen solos en cada transición; este comando sólo hace
+falta para cargar pagos anteriores a los rollups o corregir diferencias.
+
+Debe correr con los consumidores de comando-pago y la API detenidos: la
+reconstrucción borra el rango (DELETE) y lo vuelve a sumar desde pagos
+(INSERT ... SELECT), y una transición que se confirma entre los dos pasos
+se pierde o queda contada dos veces.
+
+"""
+
+import os
+import sys
+import argparse
+from datetime import date
+
+# Los módulos del servicio se importan desde la raíz de pagos, igual que en main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstruye pagos_rollup desde la tabla pagos")
+    parser.add_argument("--desde", type=date.fromisoformat, default=None)
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None)
+    args = parser.parse_args(argv)
+
+    from config.db import create_tables, init_db
+    from modulos.infraestructura.repositorio_reportes import RepositorioReportesPG
+
+    init_db()
+    create_tables()
+    escritas = RepositorioReportesPG().reconstruir(args.desde, args.hasta)
+    print(f"✅ pagos_rollup reconstruido: {escritas} filas (desde={args.desde}, hasta={args.hasta})")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,4 +22,20 @@ class PagoProcesado(Record):
         idSocio = String()
         monto = Float()
         estado = String()
-        fechaEvento = String()
\ No newline at end of file
+        fechaEvento = String()
+
+
+class ReferidoCommandPayload(Record):
+    """Mismo nombre que el record anidado que publica referidos: Avro exige que coincida."""
+    tipoEvento = String()
+    idEvento = String()
+    idReferido = String()
+    idSocio = String()
+    monto = Float()
+    fechaEvento = String()
+    estadoEvento = String()
+
+class ReferidoProcesado(Record):
+    """Evento que publica referidos en eventos-referido (coreografía)."""
+    idTransaction = String(required=False)
+    data = ReferidoCommandPayload()
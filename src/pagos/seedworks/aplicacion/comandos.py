@@ -11,4 +11,8 @@ class ComandoHandler(ABC):
 
 @singledispatch
 def ejecutar_commando(comando):
-    raise NotImplementedError(f'No existe implementación para el comando de tipo {type(comando).__name__}')
\ No newline at end of file
+    raise NotImplementedError(f'No existe implementación para el comando de tipo {type(comando).__name__}')
+
+@singledispatch
+async def ejecutar_commando_async(comando):
+    raise NotImplementedError(f'No existe implementación async para el comando de tipo {type(comando).__name__}')
@@ -17,4 +17,8 @@ class QueryHandler(ABC):
 
 @singledispatch
 def ejecutar_query(query):
-    raise NotImplementedError(f'No existe implementación para el query de tipo {type(query).__name__}')
\ No newline at end of file
+    raise NotImplementedError(f'No existe implementación para el query de tipo {type(query).__name__}')
+
+@singledispatch
+async def ejecutar_query_async(query):
+    raise NotImplementedError(f'No existe implementación async para el query de tipo {type(query).__name__}')
@@ -0,0 +1,78 @@
+"""Cachés LRU en memoria del seedwork
+
+En este archivo usted encontrará el LRU acotado y thread-safe que usan la
+idempotencia y los resultados de comandos, y su variante con expiración para
+respuestas de queries consultadas repetidamente (polling). En esta última
+cada entrada vence a los ``ttl_segundos``, lo que acota lo desactualizado que
+puede estar frente a escrituras hechas por otros procesos; las escrituras del
+propio proceso invalidan la entrada explícitamente.
+
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    def __init__(self, capacidad: int = 10_000):
+        self._capacidad = capacidad
+        self._datos: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, llave, por_defecto=None):
+        with self._lock:
+            if llave not in self._datos:
+                return por_defecto
+            self._datos.move_to_end(llave)
+            return self._datos[llave]
+
+    def guardar(self, llave, valor=True):
+        with self._lock:
+            self._datos[llave] = valor
+            self._datos.move_to_end(llave)
+            if len(self._datos) > self._capacidad:
+                self._datos.popitem(last=False)
+
+    def eliminar(self, llave):
+        with self._lock:
+            self._datos.pop(llave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __contains__(self, llave) -> bool:
+        with self._lock:
+            return llave in self._datos
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+
+class CacheLRUTTL(CacheLRU):
+
+    def __init__(self, capacidad: int = 10_000, ttl_segundos: float = 5.0):
+        super().__init__(capacidad)
+        self.ttl_segundos = ttl_segundos
+        self.metricas = {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0}
+
+    def obtener(self, llave, por_defecto=None):
+        entrada = super().obtener(llave)
+        if entrada is None:
+            self.metricas['fallos'] += 1
+            return por_defecto
+        valor, expira = entrada
+        if time.monotonic() >= expira:
+            super().eliminar(llave)
+            self.metricas['fallos'] += 1
+            return por_defecto
+        self.metricas['aciertos'] += 1
+        return valor
+
+    def guardar(self, llave, valor=True):
+        super().guardar(llave, (valor, time.monotonic() + self.ttl_segundos))
+
+    def eliminar(self, llave):
+        self.metricas['invalidaciones'] += 1
+        super().eliminar(llave)
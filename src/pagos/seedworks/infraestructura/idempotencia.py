@@ -0,0 +1,154 @@
+"""Idempotencia del lado del consumidor
+
+En este archivo usted encontrará el almacén que evita re-ejecutar mensajes
+redespachados por Pulsar (redeliveries, redeploys o suscripciones nuevas que
+arrancan con InitialPosition.Earliest).
+
+La llave de un mensaje es (suscripción, idTransaction + paso) cuando el mensaje
+trae una transacción de negocio, o (suscripción, messageId) en caso contrario.
+
+Orden de consulta:
+1. LRU en memoria con las llaves procesadas recientemente. Al arrancar se
+   calienta con las llaves más recientes de la tabla, que son las que un
+   redespacho tiene más probabilidad de repetir.
+2. Tabla de mensajes procesados (repositorio concreto de cada servicio). Un
+   "no está" del LRU siempre se confirma aquí: con suscripciones Shared el
+   mensaje pudo procesarlo otra réplica.
+
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any
+
+from seedworks.infraestructura.cache import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+
+def llave_mensaje(suscripcion: str, mensaje=None, id_transaction: str = None, paso: str = None) -> str:
+    if id_transaction and paso:
+        return f'{suscripcion}|{id_transaction}|{paso}'
+    return f'{suscripcion}|{mensaje.message_id()}'
+
+
+class RepositorioMensajesProcesados(ABC):
+
+    @abstractmethod
+    def existe(self, llave: str) -> bool:
+        ...
+
+    @abstractmethod
+    def registrar(self, llave: str, suscripcion: str) -> bool:
+        """Registra la llave. Retorna False si ya estaba registrada."""
+        ...
+
+    @abstractmethod
+    def llaves(self, limite: int) -> list[str]:
+        """Las ``limite`` llaves más recientes, de la más nueva a la más antigua."""
+        ...
+
+
+class AlmacenConLRU(ABC):
+    """LRU en memoria delante del repositorio de un almacén.
+
+    ``calentar`` lo carga al arrancar con las entradas más recientes del
+    repositorio, que son las que un redespacho tiene más probabilidad de repetir.
+    """
+
+    def __init__(self, repositorio, capacidad_lru: int = 10_000):
+        self._repositorio = repositorio
+        self._capacidad_lru = capacidad_lru
+        self._lru = CacheLRU(capacidad_lru)
+
+    @abstractmethod
+    def _recientes(self, limite: int) -> list[tuple[str, Any]]:
+        """Pares (llave, valor) de la más nueva a la más antigua."""
+        ...
+
+    def calentar(self):
+        recientes = self._recientes(self._capacidad_lru)
+        # De la más antigua a la más nueva: la más reciente es la última en salir del LRU
+        for llave, valor in reversed(recientes):
+            self._lru.guardar(llave, valor)
+        logger.info(f'{self.__class__.__name__}: {len(recientes)} entradas recientes cargadas en el LRU')
+
+
+class AlmacenIdempotencia(AlmacenConLRU):
+
+    def _recientes(self, limite):
+        return [(llave, True) for llave in self._repositorio.llaves(limite)]
+
+    def ya_procesado(self, llave: str) -> bool:
+        if llave in self._lru:
+            return True
+        if self._repositorio.existe(llave):
+            self._lru.guardar(llave)
+            return True
+        return False
+
+    def marcar_procesado(self, llave: str, suscripcion: str) -> bool:
+        nuevo = self._repositorio.registrar(llave, suscripcion)
+        self._lru.guardar(llave)
+        return nuevo
+
+
+def llave_comando(id_transaction: str, comando: str) -> str:
+    return f'{id_transaction}|{comando}'
+
+
+class RepositorioResultadosComandos(ABC):
+
+    @abstractmethod
+    def obtener(self, llaves: list[str]) -> dict[str, dict]:
+        """Resultados guardados para las llaves que existan (una sola consulta)."""
+        ...
+
+    @abstractmethod
+    def sentencia_guardar(self, resultados: dict[str, dict]):
+        """Sentencia que guarda los resultados (si la llave ya existe se conserva
+        el primero), para ejecutarla en la transacción del comando."""
+        ...
+
+    @abstractmethod
+    def recientes(self, limite: int) -> list[tuple[str, dict]]:
+        """Los ``limite`` resultados más recientes, del más nuevo al más antiguo."""
+        ...
+
+
+class AlmacenResultadosComandos(AlmacenConLRU):
+    """Resultado de cada comando por (idTransaction, comando), para reproducirlo ante reintentos.
+
+    Mismo orden de consulta que AlmacenIdempotencia: LRU con los resultados
+    recientes y la tabla de resultados del servicio. El resultado se escribe
+    en la misma transacción que aplica el comando (``sentencia_guardar``) y
+    pasa al LRU sólo después del commit (``recordar``).
+    """
+
+    def _recientes(self, limite):
+        return self._repositorio.recientes(limite)
+
+    def en_memoria(self, llave: str):
+        """Resultado sin tocar la base de datos: del LRU, o None."""
+        return self._lru.obtener(llave)
+
+    def obtener(self, llaves: list[str]) -> dict[str, dict]:
+        encontrados, consultar = dict(), []
+        for llave in llaves:
+            resultado = self._lru.obtener(llave)
+            if resultado is not None:
+                encontrados[llave] = resultado
+            else:
+                consultar.append(llave)
+        if consultar:
+            for llave, resultado in self._repositorio.obtener(consultar).items():
+                self._lru.guardar(llave, resultado)
+                encontrados[llave] = resultado
+        return encontrados
+
+    def sentencia_guardar(self, resultados: dict[str, dict]):
+        return self._repositorio.sentencia_guardar(resultados)
+
+    def recordar(self, resultados: dict[str, dict]):
+        for llave, resultado in resultados.items():
+            self._lru.guardar(llave, resultado)
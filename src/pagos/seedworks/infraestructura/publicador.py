@@ -0,0 +1,205 @@
+"""Publicador asíncrono del seedwork
+
+En este archivo usted encontrará el publicador de larga vida que comparten los
+handlers de un proceso: un solo cliente/producer de Pulsar, envíos con
+``send_async`` + callback y batching del lado del producer.
+
+El handler nunca espera al broker:
+- Si hay cupo, el mensaje queda en vuelo y el callback confirma o falla.
+- Si se alcanzó el máximo de mensajes en vuelo o el producer no está
+  disponible, el mensaje se desborda a un almacén persistente (outbox del
+  servicio) desde el hilo del handler.
+- El callback corre en un hilo del cliente de Pulsar y no toca la base de
+  datos: los envíos fallidos y los reenvíos confirmados quedan en colas en
+  memoria.
+- Un hilo de reenvío pasa los fallidos al almacén, marca los confirmados y
+  reenvía periódicamente lo desbordado; cada fila se confirma sólo cuando el
+  broker la acepta.
+
+"""
+
+import time
+import queue
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional
+
+from pulsar import Result
+
+logger = logging.getLogger(__name__)
+
+
+class AlmacenDesborde(ABC):
+
+    @abstractmethod
+    def guardar(self, record, llave: Optional[str]):
+        ...
+
+    @abstractmethod
+    def pendientes(self, limite: int) -> list[tuple[Any, Any, Optional[str]]]:
+        """Retorna tuplas (id, record, llave) en orden de llegada."""
+        ...
+
+    @abstractmethod
+    def confirmar(self, id_desborde):
+        ...
+
+
+class PublicadorAsincrono:
+
+    def __init__(self, crear_producer: Callable, desborde: AlmacenDesborde, max_pendientes: int = 1000,
+                 intervalo_reenvio_segundos: float = 5.0, lote_reenvio: int = 100):
+        self._crear_producer = crear_producer
+        self._desborde = desborde
+        self.max_pendientes = max_pendientes
+        self._intervalo_reenvio = intervalo_reenvio_segundos
+        self._lote_reenvio = lote_reenvio
+        self._producer = None
+        self._en_vuelo = 0
+        self._reenviando = set()
+        self._fallidos = queue.SimpleQueue()  # (record, llave) por desbordar
+        self._confirmados = queue.SimpleQueue()  # ids del desborde aceptados por el broker
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self.metricas = {'enviados': 0, 'fallidos': 0, 'desbordados': 0, 'reenviados': 0}
+
+    @property
+    def en_vuelo(self) -> int:
+        return self._en_vuelo
+
+    def _contar(self, metrica: str):
+        with self._lock:
+            self.metricas[metrica] += 1
+
+    def _conectar(self) -> bool:
+        if self._producer is not None:
+            return True
+        try:
+            self._producer = self._crear_producer()
+            return True
+        except Exception as e:
+            logger.warning(f'Producer no disponible, se usa el desborde: {e}')
+            return False
+
+    def iniciar(self):
+        self._conectar()
+        threading.Thread(target=self._ciclo_reenvio, daemon=True, name='reenvio-desborde').start()
+
+    def publicar(self, record, llave: Optional[str] = None) -> bool:
+        """Encola el record sin bloquear. Retorna False si terminó en el desborde."""
+        if self._enviar(record, llave):
+            return True
+        self._desbordar(record, llave)
+        return False
+
+    def _enviar(self, record, llave: Optional[str], al_confirmar: Callable = None, al_fallar: Callable = None) -> bool:
+        with self._lock:
+            if self._producer is None or self._en_vuelo >= self.max_pendientes:
+                return False
+            self._en_vuelo += 1
+
+        def callback(resultado, _id_mensaje):
+            with self._lock:
+                self._en_vuelo -= 1
+                self.metricas['enviados' if resultado == Result.Ok else 'fallidos'] += 1
+            if resultado == Result.Ok:
+                if al_confirmar:
+                    al_confirmar()
+            else:
+                logger.warning(f'Envío fallido ({resultado}) para llave={llave}')
+                (al_fallar or (lambda: self._fallidos.put((record, llave))))()
+
+        try:
+            opciones = {'partition_key': llave} if llave else {}
+            self._producer.send_async(record, callback, **opciones)
+            return True
+        except Exception as e:
+            with self._lock:
+                self._en_vuelo -= 1
+            logger.warning(f'send_async rechazado para llave={llave}: {e}')
+            return False
+
+    def _desbordar(self, record, llave: Optional[str]) -> bool:
+        try:
+            self._desborde.guardar(record, llave)
+            self._contar('desbordados')
+            return True
+        except Exception as e:
+            logger.error(f'No se pudo guardar en el desborde llave={llave}: {e}')
+            return False
+
+    def _desbordar_fallidos(self):
+        while True:
+            try:
+                record, llave = self._fallidos.get_nowait()
+            except queue.Empty:
+                return
+            if not self._desbordar(record, llave):
+                self._fallidos.put((record, llave))
+                return
+
+    def _confirmar_reenviados(self):
+        while True:
+            try:
+                id_desborde = self._confirmados.get_nowait()
+            except queue.Empty:
+                return
+            self._desborde.confirmar(id_desborde)
+            self._contar('reenviados')
+            self._liberar(id_desborde)
+
+    def _liberar(self, id_desborde):
+        with self._lock:
+            self._reenviando.discard(id_desborde)
+
+    def reenviar_desborde(self) -> int:
+        """Un ciclo del hilo de reenvío: desborda los fallidos, confirma y reenvía."""
+        self._desbordar_fallidos()
+        self._confirmar_reenviados()
+        if not self._conectar():
+            return 0
+        reenviados = 0
+        for id_desborde, record, llave in self._desborde.pendientes(self._lote_reenvio):
+            with self._lock:
+                if id_desborde in self._reenviando:
+                    continue
+                self._reenviando.add(id_desborde)
+
+            if not self._enviar(record, llave,
+                                al_confirmar=lambda id_desborde=id_desborde: self._confirmados.put(id_desborde),
+                                al_fallar=lambda id_desborde=id_desborde: self._liberar(id_desborde)):
+                self._liberar(id_desborde)
+                break
+            reenviados += 1
+        return reenviados
+
+    def _ciclo_reenvio(self):
+        while not self._detener.wait(self._intervalo_reenvio):
+            try:
+                self.reenviar_desborde()
+            except Exception as e:
+                logger.error(f'Error reenviando desborde: {e}')
+
+    def flush(self):
+        """Despacha el batch abierto del producer; bloquea hasta que el broker responda."""
+        if self._producer is None:
+            return
+        try:
+            self._producer.flush()
+        except Exception as e:
+            logger.warning(f'Error en flush del producer: {e}')
+
+    def cerrar(self, timeout_segundos: float = 5.0):
+        self._detener.set()
+        if self._producer is None:
+            return
+        limite = time.monotonic() + timeout_segundos
+        self.flush()
+        while self._en_vuelo and time.monotonic() < limite:
+            time.sleep(0.05)
+        self._producer.close()
+        self._producer = None
+        # Lo que falló hasta el cierre queda en el desborde para el próximo arranque
+        self._desbordar_fallidos()
+        self._confirmar_reenviados()
@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timezone
+from sqlalchemy.orm import sessionmaker
+from config import db
+from config.cache import cache_estado_pagos
+from modulos.infraestructura.repositorio_postgresql import Base, PagoORM, RepositorioPagosPG
+from modulos.aplicacion.queries.obtener_estado_pago import ObtenerEstadoPagoQuery
+from modulos.aplicacion.queries.obtener_estado_pago_handler import ObtenerEstadoPagoHandler, etag_estado
+from seedworks.infraestructura.cache import CacheLRUTTL
+
+
+def test_cache_expira_por_ttl():
+    cache = CacheLRUTTL(capacidad=10, ttl_segundos=0.01)
+    cache.guardar("p-1", {"estadoPago": "completado"})
+    assert cache.obtener("p-1") == {"estadoPago": "completado"}
+    time.sleep(0.02)
+    assert cache.obtener("p-1") is None
+
+
+def test_query_lee_del_cache_hasta_invalidar():
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    repo = RepositorioPagosPG(sessionmaker(bind=engine, expire_on_commit=False))
+    with repo.SessionLocal() as session:
+        session.add(PagoORM(idPago="p-cache", idEvento="e-cache", idSocio="s-1", monto=100, estado="solicitado",
+                            fechaEvento=datetime.now(timezone.utc)))
+        session.commit()
+
+    handler = ObtenerEstadoPagoHandler(repo)
+    primero = handler.handle(ObtenerEstadoPagoQuery(idPago="p-cache")).resultado
+    with repo.SessionLocal() as session:
+        session.query(PagoORM).filter_by(idPago="p-cache").update({"estado": "completado"})
+        session.commit()
+
+    assert handler.handle(ObtenerEstadoPagoQuery(idPago="p-cache")).resultado["estadoPago"] == "solicitado"
+    cache_estado_pagos.eliminar("p-cache")
+    segundo = handler.handle(ObtenerEstadoPagoQuery(idPago="p-cache")).resultado
+    assert segundo["estadoPago"] == "completado"
+    assert etag_estado(primero) != etag_estado(segundo)
+
+
+def test_transicion_en_otro_proceso_se_ve_a_lo_sumo_tras_el_ttl(monkeypatch):
+    # Un worker transiciona el pago sin desalojar el caché de la API: el TTL es la cota
+    monkeypatch.setattr(cache_estado_pagos, "ttl_segundos", 0.05)
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    repo = RepositorioPagosPG(sessionmaker(bind=engine, expire_on_commit=False))
+    with repo.SessionLocal() as session:
+        session.add(PagoORM(idPago="p-ttl", idEvento="e-ttl", idSocio="s-1", monto=100, estado="solicitado",
+                            fechaEvento=datetime.now(timezone.utc)))
+        session.commit()
+
+    handler = ObtenerEstadoPagoHandler(repo)
+    antes = handler.handle(ObtenerEstadoPagoQuery(idPago="p-ttl")).resultado
+    with repo.SessionLocal() as session:
+        session.query(PagoORM).filter_by(idPago="p-ttl").update({"estado": "completado"})
+        session.commit()
+
+    # Mismo ETag que el poll anterior: la API respondería 304 con el estado previo
+    assert etag_estado(handler.handle(ObtenerEstadoPagoQuery(idPago="p-ttl")).resultado) == etag_estado(antes)
+    time.sleep(0.06)
+    assert handler.handle(ObtenerEstadoPagoQuery(idPago="p-ttl")).resultado["estadoPago"] == "completado"
@@ -0,0 +1,49 @@
+import copy
+from pulsar.schema import AvroSchema
+from schema.eventos_pagos import PagoProcesado
+from seedworks.infraestructura.esquemas import esquema_avro
+
+
+def _evento():
+    return PagoProcesado(idTransaction="txn-1", idPago="p-1", idEvento="e-1", idSocio="s-1",
+                         monto=120.5, fechaEvento="2025-09-09T20:00:00Z", estado="completado")
+
+
+def test_esquema_se_compila_una_vez_por_clase():
+    assert esquema_avro(PagoProcesado) is esquema_avro(PagoProcesado)
+
+
+def test_codifica_igual_que_avro_schema():
+    assert esquema_avro(PagoProcesado).encode(_evento()) == AvroSchema(PagoProcesado).encode(_evento())
+
+
+def test_decodifica_con_esquema_de_escritura_del_broker():
+    esquema = esquema_avro(PagoProcesado)
+    datos = esquema.encode(_evento())
+    escritor = copy.deepcopy(esquema._schema)
+    for _ in range(2):
+        evento = esquema._decode_bytes(datos, escritor)
+        assert evento.idPago == "p-1" and evento.monto == 120.5
+
+
+def test_decodifica_referido_procesado_publicado_por_referidos():
+    import io
+    import fastavro
+    from schema.eventos_pagos import ReferidoProcesado
+    # Esquema con que referidos publica en eventos-referido (con los campos de Mensaje)
+    escritor = {'type': 'record', 'name': 'ReferidoProcesado', 'fields': [
+        {'name': 'id', 'type': ['null', 'string']},
+        {'name': 'idTransaction', 'type': ['null', 'string']},
+        {'name': 'data', 'type': ['null', {'type': 'record', 'name': 'ReferidoCommandPayload', 'fields': [
+            {'name': campo, 'type': ['null', 'float' if campo == 'monto' else 'string']}
+            for campo in ('tipoEvento', 'idEvento', 'idReferido', 'idSocio', 'monto', 'fechaEvento', 'estadoEvento')
+        ]}]},
+    ]}
+    buffer = io.BytesIO()
+    fastavro.schemaless_writer(buffer, fastavro.parse_schema(copy.deepcopy(escritor)), {
+        'id': 'm-1', 'idTransaction': None,
+        'data': dict(tipoEvento='venta_creada', idEvento='e-1', idReferido='r-1', idSocio='s-1', monto=10.0,
+                     fechaEvento='2025-09-09T20:00:00Z', estadoEvento='pendiente')
+    })
+    evento = esquema_avro(ReferidoProcesado)._decode_bytes(buffer.getvalue(), escritor)
+    assert evento.idTransaction is None and evento.data.idEvento == 'e-1' and evento.data.monto == 10.0
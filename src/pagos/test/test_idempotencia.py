@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from config.db import Base
+from config.idempotencia import RepositorioMensajesProcesadosPG
+from seedworks.infraestructura.cache import CacheLRU
+from seedworks.infraestructura.idempotencia import AlmacenIdempotencia, llave_mensaje
+
+
+@pytest.fixture
+def repo():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return RepositorioMensajesProcesadosPG(engine)
+
+
+def test_llave_por_transaccion_y_paso():
+    assert llave_mensaje("pagos-comando-sub", None, "txn-1", "Iniciar") == "pagos-comando-sub|txn-1|Iniciar"
+
+
+def test_llave_por_message_id_sin_transaccion():
+    mensaje = MagicMock()
+    mensaje.message_id.return_value = "(1,2,-1,-1)"
+    assert llave_mensaje("pagos-comando-sub", mensaje) == "pagos-comando-sub|(1,2,-1,-1)"
+
+
+def test_lru_descarta_el_menos_usado():
+    cache = CacheLRU(capacidad=2)
+    cache.guardar("a")
+    cache.guardar("b")
+    cache.obtener("a")
+    cache.guardar("c")
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+
+def test_registrar_dos_veces_retorna_false(repo):
+    assert repo.registrar("s|txn|Iniciar", "s") is True
+    assert repo.registrar("s|txn|Iniciar", "s") is False
+
+
+def test_replay_se_resuelve_en_memoria(repo):
+    almacen = AlmacenIdempotencia(repo)
+    almacen.calentar()
+    assert almacen.ya_procesado("s|txn|Iniciar") is False
+    almacen.marcar_procesado("s|txn|Iniciar", "s")
+
+    repo.existe = MagicMock(side_effect=AssertionError("no debe consultar la BD"))
+    assert almacen.ya_procesado("s|txn|Iniciar") is True
+
+
+def test_calentar_carga_en_el_lru_las_llaves_mas_recientes(repo):
+    almacen = AlmacenIdempotencia(repo, capacidad_lru=2)
+    repo.llaves = MagicMock(return_value=["s|t-2|Iniciar", "s|t-1|Iniciar"])
+    almacen.calentar()
+    repo.existe = MagicMock(return_value=False)
+
+    assert almacen.ya_procesado("s|t-2|Iniciar") and almacen.ya_procesado("s|t-1|Iniciar")
+    assert not repo.existe.called
+    repo.llaves.assert_called_once_with(2)
+
+
+def test_consulta_la_tabla_lo_que_proceso_otra_replica(repo):
+    almacen = AlmacenIdempotencia(repo)
+    almacen.calentar()
+    # Otra réplica procesa el mensaje después del calentamiento
+    repo.registrar("s|otro-proceso|Iniciar", "s")
+    assert almacen.ya_procesado("s|otro-proceso|Iniciar") is True
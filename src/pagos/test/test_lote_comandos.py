@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock
+from sqlalchemy.orm import sessionmaker
+from config import db
+from config.idempotencia import RepositorioResultadosComandosPG
+from modulos.infraestructura import comando_pago_consumer
+from modulos.infraestructura.repositorio_postgresql import Base, PagoORM, RepositorioPagosPG
+from modulos.aplicacion.comandos import pago_command_handler
+from modulos.aplicacion.comandos.pago_command_handler import PagoCommandHandler
+from schema.eventos_pagos import ProcesarPago
+from seedworks.infraestructura.idempotencia import AlmacenResultadosComandos
+
+
+def _mensaje(idEvento, monto, comando="Iniciar"):
+    mensaje = MagicMock()
+    mensaje.value.return_value = ProcesarPago(idTransaction=f"t-{idEvento}", comando=comando, idEvento=idEvento,
+                                              idSocio="s-1", monto=monto, fechaEvento="2025-01-01T10:00:00")
+    return mensaje
+
+
+def test_lote_confirma_cada_mensaje_segun_su_resultado(monkeypatch):
+    publicador = MagicMock()
+    publicador.publicar.return_value = True
+    monkeypatch.setattr(pago_command_handler, "publicador_pagos", lambda: publicador)
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db.Base.metadata.create_all(engine)
+    repo = RepositorioPagosPG(sessionmaker(bind=engine, expire_on_commit=False))
+    resultados = AlmacenResultadosComandos(RepositorioResultadosComandosPG(engine))
+    monkeypatch.setattr(comando_pago_consumer, "ejecutar_lote_pago_commands",
+                        lambda comandos: PagoCommandHandler(repo, resultados).handle_lote(comandos))
+
+    consumidor = MagicMock()
+    # e-1 se repite en el lote (mismo idTransaction): sólo la primera aparición transiciona y la
+    # segunda recibe su resultado aunque traiga un monto que lo rechazaría
+    mensajes = [_mensaje("e-1", 100), _mensaje("e-2", 900), _mensaje("e-1", 900), _mensaje("e-3", -5)]
+
+    comando_pago_consumer.procesar_lote_comandos(consumidor, mensajes)
+
+    assert consumidor.acknowledge.call_count == 4
+    consumidor.negative_acknowledge.assert_not_called()
+    assert publicador.publicar.call_count == 2
+    publicador.flush.assert_called_once()
+    with repo.SessionLocal() as session:
+        estados = dict(session.query(PagoORM.idEvento, PagoORM.estado).all())
+    assert estados == {"e-1": "completado", "e-2": "rechazado"}
+
+
+def test_lote_hace_nack_si_falla_la_transaccion(monkeypatch):
+    def fallar(_):
+        raise RuntimeError("conexión perdida")
+    monkeypatch.setattr(comando_pago_consumer, "ejecutar_lote_pago_commands", fallar)
+    consumidor = MagicMock()
+
+    comando_pago_consumer.procesar_lote_comandos(consumidor, [_mensaje("e-1", 100), _mensaje("e-2", 100)])
+
+    assert consumidor.negative_acknowledge.call_count == 2
+    consumidor.acknowledge.assert_not_called()
+
+
+def test_si_falla_el_lote_solo_se_reentrega_el_mensaje_problematico(monkeypatch):
+    lotes = []
+
+    def ejecutar(comandos):
+        lotes.append([comando.data.idEvento for comando in comandos])
+        if any(comando.data.idEvento == "e-2" for comando in comandos):
+            raise RuntimeError("valor fuera de rango")
+        return [MagicMock() for _ in comandos]
+    monkeypatch.setattr(comando_pago_consumer, "ejecutar_lote_pago_commands", ejecutar)
+    consumidor = MagicMock()
+    mensajes = [_mensaje("e-1", 100), _mensaje("e-2", 100), _mensaje("e-3", 100)]
+
+    comando_pago_consumer.procesar_lote_comandos(consumidor, mensajes)
+
+    assert lotes == [["e-1", "e-2", "e-3"], ["e-1"], ["e-2"], ["e-3"]]
+    consumidor.negative_acknowledge.assert_called_once_with(mensajes[1])
+    assert [llamada.args[0] for llamada in consumidor.acknowledge.call_args_list] == [mensajes[0], mensajes[2]]
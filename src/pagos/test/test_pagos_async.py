@@ -0,0 +1,38 @@
+import asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from config import db
+from config.idempotencia import RepositorioResultadosComandosPG
+from modulos.infraestructura.repositorio_postgresql import Base, RepositorioPagosPGAsync
+from modulos.aplicacion.comandos import pago_command_handler
+from modulos.aplicacion.comandos.pago_command import PagoCommand
+from modulos.aplicacion.comandos.pago_command_handler import PagoCommandHandlerAsync
+from modulos.aplicacion.queries.obtener_estado_pago import ObtenerEstadoPagoQuery
+from modulos.aplicacion.queries.obtener_estado_pago_handler import ObtenerEstadoPagoHandlerAsync
+from seedworks.infraestructura.idempotencia import AlmacenResultadosComandos
+
+
+def test_comando_y_query_async(monkeypatch, tmp_path):
+    publicador = type("PublicadorFalso", (), {"publicar": lambda self, record, llave=None: True})()
+    monkeypatch.setattr(pago_command_handler, "publicador_pagos", lambda: publicador)
+    # El resultado se escribe en la transacción async y el almacén sync lo lee
+    # desde otro hilo: la misma base sqlite en archivo para los dos engines
+    url = f"sqlite:///{tmp_path / 'pagos.db'}"
+    resultados = AlmacenResultadosComandos(RepositorioResultadosComandosPG(db.crear_engine(url)))
+
+    async def escenario():
+        engine = db.crear_engine_async(url)
+        async with engine.begin() as conexion:
+            await conexion.run_sync(Base.metadata.create_all)
+            await conexion.run_sync(db.Base.metadata.create_all)
+        repo = RepositorioPagosPGAsync(async_sessionmaker(engine, expire_on_commit=False))
+
+        comando = PagoCommand(comando="Iniciar", idTransaction="t-1",
+                              data=dict(idEvento="e-1", idSocio="s-1", monto=100, fechaEvento="2025-01-01T10:00:00"))
+        pago = await PagoCommandHandlerAsync(repo, resultados).handle(comando)
+        assert resultados._repositorio.obtener(["t-1|Iniciar"])["t-1|Iniciar"]["idPago"] == pago.idPago
+        assert (await PagoCommandHandlerAsync(repo, resultados).handle(comando)).idPago == pago.idPago
+        resultado = await ObtenerEstadoPagoHandlerAsync(repo).handle(ObtenerEstadoPagoQuery(idPago=pago.idPago))
+        await engine.dispose()
+        return resultado.resultado
+
+    assert asyncio.run(escenario())["estadoPago"] == "completado"
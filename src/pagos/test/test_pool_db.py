@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from sqlalchemy.orm import sessionmaker
+from config import db
+from modulos.infraestructura.repositorio_postgresql import Base, PagoORM, RepositorioPagosPG
+from modulos.aplicacion.queries.obtener_estado_pago import ObtenerEstadoPagoQuery
+from modulos.aplicacion.queries.obtener_estado_pago_handler import ObtenerEstadoPagoHandler
+
+
+def test_crear_engine_cuenta_checkouts():
+    engine = db.crear_engine("sqlite://")
+    antes = db._contadores["checkouts"]
+    with engine.connect():
+        pass
+    with engine.connect():
+        pass
+    assert db._contadores["checkouts"] - antes == 2
+
+
+def test_handler_usa_repositorio_inyectado():
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    repo = RepositorioPagosPG(sessionmaker(bind=engine, expire_on_commit=False))
+    with repo.SessionLocal() as session:
+        session.add(PagoORM(idPago="p-1", idEvento="e-1", idSocio="s-1", monto=100, estado="completado",
+                            fechaEvento=datetime.now(timezone.utc), idTransaction="t-1"))
+        session.commit()
+
+    resultado = ObtenerEstadoPagoHandler(repo).handle(ObtenerEstadoPagoQuery(idPago="p-1"))
+    assert resultado.resultado["estadoPago"] == "completado"
+    assert repo.engine is engine
@@ -0,0 +1,108 @@
+import threading
+from pulsar import Result
+from sqlalchemy.orm import sessionmaker
+from config import db
+from config.publicador import OutboxPagosPG
+from modulos.infraestructura.repositorio_postgresql import Base
+from schema.eventos_pagos import PagoProcesado
+from seedworks.infraestructura.publicador import PublicadorAsincrono
+
+
+class ProducerFalso:
+    def __init__(self, resultado=Result.Ok):
+        self.resultado = resultado
+        self.callbacks = []
+
+    def send_async(self, record, callback, **_):
+        self.callbacks.append((record, callback))
+
+    def completar(self):
+        # El cliente de Pulsar llama los callbacks desde sus propios hilos
+        callbacks, self.callbacks = self.callbacks, []
+        for _, callback in callbacks:
+            hilo = threading.Thread(target=callback, args=(self.resultado, None), name="pulsar-callback")
+            hilo.start()
+            hilo.join()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _evento(idPago):
+    return PagoProcesado(idTransaction="t-1", idPago=idPago, idEvento="e-1", idSocio="s-1",
+                         monto=10.0, estado="completado", fechaEvento="2025-01-01")
+
+
+class OutboxQueVeHilos(OutboxPagosPG):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hilos = set()
+
+    def guardar(self, record, llave):
+        self.hilos.add(threading.current_thread().name)
+        super().guardar(record, llave)
+
+    def confirmar(self, id_desborde):
+        self.hilos.add(threading.current_thread().name)
+        super().confirmar(id_desborde)
+
+
+def _outbox():
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return OutboxQueVeHilos("eventos-pago", sesiones=sessionmaker(bind=engine))
+
+
+def test_desborda_al_outbox_sin_cupo_y_reenvia():
+    producer = ProducerFalso()
+    outbox = _outbox()
+    publicador = PublicadorAsincrono(lambda: producer, outbox, max_pendientes=1)
+    publicador._conectar()
+
+    assert publicador.publicar(_evento("p-1"), llave="p-1")
+    assert not publicador.publicar(_evento("p-2"), llave="p-2")
+    assert [record.idPago for _, record, _ in outbox.pendientes(10)] == ["p-2"]
+
+    producer.completar()
+    assert publicador.reenviar_desborde() == 1
+    # En vuelo: el siguiente ciclo no lo vuelve a enviar
+    assert publicador.reenviar_desborde() == 0
+    producer.completar()
+    # La confirmación del broker se aplica al outbox en el siguiente ciclo
+    assert [record.idPago for _, record, _ in outbox.pendientes(10)] == ["p-2"]
+    assert publicador.reenviar_desborde() == 0
+    assert outbox.pendientes(10) == []
+    assert publicador.metricas["reenviados"] == 1
+    assert "pulsar-callback" not in outbox.hilos
+
+
+def test_envio_fallido_termina_en_outbox():
+    producer = ProducerFalso(resultado=Result.Timeout)
+    outbox = _outbox()
+    publicador = PublicadorAsincrono(lambda: producer, outbox)
+    publicador._conectar()
+
+    assert publicador.publicar(_evento("p-1"), llave="p-1")
+    producer.completar()
+    assert publicador.en_vuelo == 0
+    # El callback no escribe en la base: el hilo de reenvío lo pasa al outbox
+    assert outbox.pendientes(10) == []
+    publicador.cerrar()
+    assert [llave for _, _, llave in outbox.pendientes(10)] == ["p-1"]
+    assert outbox.hilos == {threading.current_thread().name}
+
+
+def test_reenvio_fallido_se_libera_y_se_reintenta():
+    producer = ProducerFalso(resultado=Result.Timeout)
+    outbox = _outbox()
+    outbox.guardar(_evento("p-1"), "p-1")
+    publicador = PublicadorAsincrono(lambda: producer, outbox)
+
+    assert publicador.reenviar_desborde() == 1
+    producer.completar()
+    assert publicador._reenviando == set()
+    assert publicador.reenviar_desborde() == 1
+    assert [llave for _, _, llave in outbox.pendientes(10)] == ["p-1"]
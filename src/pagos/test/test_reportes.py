@@ -0,0 +1,79 @@
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock
+from sqlalchemy.orm import sessionmaker
+from config import db
+from config.idempotencia import RepositorioResultadosComandosPG
+from modulos.infraestructura.repositorio_postgresql import Base, PagoORM, PagoRollupORM, RepositorioPagosPG
+from modulos.infraestructura.repositorio_reportes import RepositorioReportesPG
+from modulos.aplicacion.comandos import pago_command_handler
+from modulos.aplicacion.comandos.pago_command import PagoCommand
+from modulos.aplicacion.comandos.pago_command_handler import PagoCommandHandler
+from modulos.aplicacion.queries.reporte_pagos import ReportePagosQuery
+from modulos.aplicacion.queries.reporte_pagos_handler import ReportePagosHandler
+from seedworks.infraestructura.idempotencia import AlmacenResultadosComandos
+
+
+def _sesiones():
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db.Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def _comando(idEvento, idSocio, monto):
+    return PagoCommand(comando="Iniciar", idTransaction=f"t-{idEvento}",
+                       data=dict(idEvento=idEvento, idSocio=idSocio, monto=monto, fechaEvento="2025-01-15T10:00:00"))
+
+
+def _reporte(sesiones, **kwargs):
+    query = ReportePagosQuery(desde=date(2000, 1, 1), hasta=date(2100, 1, 1), **kwargs)
+    return ReportePagosHandler(RepositorioReportesPG(sesiones)).handle(query).resultado["periodos"]
+
+
+def test_rollup_incremental_coincide_con_reconstruccion(monkeypatch):
+    monkeypatch.setattr(pago_command_handler, "publicador_pagos", lambda: MagicMock())
+    sesiones = _sesiones()
+    resultados = AlmacenResultadosComandos(RepositorioResultadosComandosPG(sesiones.kw["bind"]))
+    handler = PagoCommandHandler(RepositorioPagosPG(sesiones), resultados)
+    handler.handle_lote([_comando("e-1", "s-1", 100), _comando("e-2", "s-1", 900), _comando("e-3", "s-2", 50)])
+    handler.handle(_comando("e-1", "s-1", 100))  # redelivery: no suma de nuevo
+
+    # completado se fecha al completarse y rechazado con la fecha del comando: pueden caer en periodos distintos
+    incremental = _reporte(sesiones, granularidad="mes")
+    totales = {estado: t for periodo in incremental for estado, t in periodo["totales"].items()}
+    assert totales == {"completado": {"cantidad": 2, "monto": 150.0}, "rechazado": {"cantidad": 1, "monto": 900.0}}
+    assert [p["totales"] for p in _reporte(sesiones, idSocio="s-2", granularidad="dia")] == [
+        {"completado": {"cantidad": 1, "monto": 50.0}}
+    ]
+
+    RepositorioReportesPG(sesiones).reconstruir()
+    assert _reporte(sesiones, granularidad="mes") == incremental
+
+
+def test_reconstruir_rango_sólo_toca_esos_meses():
+    sesiones = _sesiones()
+    with sesiones() as session:
+        for i, mes in enumerate((1, 2, 3)):
+            session.add(PagoORM(idPago=f"p-{i}", idEvento=f"e-{i}", idSocio="s-1", monto=10, estado="completado",
+                                fechaEvento=datetime(2025, mes, 10, tzinfo=timezone.utc)))
+        session.commit()
+
+    RepositorioReportesPG(sesiones).reconstruir(date(2025, 2, 5), date(2025, 2, 20))
+    with sesiones() as session:
+        meses = {fila.periodo for fila in session.query(PagoRollupORM).filter_by(granularidad="mes")}
+    assert meses == {date(2025, 2, 1)}
+
+
+def test_total_de_todos_los_socios_se_suma_al_consultar(monkeypatch):
+    monkeypatch.setattr(pago_command_handler, "publicador_pagos", lambda: MagicMock())
+    sesiones = _sesiones()
+    resultados = AlmacenResultadosComandos(RepositorioResultadosComandosPG(sesiones.kw["bind"]))
+    PagoCommandHandler(RepositorioPagosPG(sesiones), resultados).handle_lote(
+        [_comando("e-1", "s-1", 100), _comando("e-2", "s-2", 50), _comando("e-3", "s-3", 25)]
+    )
+    with sesiones() as session:
+        # Sólo filas por socio: ninguna transición escribe una fila compartida de todos los socios
+        assert {fila.idSocio for fila in session.query(PagoRollupORM)} == {"s-1", "s-2", "s-3"}
+
+    [periodo] = _reporte(sesiones, granularidad="mes")
+    assert periodo["totales"] == {"completado": {"cantidad": 3, "monto": 175.0}}
@@ -0,0 +1,100 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from config import db
+from config.idempotencia import RepositorioResultadosComandosPG
+from modulos.infraestructura.repositorio_postgresql import Base, PagoORM, RepositorioPagosPG
+from modulos.aplicacion.comandos import pago_command_handler
+from modulos.aplicacion.comandos.pago_command import PagoCommand
+from modulos.aplicacion.comandos.pago_command_handler import PagoCommandHandler
+from seedworks.infraestructura.idempotencia import AlmacenResultadosComandos
+
+
+@pytest.fixture
+def publicador(monkeypatch):
+    publicador = MagicMock()
+    monkeypatch.setattr(pago_command_handler, "publicador_pagos", lambda: publicador)
+    return publicador
+
+
+@pytest.fixture
+def engine(publicador):
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db.Base.metadata.create_all(engine)
+    return engine
+
+
+def _handler(engine):
+    """Handler con LRU vacío, como el de otro proceso o uno recién reiniciado."""
+    repo = RepositorioPagosPG(sessionmaker(bind=engine, expire_on_commit=False))
+    return PagoCommandHandler(repo, AlmacenResultadosComandos(RepositorioResultadosComandosPG(engine)))
+
+
+def _comando(monto, idEvento="e-1", idTransaction="t-1"):
+    return PagoCommand(comando="Iniciar", idTransaction=idTransaction,
+                       data=dict(idEvento=idEvento, idSocio="s-1", monto=monto, fechaEvento="2025-01-01T10:00:00"))
+
+
+def test_reintento_reproduce_resultado_sin_transaccion_y_republica_el_evento(engine, publicador):
+    handler = _handler(engine)
+    primero = handler.handle(_comando(100))
+
+    handler._repositorio = MagicMock()
+    publicador.publicar.reset_mock()
+    reintento = handler.handle(_comando(100))
+
+    assert (reintento.idPago, reintento.estado) == (primero.idPago, "completado")
+    handler.repositorio.aplicar_transiciones.assert_not_called()
+    # El primer intento pudo caer antes de publicar: el evento se vuelve a publicar
+    publicador.publicar.assert_called_once()
+    assert publicador.publicar.call_args.args[0].idPago == primero.idPago
+
+
+def test_reintento_reproduce_el_error_guardado(engine):
+    _handler(engine).handle(_comando(100))
+    with pytest.raises(ValueError):
+        _handler(engine).handle(_comando(900, idTransaction="t-2"))
+
+    handler = _handler(engine)
+    handler._repositorio = MagicMock()
+    with pytest.raises(ValueError, match="completado"):
+        handler.handle(_comando(900, idTransaction="t-2"))
+    handler.repositorio.aplicar_transiciones.assert_not_called()
+
+
+def test_reintento_en_otro_proceso_se_reproduce(engine, publicador):
+    # El resultado lo guardó el worker; la API no lo tiene en su LRU
+    api, worker = _handler(engine), _handler(engine)
+
+    primero = worker.handle(_comando(100))
+    api._repositorio = MagicMock()
+    publicador.publicar.reset_mock()
+    reintento = api.handle(_comando(100))
+
+    assert reintento.idPago == primero.idPago
+    api.repositorio.aplicar_transiciones.assert_not_called()
+    publicador.publicar.assert_called_once()
+
+
+def test_resultado_se_guarda_en_la_transaccion_del_comando(engine):
+    handler = _handler(engine)
+    handler.resultados._repositorio.sentencia_guardar = lambda _: text("INSERT INTO no_existe VALUES (1)")
+
+    with pytest.raises(OperationalError):
+        handler.handle(_comando(100))
+
+    # Sin resultado guardado tampoco queda el pago: un reintento lo aplica desde cero
+    with handler.repositorio.SessionLocal() as session:
+        assert session.query(PagoORM).count() == 0
+    assert handler.resultados.en_memoria("t-1|Iniciar") is None
+
+
+def test_calentar_carga_los_resultados_recientes_en_el_lru(engine):
+    primero = _handler(engine).handle(_comando(100))
+
+    api = _handler(engine)
+    api.resultados.calentar()
+    assert api.resultados.en_memoria("t-1|Iniciar")["idPago"] == primero.idPago
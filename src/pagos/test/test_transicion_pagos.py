@@ -0,0 +1,73 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import sessionmaker
+from config import db
+from config.idempotencia import RepositorioResultadosComandosPG
+from modulos.infraestructura.repositorio_postgresql import Base, PagoORM, RepositorioPagosPG
+from modulos.aplicacion.comandos import pago_command_handler
+from modulos.aplicacion.comandos.pago_command import PagoCommand
+from modulos.aplicacion.comandos.pago_command_handler import PagoCommandHandler
+from seedworks.infraestructura.idempotencia import AlmacenResultadosComandos
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    publicados = []
+    publicador = type("PublicadorFalso", (), {"publicar": lambda self, record, llave=None: publicados.append(record) or True})()
+    monkeypatch.setattr(pago_command_handler, "publicador_pagos", lambda: publicador)
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db.Base.metadata.create_all(engine)
+    handler = PagoCommandHandler(RepositorioPagosPG(sessionmaker(bind=engine, expire_on_commit=False)),
+                                 AlmacenResultadosComandos(RepositorioResultadosComandosPG(engine)))
+    handler.publicados = publicados
+    return handler
+
+
+def _comando(monto, idEvento="e-1", idTransaction="t-1"):
+    return PagoCommand(comando="Iniciar", idTransaction=idTransaction,
+                       data=dict(idEvento=idEvento, idSocio="s-1", monto=monto, fechaEvento="2025-01-01T10:00:00"))
+
+
+def test_redelivery_no_duplica_pago_y_republica_evento(handler):
+    primero = handler.handle(_comando(100))
+    segundo = handler.handle(_comando(100))
+
+    assert primero.estado == segundo.estado == "completado"
+    assert primero.idPago == segundo.idPago
+    assert [evento.idPago for evento in handler.publicados] == [primero.idPago] * 2
+    with handler.repositorio.SessionLocal() as session:
+        assert session.query(PagoORM).count() == 1
+
+
+def test_no_transiciona_desde_estado_final(handler):
+    handler.handle(_comando(100))
+    with pytest.raises(ValueError):
+        handler.handle(_comando(900, idTransaction="t-2"))
+    assert handler.handle(_comando(900, idEvento="e-2", idTransaction="t-3")).estado == "rechazado"
+
+
+def test_comando_sin_transicion_en_el_mismo_estado_republica_evento(handler):
+    pago = handler.handle(_comando(100))
+    assert handler.handle(_comando(100, idTransaction="t-2")).idPago == pago.idPago
+    assert [(evento.idTransaction, evento.estado) for evento in handler.publicados] == \
+        [("t-1", "completado"), ("t-2", "completado")]
+
+
+def test_migracion_elimina_id_evento_duplicados_y_crea_indice_unico():
+    engine = db.crear_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conexion:
+        conexion.exec_driver_sql("DROP INDEX ux_pagos_id_evento")
+        for idPago, idEvento, estado in [("p-1", "e-1", "solicitado"), ("p-2", "e-1", "completado"),
+                                         ("p-3", "e-1", "completado"), ("p-4", "e-2", "rechazado")]:
+            conexion.execute(PagoORM.__table__.insert().values(
+                idPago=idPago, idEvento=idEvento, idSocio="s-1", monto=10, estado=estado,
+                fechaEvento=datetime(2025, 1, 1)))
+
+    db.migrar_id_evento_unico(engine)
+
+    with engine.connect() as conexion:
+        assert sorted(conexion.execute(select(PagoORM.idPago)).scalars()) == ["p-2", "p-4"]
+    assert "ux_pagos_id_evento" in {indice["name"] for indice in inspect(engine).get_indexes("pagos")}
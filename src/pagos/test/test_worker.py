@@ -0,0 +1,131 @@
+"""
+Supervisor de workers con un contexto de procesos falso y reloj controlado:
+reinicio con backoff en _revisar y drenado ordenado en _drenar.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import worker
+from worker import Supervisor, REINICIO_BACKOFF_MAX_SEGUNDOS, VIDA_ESTABLE_SEGUNDOS
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+class ProcesoFalso:
+    def __init__(self, target=None, args=(), name=None, ignora_sigterm=False):
+        self.name, self.args = name, args
+        self.ignora_sigterm = ignora_sigterm
+        self.vivo, self.exitcode = False, None
+        self.senales, self.joins = [], []
+
+    def start(self):
+        self.vivo = True
+
+    def is_alive(self):
+        return self.vivo
+
+    def morir(self, exitcode=1):
+        self.vivo, self.exitcode = False, exitcode
+
+    def terminate(self):
+        self.senales.append('SIGTERM')
+        if not self.ignora_sigterm:
+            self.morir(0)
+
+    def kill(self):
+        self.senales.append('SIGKILL')
+        self.morir(-9)
+
+    def join(self, timeout=None):
+        self.joins.append(timeout)
+
+
+class ContextoFalso:
+    def __init__(self):
+        self.procesos = []
+
+    def Process(self, **kwargs):
+        proceso = ProcesoFalso(**kwargs)
+        self.procesos.append(proceso)
+        return proceso
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    # Sólo el módulo del supervisor ve el reloj falso
+    monkeypatch.setattr(worker, 'time', SimpleNamespace(monotonic=reloj.monotonic))
+    return reloj
+
+
+def _supervisor(procs=1, drenado=10.0):
+    supervisor = Supervisor(procs, drenado)
+    supervisor._contexto = ContextoFalso()
+    for indice in range(procs):
+        supervisor._iniciar(indice)
+    return supervisor
+
+
+def _caer_y_revisar(supervisor, reloj, vivio):
+    reloj.ahora += vivio
+    supervisor._workers[0][0].morir()
+    supervisor._revisar()
+    return supervisor._reinicio_en[0] - reloj.ahora
+
+
+def test_reinicio_con_backoff_exponencial(reloj):
+    supervisor = _supervisor()
+    procesos = supervisor._contexto.procesos
+
+    assert _caer_y_revisar(supervisor, reloj, vivio=1) == 2.0
+    # Antes de que venza el backoff no se reinicia
+    reloj.ahora += 1.5
+    supervisor._revisar()
+    assert len(procesos) == 1
+    reloj.ahora += 0.5
+    supervisor._revisar()
+    assert len(procesos) == 2 and procesos[1].args == (0,) and 0 not in supervisor._reinicio_en
+
+    esperas = []
+    for _ in range(6):
+        esperas.append(_caer_y_revisar(supervisor, reloj, vivio=1))
+        reloj.ahora += esperas[-1]
+        supervisor._revisar()
+    assert esperas == [4.0, 8.0, 16.0, REINICIO_BACKOFF_MAX_SEGUNDOS, REINICIO_BACKOFF_MAX_SEGUNDOS,
+                       REINICIO_BACKOFF_MAX_SEGUNDOS]
+
+
+def test_vida_estable_reinicia_el_backoff(reloj):
+    supervisor = _supervisor()
+    supervisor._backoff[0] = 16.0
+    assert _caer_y_revisar(supervisor, reloj, vivio=VIDA_ESTABLE_SEGUNDOS) == 1.0
+
+
+def test_worker_vivo_no_se_toca(reloj):
+    supervisor = _supervisor(procs=2)
+    supervisor._workers[1][0].morir()
+    supervisor._revisar()
+    assert list(supervisor._reinicio_en) == [1]
+    assert supervisor._contexto.procesos[0].senales == []
+
+
+def test_drenado_envia_sigterm_y_fuerza_al_que_no_termina(reloj):
+    supervisor = _supervisor(procs=3, drenado=10.0)
+    ordenado, terco, muerto = supervisor._contexto.procesos
+    terco.ignora_sigterm = True
+    muerto.morir()
+
+    supervisor._drenar()
+
+    assert ordenado.senales == ['SIGTERM'] and ordenado.exitcode == 0
+    assert terco.senales == ['SIGTERM', 'SIGKILL'] and terco.exitcode == -9
+    assert muerto.senales == []
+    # Todos comparten el mismo plazo de drenado; el forzado se espera sin límite
+    assert ordenado.joins == [10.0] and terco.joins == [10.0, None]
@@ -0,0 +1,132 @@
+"""Workers del consumer de comando-pago
+
+    python -m pagos.worker --procs N
+
+Levanta N procesos consumidores sobre la suscripción compartida
+``pagos-comando-sub``, fuera del proceso de la API (que entonces debe correr
+con CONSUMIR_COMANDOS_EN_API=false). Cada proceso tiene su propio engine/pool
+y su propio publicador, así el procesamiento de pagos escala con los cores y
+no comparte el GIL con uvicorn.
+
+El supervisor reinicia los workers que terminan inesperadamente (con backoff)
+y ante SIGTERM/SIGINT les reenvía SIGTERM: cada worker termina el lote en
+curso, vacía el producer y cierra la suscripción antes de salir.
+
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+
+# Los módulos del servicio se importan desde la raíz de pagos, igual que en main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+REINICIO_BACKOFF_MAX_SEGUNDOS = 30.0
+VIDA_ESTABLE_SEGUNDOS = 60.0
+
+
+def ejecutar_worker(indice: int):
+    """Punto de entrada de cada proceso worker."""
+    from config.db import init_db
+    from config.publicador import iniciar_publicador, cerrar_publicador
+    from modulos.infraestructura.comando_pago_consumer import main_comando_pago_consumer
+
+    detener = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: detener.set())
+    # Ctrl+C llega a todo el grupo; el supervisor decide el apagado
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    print(f"👷 [WORKER {indice}] Iniciando (pid={os.getpid()})")
+    init_db()
+    iniciar_publicador()
+    try:
+        main_comando_pago_consumer(detener)
+    finally:
+        cerrar_publicador()
+        print(f"👋 [WORKER {indice}] Terminado")
+
+
+class Supervisor:
+
+    def __init__(self, procs: int, drenado_segundos: float):
+        self.procs = procs
+        self.drenado_segundos = drenado_segundos
+        self._contexto = multiprocessing.get_context("spawn")
+        self._workers = dict()  # indice -> (proceso, iniciado_en)
+        self._backoff = {indice: 1.0 for indice in range(procs)}
+        self._reinicio_en = dict()
+        self._detener = threading.Event()
+
+    def _iniciar(self, indice: int):
+        proceso = self._contexto.Process(target=ejecutar_worker, args=(indice,), name=f"pagos-worker-{indice}")
+        proceso.start()
+        self._workers[indice] = (proceso, time.monotonic())
+
+    def _revisar(self):
+        ahora = time.monotonic()
+        for indice in range(self.procs):
+            if indice in self._reinicio_en:
+                if ahora >= self._reinicio_en[indice]:
+                    del self._reinicio_en[indice]
+                    self._iniciar(indice)
+                continue
+
+            proceso, iniciado_en = self._workers[indice]
+            if proceso.is_alive():
+                continue
+            vivio = ahora - iniciado_en
+            self._backoff[indice] = 1.0 if vivio >= VIDA_ESTABLE_SEGUNDOS \
+                else min(self._backoff[indice] * 2, REINICIO_BACKOFF_MAX_SEGUNDOS)
+            print(f"⚠️ [SUPERVISOR] Worker {indice} terminó (exitcode={proceso.exitcode}), "
+                  f"reinicio en {self._backoff[indice]:.0f}s")
+            self._reinicio_en[indice] = ahora + self._backoff[indice]
+
+    def detener(self, *_):
+        self._detener.set()
+
+    def _drenar(self):
+        print(f"🛑 [SUPERVISOR] Drenando {len(self._workers)} workers")
+        procesos = [proceso for proceso, _ in self._workers.values() if proceso.is_alive()]
+        for proceso in procesos:
+            proceso.terminate()  # SIGTERM: drenado ordenado en el worker
+        limite = time.monotonic() + self.drenado_segundos
+        for proceso in procesos:
+            proceso.join(max(0.0, limite - time.monotonic()))
+            if proceso.is_alive():
+                print(f"⚠️ [SUPERVISOR] {proceso.name} no terminó a tiempo, se fuerza")
+                proceso.kill()
+                proceso.join()
+
+    def ejecutar(self):
+        signal.signal(signal.SIGTERM, self.detener)
+        signal.signal(signal.SIGINT, self.detener)
+        print(f"🚀 [SUPERVISOR] Iniciando {self.procs} workers de comando-pago")
+        for indice in range(self.procs):
+            self._iniciar(indice)
+        while not self._detener.wait(1.0):
+            self._revisar()
+        self._drenar()
+
+
+def main(argv=None):
+    from config.pulsar_config import settings
+
+    parser = argparse.ArgumentParser(description="Workers del consumer de comando-pago")
+    parser.add_argument("--procs", type=int, default=os.cpu_count() or 1, help="Procesos consumidores")
+    parser.add_argument("--drenado", type=float, default=settings.WORKER_DRENADO_SEGUNDOS,
+                        help="Segundos para drenar antes de forzar la salida")
+    args = parser.parse_args(argv)
+
+    from config.db import create_tables, init_db
+    init_db()
+    create_tables()  # Una sola vez, antes de levantar los workers
+
+    Supervisor(max(1, args.procs), args.drenado).ejecutar()
+
+
+if __name__ == "__main__":
+    main()
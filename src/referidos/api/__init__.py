@@ -12,35 +12,25 @@ def registrar_handlers():
 
 def importar_modelos_alchemy():
     import modulos.referidos.infraestructura.dto
+    import config.idempotencia
 
 
 def comenzar_consumidor():
     """
-    Este es un código de ejemplo. Aunque esto sea funcional puede ser un poco peligroso tener 
-    threads corriendo por si solos. Mi sugerencia es en estos casos usar un verdadero manejador
-    de procesos y threads como Celery.
+    Un solo cliente de Pulsar atiende todos los tópicos (los legacy sólo se
+    drenan); el consumidor vive lo que vive la app y se cierra al terminar el
+    proceso.
     """
 
-    import threading
+    import atexit
     import modulos.referidos.infraestructura.consumidores as referidos
     from flask import current_app
+    from seedwork.infraestructura.utils import es_coreografia
 
-    # Obtener el contexto de aplicación actual
     app = current_app._get_current_object()
-
-    # Función wrapper para ejecutar con contexto de aplicación
-    def run_with_app_context(target_func):
-        def wrapper():
-            with app.app_context():
-                target_func()
-        return wrapper
-
-    # Suscripción a eventos principales según especificación
-    threading.Thread(target=run_with_app_context(referidos.suscribirse_a_eventos_tracking)).start()
-    
-    # Suscripciones legacy para compatibilidad
-    threading.Thread(target=run_with_app_context(referidos.suscribirse_a_comandos_eventos)).start()
-    threading.Thread(target=run_with_app_context(referidos.suscribirse_a_comandos_referidos)).start()
+    consumidor = referidos.crear_consumidor(app, coreografia=es_coreografia()).iniciar()
+    app.extensions['consumidor_pulsar'] = consumidor
+    atexit.register(consumidor.cerrar)
 
 def create_app(configuracion={}):
     # Init la aplicacion de Flask
@@ -74,13 +64,20 @@ def create_app(configuracion={}):
 
      # Inicializa la DB
     from config.db import init_db, db
+    from config.lecturas import configurar_replica, init_lecturas
+    from config.productores import init_productores
+    from config.migraciones import aplicar_migraciones
     
+    configurar_replica(app)
     init_db(app)
+    init_lecturas(app)
+    init_productores(app)
     importar_modelos_alchemy()
     registrar_handlers()
 
     with app.app_context():
         db.create_all()
+        aplicar_migraciones()
         if not app.config.get('TESTING'):
             comenzar_consumidor()
 
@@ -3,10 +3,12 @@ from modulos.referidos.aplicacion.handlers_comandos import HandlerReferidoComman
 from datetime import datetime
 from modulos.referidos.aplicacion.mapeadores import MapeadorReferidoDTOJson
 from modulos.referidos.aplicacion.queries.obtener_referido import ObtenerReferido
-from modulos.referidos.aplicacion.queries.obtener_referidos_por_socio import ObtenerReferidosPorSocio
+from modulos.referidos.aplicacion.queries.obtener_referidos_por_socio import ObtenerReferidosPorSocio, codificar_cursor
+from modulos.referidos.aplicacion.queries.obtener_red_referidos import ObtenerRedReferidos, ResumirRedReferidos
+from modulos.referidos.aplicacion.queries.obtener_ranking import ObtenerRanking
 import seedwork.presentacion.api as api
 import json
-from flask import request, Response
+from flask import request, Response, stream_with_context
 from seedwork.dominio.excepciones import ExcepcionDominio
 
 # Importaciones específicas del módulo de Referidos
@@ -19,6 +21,12 @@ from modulos.referidos.infraestructura.despachadores import Despachador
 # Creación del Blueprint para referidos
 bp = api.crear_blueprint('referidos', '/')
 
+LIMITE_RANKING = 100
+
+def _id_transaction():
+    # Read-your-writes: con el idTransaction de una escritura reciente se lee de la primaria
+    return request.headers.get('X-Id-Transaction') or request.args.get('idTransaction')
+
 # Endpoint para generar referido. Responde a 'POST /{idSocio}/referidos'
 @bp.route('/<idSocio>/referidos', methods=('POST',))
 def generar_referido(idSocio):
@@ -115,7 +123,7 @@ def cancelar_referido(idSocio):
 @bp.route('/referidos/<idSocio>', methods=('GET',))
 def obtener_referidos_por_usuario(idSocio):
     """
-    Endpoint: GET /referidos/{idSocio}
+    Endpoint: GET /referidos/{idSocio}?limite=&despues=&estado=&desde=&hasta=
     Response según especificación (200):
     {
       "idSocio": "uuid",
@@ -129,40 +137,147 @@ def obtener_referidos_por_usuario(idSocio):
           "fechaEvento": "2025-09-09T20:00:00Z",
         },
         ...
-      ]
+      ],
+      "siguiente": "cursor" // Para pedir la página siguiente con ?despues=; null en la última
     }
+    La respuesta se genera en streaming desde un cursor de la base de datos,
+    en orden (fechaEvento, idEvento). Sin limite se entregan todos los referidos.
     """
     try:
-        # Usar la query específica para obtener referidos por socio
-        query_resultado = ejecutar_query(ObtenerReferidosPorSocio(idSocio))
-        
-        referidos_data = query_resultado.resultado or []
-        
-        response_data = {
-            "idSocio": idSocio,
-            "referidos": []
-        }
-        
-        for referido in referidos_data:
-            referido_formatted = {
-                "idEvento": str(getattr(referido, 'idEvento', '')),
-                "idReferido": str(getattr(referido, 'idReferido', '')),
-                "tipoEvento": getattr(referido, 'tipoEvento', ''),
-                "monto": getattr(referido, 'monto', 0.0),
-                "estado_evento": getattr(referido, 'estado', ''),
-                "fechaEvento": str(getattr(referido, 'fechaEvento', ''))
-            }
-            response_data["referidos"].append(referido_formatted)
-            
-        return Response(json.dumps(response_data), status=200, mimetype='application/json')
-            
-    except ExcepcionDominio as e:
+        limite = request.args.get('limite', type=int)
+        if limite is not None and limite <= 0:
+            raise ValueError("limite debe ser mayor que 0")
+        query = ObtenerReferidosPorSocio(
+            idSocio,
+            idTransaction=_id_transaction(),
+            estado=request.args.get('estado'),
+            desde=_fecha_parametro('desde'),
+            hasta=_fecha_parametro('hasta'),
+            despues=request.args.get('despues'),
+            limite=limite
+        )
+        referidos = ejecutar_query(query).resultado
+    except (ExcepcionDominio, ValueError) as e:
+        return Response(json.dumps(dict(error=str(e))), status=400, mimetype='application/json')
+    except Exception as e:
+        return Response(json.dumps(dict(error=f"Error interno: {str(e)}")), status=500, mimetype='application/json')
+
+    return Response(stream_with_context(_json_referidos(idSocio, referidos, limite)), status=200,
+                    mimetype='application/json')
+
+
+# Endpoint para la red multinivel de un socio. Responde a 'GET /referidos/{idSocio}/red'
+@bp.route('/referidos/<idSocio>/red', methods=('GET',))
+def obtener_red_referidos(idSocio):
+    """
+    Endpoint: GET /referidos/{idSocio}/red?profundidad=N
+    Response (200):
+    {
+      "idSocio": "uuid",
+      "red": [{"idSocio": "uuid", "profundidad": 1}, ...]  // En orden (profundidad, idSocio)
+    }
+    """
+    try:
+        query = ObtenerRedReferidos(idSocio, profundidad=_profundidad(), idTransaction=_id_transaction())
+        red = ejecutar_query(query).resultado
+        return Response(json.dumps(dict(idSocio=idSocio, red=red)), status=200, mimetype='application/json')
+    except (ExcepcionDominio, ValueError) as e:
+        return Response(json.dumps(dict(error=str(e))), status=400, mimetype='application/json')
+    except Exception as e:
+        return Response(json.dumps(dict(error=f"Error interno: {str(e)}")), status=500, mimetype='application/json')
+
+
+# Endpoint para el monto generado por la red de un socio. Responde a 'GET /referidos/{idSocio}/red/resumen'
+@bp.route('/referidos/<idSocio>/red/resumen', methods=('GET',))
+def resumir_red_referidos(idSocio):
+    """
+    Endpoint: GET /referidos/{idSocio}/red/resumen?profundidad=N
+    Response (200), sin contar referidos rechazados:
+    {
+      "idSocio": "uuid",
+      "niveles": [{"nivel": 1, "socios": 1, "referidos": 3, "monto": 450.0}, ...],
+      "total": {"referidos": 7, "monto": 980.5}
+    }
+    """
+    try:
+        query = ResumirRedReferidos(idSocio, profundidad=_profundidad(), idTransaction=_id_transaction())
+        resumen = ejecutar_query(query).resultado
+        return Response(json.dumps(dict(idSocio=idSocio, **resumen)), status=200, mimetype='application/json')
+    except (ExcepcionDominio, ValueError) as e:
         return Response(json.dumps(dict(error=str(e))), status=400, mimetype='application/json')
     except Exception as e:
         return Response(json.dumps(dict(error=f"Error interno: {str(e)}")), status=500, mimetype='application/json')
 
 
+# Endpoint para el ranking de socios. Responde a 'GET /referidos/ranking'
+@bp.route('/referidos/ranking', methods=('GET',))
+def obtener_ranking_socios():
+    """
+    Endpoint: GET /referidos/ranking?periodo=YYYY-MM|total&estado=confirmado&orden=referidos|monto&limite=10
+    El periodo por defecto es el mes en curso.
+    Response (200):
+    {
+      "periodo": "2025-09", "estado": "confirmado", "orden": "referidos",
+      "ranking": [{"posicion": 1, "idSocio": "uuid", "referidos": 42, "monto": 6300.0}, ...]
+    }
+    """
+    try:
+        periodo = _periodo()
+        estado = request.args.get('estado', 'confirmado').lower()
+        orden = request.args.get('orden', 'referidos')
+        limite = request.args.get('limite', 10, type=int)
+        if not 0 < limite <= LIMITE_RANKING:
+            raise ValueError(f"limite debe estar entre 1 y {LIMITE_RANKING}")
+        query = ObtenerRanking(periodo, estado=estado, orden=orden, limite=limite, idTransaction=_id_transaction())
+        ranking = ejecutar_query(query).resultado
+        return Response(json.dumps(dict(periodo=periodo, estado=estado, orden=orden, ranking=ranking)),
+                        status=200, mimetype='application/json')
+    except (ExcepcionDominio, ValueError) as e:
+        return Response(json.dumps(dict(error=str(e))), status=400, mimetype='application/json')
+    except Exception as e:
+        return Response(json.dumps(dict(error=f"Error interno: {str(e)}")), status=500, mimetype='application/json')
+
 
+def _periodo():
+    periodo = request.args.get('periodo') or datetime.utcnow().strftime('%Y-%m')
+    if periodo != 'total':
+        try:
+            datetime.strptime(periodo, '%Y-%m')
+        except ValueError:
+            raise ValueError("periodo debe ser 'YYYY-MM' o 'total'")
+    return periodo
 
 
+def _profundidad():
+    profundidad = request.args.get('profundidad', type=int)
+    if profundidad is not None and profundidad <= 0:
+        raise ValueError("profundidad debe ser mayor que 0")
+    return profundidad
 
+
+def _fecha_parametro(nombre: str):
+    valor = request.args.get(nombre)
+    return datetime.fromisoformat(valor.replace('Z', '+00:00')) if valor else None
+
+
+def _json_referidos(idSocio, filas, limite):
+    """Escribe el JSON fila por fila: memoria constante sin importar cuántos referidos tenga el socio."""
+    yield '{"idSocio": %s, "referidos": [' % json.dumps(idSocio)
+    ultima, cantidad = None, 0
+    try:
+        for fila in filas:
+            yield (',' if cantidad else '') + json.dumps({
+                "idEvento": str(fila.idEvento),
+                "idReferido": str(fila.idReferido),
+                "tipoEvento": fila.tipoEvento,
+                "monto": fila.monto,
+                "estado_evento": fila.estado,
+                "fechaEvento": str(fila.fechaEvento)
+            })
+            ultima, cantidad = fila, cantidad + 1
+    except Exception as e:
+        # Los encabezados ya salieron: el JSON queda truncado y el cliente lo detecta
+        print(f"❌ Error generando referidos de {idSocio}: {e}")
+        raise
+    siguiente = codificar_cursor(ultima.fechaEvento, ultima.idEvento) if limite and cantidad == limite else None
+    yield '], "siguiente": %s}' % json.dumps(siguiente)
@@ -0,0 +1,47 @@
+import os
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config.db import db
+from seedwork.infraestructura.lecturas import EnrutadorLecturas
+
+BIND_REPLICA = 'replica'
+
+_enrutador = EnrutadorLecturas()
+
+
+def configurar_replica(app):
+    """Agrega el bind de la réplica si DB_REPLICA_URL está definida."""
+    url = os.environ.get('DB_REPLICA_URL')
+    if not url or app.config.get('TESTING'):
+        return
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    binds[BIND_REPLICA] = url
+
+
+def _sesion_replica() -> Session:
+    return Session(bind=db.engines[BIND_REPLICA])
+
+
+def _lag_replica() -> float:
+    with db.engines[BIND_REPLICA].connect() as conexion:
+        return conexion.execute(text(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+        )).scalar() or 0.0
+
+
+def init_lecturas(app):
+    global _enrutador
+    tiene_replica = BIND_REPLICA in app.config.get('SQLALCHEMY_BINDS', {})
+    _enrutador = EnrutadorLecturas(
+        fabrica_sesion_replica=_sesion_replica if tiene_replica else None,
+        medir_lag=_lag_replica if tiene_replica else None,
+        tolerancia_segundos=float(os.getenv('REPLICA_TOLERANCIA_SEGUNDOS', 5.0)),
+        ventana_escritura_segundos=float(os.getenv('REPLICA_VENTANA_ESCRITURA_SEGUNDOS', 30.0))
+    )
+
+
+def enrutador_lecturas() -> EnrutadorLecturas:
+    return _enrutador
@@ -0,0 +1,34 @@
+from config.db import db
+from modulos.referidos.infraestructura import red, contadores
+from seedwork.infraestructura.migraciones import Migracion, Migrador
+
+
+def _crear_indices(*nombres: str):
+    """Crea índices declarados en los modelos sobre tablas que ya existían."""
+    def aplicar(conexion):
+        for tabla in db.metadata.sorted_tables:
+            for indice in tabla.indexes:
+                if indice.name in nombres:
+                    indice.create(bind=conexion, checkfirst=True)
+    return aplicar
+
+
+MIGRACIONES = [
+    Migracion(1, 'Índices de referidos por idEvento e idReferido',
+              _crear_indices('ix_referidos_id_evento', 'ix_referidos_id_referido')),
+    Migracion(2, 'Índice de referidos por socio en orden (fechaEvento, idEvento)',
+              _crear_indices('ix_referidos_socio_fecha')),
+    Migracion(3, 'Red de referidos (closure table) desde los referidos existentes', red.reconstruir),
+    Migracion(4, 'Contadores de referidos por socio, periodo y estado desde los referidos existentes',
+              contadores.reconstruir),
+    Migracion(5, 'Índice único parcial: un solo socio padre por referido en la red',
+              _crear_indices('ux_red_referidos_padre')),
+]
+
+
+def aplicar_migraciones() -> list[int]:
+    """Aplica las migraciones pendientes. Requiere app context."""
+    versiones = Migrador(db.engine, MIGRACIONES).migrar()
+    if versiones:
+        print(f"🗃️ Migraciones aplicadas: {versiones}")
+    return versiones
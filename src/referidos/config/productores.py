@@ -0,0 +1,99 @@
+import atexit
+import datetime
+import importlib
+import threading
+import uuid
+
+import pulsar
+
+from config.db import db
+from config.pulsar_config import pulsar_config
+from seedwork.infraestructura.esquemas import esquema_avro
+from seedwork.infraestructura.productores import AlmacenDesborde, PoolProductores
+
+_pool = None
+_lock = threading.Lock()
+
+
+class OutboxReferidos(db.Model):
+    __tablename__ = 'outbox_referidos'
+    id = db.Column(db.String(36), primary_key=True)
+    topico = db.Column(db.String(255), nullable=False)
+    clase = db.Column(db.String(255), nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='PENDING')
+    fecha_creacion = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False, index=True)
+
+
+def _clase(ruta: str):
+    modulo, nombre = ruta.rsplit('.', 1)
+    return getattr(importlib.import_module(modulo), nombre)
+
+
+class OutboxReferidosSQLAlchemy(AlmacenDesborde):
+    """Desborde del pool en la tabla outbox_referidos, con el mensaje en Avro.
+
+    Corre en el hilo de reenvío, fuera del request: abre su propio app context
+    y conexiones del engine para no mezclarse con la sesión de la UoW.
+    """
+
+    def __init__(self, app):
+        self._app = app
+
+    def guardar(self, topico, mensaje):
+        clase = mensaje.__class__
+        with self._app.app_context(), db.engine.begin() as conexion:
+            conexion.execute(db.insert(OutboxReferidos).values(
+                id=str(uuid.uuid4()),
+                topico=topico,
+                clase=f'{clase.__module__}.{clase.__qualname__}',
+                payload=esquema_avro(clase).encode(mensaje),
+                status='PENDING',
+                fecha_creacion=datetime.datetime.utcnow()
+            ))
+
+    def pendientes(self, limite):
+        with self._app.app_context(), db.engine.connect() as conexion:
+            filas = conexion.execute(
+                db.select(OutboxReferidos)
+                .where(OutboxReferidos.status == 'PENDING')
+                .order_by(OutboxReferidos.fecha_creacion)
+                .limit(limite)
+            ).all()
+        return [(fila.id, fila.topico, esquema_avro(_clase(fila.clase)).decode(fila.payload)) for fila in filas]
+
+    def confirmar(self, id_desborde):
+        with self._app.app_context(), db.engine.begin() as conexion:
+            conexion.execute(db.update(OutboxReferidos)
+                             .where(OutboxReferidos.id == id_desborde)
+                             .values(status='SENT'))
+
+
+def productores(app=None) -> PoolProductores:
+    """Pool de productores compartido por los despachadores del proceso.
+
+    Con la app, los envíos fallidos se desbordan a outbox_referidos; sin ella
+    (scripts, pruebas) se reintentan desde memoria.
+    """
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = PoolProductores(lambda: pulsar.Client(**pulsar_config.client_config),
+                                        pulsar_config.producer_config,
+                                        desborde=OutboxReferidosSQLAlchemy(app) if app is not None else None).iniciar()
+    return _pool
+
+
+def cerrar_productores():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
+
+
+def init_productores(app):
+    """El pool vive lo que vive la app: se vacía y cierra al terminar el proceso."""
+    app.extensions['productores_pulsar'] = productores(app)
+    atexit.register(cerrar_productores)
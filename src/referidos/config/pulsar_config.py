@@ -46,7 +46,10 @@ class PulsarConfig:
         """Configuración por defecto para productores"""
         return {
             'send_timeout_millis': 30000,
-            'block_if_queue_full': True
+            'block_if_queue_full': True,
+            'batching_enabled': True,
+            'batching_max_publish_delay_ms': int(os.getenv('PULSAR_BATCH_DELAY_MS', 5)),
+            'max_pending_messages': int(os.getenv('PULSAR_MAX_PENDIENTES', 1000))
         }
 
     @property
@@ -1,5 +1,14 @@
 from config.db import db
-from seedwork.infraestructura.uow import UnidadTrabajo, Batch
+from seedwork.infraestructura.uow import UnidadTrabajo, Batch, Lock
+
+
+def _operacion_lote(batch: Batch):
+    """Versión masiva del método de repositorio del batch, si existe y el batch es de una sola entidad."""
+    repositorio = getattr(batch.operacion, '__self__', None)
+    lote = getattr(repositorio, f'{batch.operacion.__name__}_lote', None)
+    if lote is None or len(batch.args) != 1 or batch.kwargs:
+        return None
+    return lote
 
 class UnidadTrabajoSQLAlchemy(UnidadTrabajo):
 
@@ -24,27 +33,33 @@ class UnidadTrabajoSQLAlchemy(UnidadTrabajo):
         return self._batches             
 
     def commit(self):
-        print(f"🔄 [UoW] Iniciando commit con {len(self.batches)} batches")
-        
         try:
-            for i, batch in enumerate(self.batches):
-                print(f"🔄 [UoW] Ejecutando batch {i+1}: {batch.operacion.__name__}")
-                lock = batch.lock
-                batch.operacion(*batch.args, **batch.kwargs)
-                print(f"✅ [UoW] Batch {i+1} ejecutado exitosamente")
-
-            print("🔄 [UoW] Haciendo commit de la sesión de BD...")
+            for operacion, args, kwargs in self._tandas():
+                operacion(*args, **kwargs)
             db.session.commit()
-            print("✅ [UoW] Commit de BD exitoso!")
-
             super().commit()
-            
         except Exception as e:
-            print(f"❌ [UoW] Error en commit: {e}")
-            print(f"❌ [UoW] Haciendo rollback...")
+            print(f"❌ [UoW] Error en commit con {len(self.batches)} batches, haciendo rollback: {e}")
             db.session.rollback()
             raise
 
+    def _tandas(self) -> list:
+        """Agrupa los batches consecutivos de una misma operación con versión masiva (``<operacion>_lote``).
+
+        Así N agregar seguidos se ejecutan como un solo agregar_lote (un INSERT
+        masivo), respetando el orden relativo entre inserciones y actualizaciones.
+        """
+        tandas = list()
+        for batch in self.batches:
+            lote = _operacion_lote(batch)
+            if lote is not None and tandas and tandas[-1][0] == lote:
+                tandas[-1][1][0].append(batch.args[0])
+            elif lote is not None:
+                tandas.append((lote, ([batch.args[0]],), {}))
+            else:
+                tandas.append((batch.operacion, batch.args, batch.kwargs))
+        return tandas
+
     def rollback(self, savepoint=None):
         if savepoint:
             savepoint.rollback()
@@ -54,16 +69,11 @@ class UnidadTrabajoSQLAlchemy(UnidadTrabajo):
         super().rollback()
     
     def registrar_batch(self, operacion, *args, lock=None, **kwargs):
-        print(f"🔄 [UoW] registrar_batch llamado - operacion: {operacion.__name__}")
-        print(f"🔄 [UoW] args: {args}")
-        
-        from seedwork.infraestructura.uow import Batch, Lock
         if lock is None:
             lock = Lock.PESIMISTA
             
         batch = Batch(operacion, lock, *args, **kwargs)
         self._batches.append(batch)
-        print(f"✅ [UoW] Batch agregado - Total batches: {len(self._batches)}")
         
         # Llamar al método padre para eventos de dominio
         try:
@@ -73,19 +83,19 @@ class UnidadTrabajoSQLAlchemy(UnidadTrabajo):
 
     def _publicar_eventos_dominio(self, batch):
         """Método copiado del padre para publicar eventos de dominio"""
-        from pydispatch import dispatcher
-        eventos = self._obtener_eventos(batches=[batch])
-        for evento in eventos:
-            dispatcher.send(signal=f'{type(evento).__name__}Dominio', evento=evento)
+        from seedwork.infraestructura.bus import bus, Fase
+        bus.publicar_lote(self._obtener_eventos(batches=[batch]), Fase.DOMINIO)
     
     def _obtener_eventos(self, batches=None):
         """Método copiado del padre para obtener eventos"""
         from seedwork.dominio.entidades import AgregacionRaiz
         batches = self.batches if batches is None else batches
         eventos = []
+        agregados = set()
         for batch in batches:
             for arg in batch.args:
-                if isinstance(arg, AgregacionRaiz):
+                if isinstance(arg, AgregacionRaiz) and id(arg) not in agregados:
+                    agregados.add(id(arg))
                     eventos.extend(arg.eventos)
         return eventos
     
@@ -0,0 +1,51 @@
+"""
+Fixtures compartidas por las pruebas de referidos: la app sobre sqlite en
+memoria y la captura de las sentencias que el engine envía a la base.
+"""
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from config.db import db, init_db
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    init_db(app)
+    import modulos.referidos.infraestructura.dto  # noqa: F401
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@contextmanager
+def _capturar():
+    sentencias = []
+
+    def escuchar(_conexion, _cursor, sentencia, parametros, _contexto, _many):
+        sentencias.append((sentencia, parametros))
+
+    event.listen(db.engine, 'before_cursor_execute', escuchar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', escuchar)
+
+
+@pytest.fixture
+def capturar_sentencias(app):
+    """``with capturar_sentencias() as sentencias``: junta las (sentencia, parámetros) ejecutadas."""
+    return _capturar
+
+
+@pytest.fixture
+def plan_sqlite(app):
+    """Plan de sqlite (EXPLAIN QUERY PLAN) de una sentencia capturada, en una línea."""
+    def plan(sentencia, parametros) -> str:
+        with db.engine.connect() as conexion:
+            return ' | '.join(fila[-1] for fila in conexion.exec_driver_sql(f'EXPLAIN QUERY PLAN {sentencia}', parametros))
+    return plan
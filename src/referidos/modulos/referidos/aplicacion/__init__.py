@@ -1,11 +1,12 @@
-from pydispatch import dispatcher
+from seedwork.infraestructura.bus import bus, Fase
 from .handlers import HandlerReferidosIntegracion
 from .handlers_comandos import HandlerReferidoCommand
 from modulos.referidos.dominio.eventos import ReferidoCreado, ReferidoConfirmado
 
 # --- ¡ESTA ES LA CORRECCIÓN CLAVE! ---
-# La Unit of Work emite la señal con el sufijo 'Integracion' DESPUÉS del commit.
-# El handler de integración debe escuchar esta señal específica.
+# La Unit of Work publica en la fase de integración DESPUÉS del commit.
+# El handler de integración debe suscribirse a esa fase.
+# Los handlers que publican en Pulsar corren en el pool del bus para no bloquear el comando.
 
-dispatcher.connect(HandlerReferidosIntegracion.handle_referido_creado, signal=f'{ReferidoCreado.__name__}Integracion')
-dispatcher.connect(HandlerReferidosIntegracion.handle_referido_confirmado, signal=f'{ReferidoConfirmado.__name__}Integracion')
+bus.suscribir(ReferidoCreado, HandlerReferidosIntegracion.handle_referido_creado, Fase.INTEGRACION)
+bus.suscribir(ReferidoConfirmado, HandlerReferidosIntegracion.handle_referido_confirmado, Fase.INTEGRACION, en_segundo_plano=True)
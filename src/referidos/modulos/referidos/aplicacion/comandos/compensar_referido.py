@@ -0,0 +1,55 @@
+# Comando: CompensarReferidoCommand
+# Propósito: Compensar (rechazar) el referido de un evento cuyo pago fue rechazado
+
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from modulos.referidos.aplicacion.comandos.base import CrearReferidoBaseHandler
+from modulos.referidos.dominio.objetos_valor import EstadoReferido
+from modulos.referidos.infraestructura import red
+from modulos.referidos.infraestructura.repositorios import RepositorioReferidosPostgreSQL
+from seedwork.aplicacion.comandos import Comando
+from seedwork.aplicacion.comandos import ejecutar_commando as comando
+from config.lecturas import enrutador_lecturas
+
+
+@dataclass
+class CompensarReferidoCommand(Comando):
+    """
+    Paso de compensación de la saga: el referido del evento pasa a rechazado.
+    Sólo actualiza un referido existente; nunca lo crea ni publica confirmación.
+    """
+    idEvento: str
+    idTransaction: str = field(default=None)
+
+
+class CompensarReferidoHandler(CrearReferidoBaseHandler):
+
+    def handle(self, comando: CompensarReferidoCommand) -> bool:
+        """Retorna True si el referido pasó a rechazado."""
+        repositorio = self.fabrica_repositorio.crear_objeto(RepositorioReferidosPostgreSQL.__class__)
+        try:
+            referido = repositorio.obtener_por_id_evento(UUID(comando.idEvento))
+        except ValueError:
+            # idEvento inválido o sin referido: no hay nada que compensar
+            print(f"⚠️ Sin referido para el evento {comando.idEvento}, no hay nada que compensar")
+            return False
+
+        if red.rechazado(referido.estado):
+            print(f"ℹ️ Referido del evento {comando.idEvento} ya estaba rechazado")
+            return False
+
+        referido.estado = EstadoReferido.RECHAZADO
+        from seedwork.infraestructura.uow import unidad_de_trabajo
+        uow = unidad_de_trabajo()
+        with uow:
+            uow.registrar_batch(repositorio.actualizar, referido)
+            uow.commit()
+        enrutador_lecturas().registrar_escritura(comando.idTransaction)
+        print(f"✅ [UoW] Referido del evento {comando.idEvento} compensado a 'rechazado'")
+        return True
+
+
+@comando.register(CompensarReferidoCommand)
+def ejecutar_comando_compensar_referido(comando: CompensarReferidoCommand):
+    return CompensarReferidoHandler().handle(comando)
@@ -13,6 +13,7 @@ from seedwork.aplicacion.comandos import ejecutar_commando as comando
 from modulos.referidos.infraestructura.repositorios import RepositorioReferidosPostgreSQL
 from modulos.referidos.dominio.objetos_valor import EstadoReferido, TipoEvento
 from uuid import UUID
+from config.lecturas import enrutador_lecturas
 
 import datetime
 
@@ -64,6 +65,7 @@ class GenerarReferidoHandler(CrearReferidoBaseHandler):
                     with uow:
                         uow.registrar_batch(repositorio.actualizar, referido_existente)
                         uow.commit()
+                    enrutador_lecturas().registrar_escritura(comando.idTransaction)
                     print(f"✅ [UoW] Referido {comando.idEvento} actualizado a 'rechazado' exitosamente usando UoW!")
                     return # Terminar el manejo si se actualizó
                 else:
@@ -114,6 +116,7 @@ class GenerarReferidoHandler(CrearReferidoBaseHandler):
                 # Commit de la UoW (ejecutará todos los batches)
                 uow.commit()
                 print("✅ [UoW] Referido persistido exitosamente usando UoW!")
+            enrutador_lecturas().registrar_escritura(comando.idTransaction)
                 
         except Exception as e:
             print(f"❌ [UoW] Error persistiendo referido: {e}")
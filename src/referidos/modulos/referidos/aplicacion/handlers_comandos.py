@@ -4,6 +4,7 @@ from seedwork.aplicacion.comandos import ejecutar_commando
 from seedwork.aplicacion.handlers import Handler
 from seedwork.dominio.excepciones import ExcepcionDominio
 from seedwork.infraestructura.uow import UnidadTrabajoPuerto
+from config.lecturas import enrutador_lecturas
 from modulos.referidos.dominio.entidades import Referido
 from modulos.referidos.dominio.fabricas import FabricaReferidos
 from modulos.referidos.dominio.repositorio import RepositorioReferidos
@@ -65,6 +66,7 @@ class HandlerReferidoCommand(Handler):
             else:
                 repositorio.agregar(referido)
                 UnidadTrabajoPuerto.commit()
+                enrutador_lecturas().registrar_escritura(comando.idTransaction)
 
                 # Publicar evento ReferidoProcesado como confirmado
                 despachador.publicar_referido_procesado(
@@ -98,6 +100,7 @@ class HandlerReferidoCommand(Handler):
             referido.estado = EstadoReferido.RECHAZADO
             repositorio.actualizar(referido)
             UnidadTrabajoPuerto.commit()
+            enrutador_lecturas().registrar_escritura(comando.idTransaction)
 
             # Publicar evento ReferidoProcesado como rechazado
             despachador.publicar_referido_procesado(
@@ -0,0 +1,31 @@
+from modulos.referidos.dominio.repositorio import RepositorioReferidos
+from seedwork.aplicacion.queries import Query, QueryResultado
+from seedwork.aplicacion.queries import ejecutar_query as query
+from dataclasses import dataclass
+from typing import Optional
+from config.lecturas import enrutador_lecturas
+from .base import ReferidoQueryBaseHandler
+
+@dataclass
+class ObtenerRanking(Query):
+    periodo: str
+    estado: str = 'confirmado'
+    orden: str = 'referidos'
+    limite: int = 10
+    idTransaction: Optional[str] = None
+
+class ObtenerRankingHandler(ReferidoQueryBaseHandler):
+
+    def handle(self, query: ObtenerRanking) -> QueryResultado:
+        repositorio = self.fabrica_repositorio.crear_objeto(RepositorioReferidos.__class__)
+        with enrutador_lecturas().lectura(query.idTransaction):
+            socios = repositorio.obtener_ranking(query.periodo, query.estado, query.orden, query.limite)
+        return QueryResultado(resultado=[
+            dict(posicion=posicion, idSocio=fila.idSocio, referidos=fila.referidos, monto=float(fila.monto))
+            for posicion, fila in enumerate(socios, start=1)
+        ])
+
+@query.register(ObtenerRanking)
+def ejecutar_query_obtener_ranking(query: ObtenerRanking):
+    handler = ObtenerRankingHandler()
+    return handler.handle(query)
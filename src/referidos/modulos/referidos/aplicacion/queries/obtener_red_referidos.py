@@ -0,0 +1,49 @@
+from modulos.referidos.dominio.repositorio import RepositorioReferidos
+from seedwork.aplicacion.queries import Query, QueryResultado
+from seedwork.aplicacion.queries import ejecutar_query as query
+from dataclasses import dataclass
+from typing import Optional
+from config.lecturas import enrutador_lecturas
+from .base import ReferidoQueryBaseHandler
+
+@dataclass
+class ObtenerRedReferidos(Query):
+    idSocio: str
+    profundidad: Optional[int] = None
+    idTransaction: Optional[str] = None
+
+@dataclass
+class ResumirRedReferidos(Query):
+    idSocio: str
+    profundidad: Optional[int] = None
+    idTransaction: Optional[str] = None
+
+class ObtenerRedReferidosHandler(ReferidoQueryBaseHandler):
+
+    def handle(self, query: ObtenerRedReferidos) -> QueryResultado:
+        repositorio = self.fabrica_repositorio.crear_objeto(RepositorioReferidos.__class__)
+        with enrutador_lecturas().lectura(query.idTransaction):
+            socios = repositorio.obtener_red(query.idSocio, query.profundidad)
+        return QueryResultado(resultado=[dict(idSocio=fila.descendiente, profundidad=fila.profundidad) for fila in socios])
+
+class ResumirRedReferidosHandler(ReferidoQueryBaseHandler):
+
+    def handle(self, query: ResumirRedReferidos) -> QueryResultado:
+        repositorio = self.fabrica_repositorio.crear_objeto(RepositorioReferidos.__class__)
+        with enrutador_lecturas().lectura(query.idTransaction):
+            niveles = repositorio.resumir_red(query.idSocio, query.profundidad)
+        niveles = [dict(nivel=fila.nivel, socios=fila.socios, referidos=fila.referidos, monto=float(fila.monto))
+                   for fila in niveles]
+        total = dict(referidos=sum(nivel['referidos'] for nivel in niveles),
+                     monto=sum(nivel['monto'] for nivel in niveles))
+        return QueryResultado(resultado=dict(niveles=niveles, total=total))
+
+@query.register(ObtenerRedReferidos)
+def ejecutar_query_obtener_red_referidos(query: ObtenerRedReferidos):
+    handler = ObtenerRedReferidosHandler()
+    return handler.handle(query)
+
+@query.register(ResumirRedReferidos)
+def ejecutar_query_resumir_red_referidos(query: ResumirRedReferidos):
+    handler = ResumirRedReferidosHandler()
+    return handler.handle(query)
@@ -4,17 +4,21 @@ from modulos.referidos.infraestructura.mapeadores import MapeadorReferido
 from seedwork.aplicacion.queries import Query, QueryHandler, QueryResultado
 from seedwork.aplicacion.queries import ejecutar_query as query
 from dataclasses import dataclass
+from typing import Optional
+from config.lecturas import enrutador_lecturas
 from .base import ReferidoQueryBaseHandler
 
 @dataclass
 class ObtenerReferido(Query):
     id: str
+    idTransaction: Optional[str] = None
 
 class ObtenerReferidoHandler(ReferidoQueryBaseHandler):
 
     def handle(self, query: ObtenerReferido) -> QueryResultado:
         repositorio = self.fabrica_repositorio.crear_objeto(RepositorioReferidos.__class__)
-        referido =  self.fabrica_referidos.crear_objeto(repositorio.obtener_por_id(query.id), MapeadorReferido())
+        with enrutador_lecturas().lectura(query.idTransaction):
+            referido =  self.fabrica_referidos.crear_objeto(repositorio.obtener_por_id(query.id), MapeadorReferido())
         return QueryResultado(resultado=referido)
 
 @query.register(ObtenerReferido)
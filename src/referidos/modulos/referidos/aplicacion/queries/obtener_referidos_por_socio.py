@@ -3,20 +3,50 @@ from modulos.referidos.infraestructura.mapeadores import MapeadorReferido
 from seedwork.aplicacion.queries import Query, QueryHandler, QueryResultado
 from seedwork.aplicacion.queries import ejecutar_query as query
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import base64
+from config.lecturas import enrutador_lecturas
 from .base import ReferidoQueryBaseHandler
 
+
+def codificar_cursor(fechaEvento: datetime, idEvento: str) -> str:
+    """Cursor opaco con la llave (fechaEvento, idEvento) de la última fila entregada."""
+    return base64.urlsafe_b64encode(f"{fechaEvento.isoformat()}|{idEvento}".encode()).decode()
+
+
+def decodificar_cursor(cursor: str) -> tuple:
+    try:
+        fecha, idEvento = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(fecha), idEvento
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
 @dataclass
 class ObtenerReferidosPorSocio(Query):
     idSocio: str
+    idTransaction: Optional[str] = None
+    estado: Optional[str] = None
+    desde: Optional[datetime] = None
+    hasta: Optional[datetime] = None
+    despues: Optional[str] = None
+    limite: Optional[int] = None
 
 class ObtenerReferidosPorSocioHandler(ReferidoQueryBaseHandler):
 
     def handle(self, query: ObtenerReferidosPorSocio) -> QueryResultado:
+        """El resultado es un iterador perezoso: las filas se leen mientras se consumen."""
         repositorio = self.fabrica_repositorio.crear_objeto(RepositorioReferidos.__class__)
-        referidos = repositorio.obtener_por_socio(query.idSocio)
-        return QueryResultado(resultado=referidos)
+        despues = decodificar_cursor(query.despues) if query.despues else None
+
+        def referidos():
+            with enrutador_lecturas().lectura(query.idTransaction):
+                yield from repositorio.iterar_por_socio(query.idSocio, estado=query.estado, desde=query.desde,
+                                                        hasta=query.hasta, despues=despues, limite=query.limite)
+        return QueryResultado(resultado=referidos())
 
 @query.register(ObtenerReferidosPorSocio)
 def ejecutar_query_obtener_referidos_por_socio(query: ObtenerReferidosPorSocio):
     handler = ObtenerReferidosPorSocioHandler()
-    return handler.handle(query)
\ No newline at end of file
+    return handler.handle(query)
@@ -11,7 +11,6 @@ from seedwork.dominio.repositorios import Repositorio
 class _FabricaReferido(Fabrica):
     def crear_objeto(self, obj, mapeador: Mapeador) -> Referido:
         if isinstance(obj, Entidad):
-            print(obj)
             return mapeador.entidad_a_dto(obj)
         else:
             referido: Referido = mapeador.dto_a_entidad(obj)
@@ -8,6 +8,23 @@ class RepositorioReferidos(Repositorio, ABC):
     def obtener_por_socio(self, idSocio: UUID) -> list:
         ...
     
+    @abstractmethod
+    def iterar_por_socio(self, idSocio: UUID, estado: str = None, desde=None, hasta=None,
+                         despues: tuple = None, limite: int = None):
+        ...
+
+    @abstractmethod
+    def obtener_red(self, idSocio: UUID, profundidad: int = None) -> list:
+        ...
+
+    @abstractmethod
+    def resumir_red(self, idSocio: UUID, profundidad: int = None) -> list:
+        ...
+
+    @abstractmethod
+    def obtener_ranking(self, periodo: str, estado: str, orden: str = 'referidos', limite: int = 10) -> list:
+        ...
+
     @abstractmethod
     def obtener_por_id_referido(self, idReferido: UUID):
         ...
@@ -1,156 +1,180 @@
 import pulsar, _pulsar  
 import logging
 import traceback
+import os
 import json
+from functools import partial
 from pulsar.schema import *
 
 from modulos.referidos.infraestructura.schema.v2.eventos import EventoReferidoConfirmado, EventoReferidoCreado
-from modulos.referidos.infraestructura.schema.v2.eventos_tracking import EventoRegistrado, ReferidoProcesado
+from modulos.referidos.infraestructura.schema.v2.eventos_tracking import EventoRegistrado, ReferidoProcesado, PagoProcesado
+from modulos.referidos.infraestructura.schema.v1.eventos_tracking import EventoEventoRegistrado
 from modulos.referidos.infraestructura.schema.v2.comandos import ComandoCrearReferido
 from modulos.referidos.aplicacion.comandos.generar_referido import GenerarReferidoCommand
+from modulos.referidos.aplicacion.comandos.compensar_referido import CompensarReferidoCommand
 from seedwork.infraestructura import utils
+from seedwork.infraestructura.idempotencia import llave_mensaje
 from seedwork.aplicacion.comandos import ejecutar_commando
+from seedwork.infraestructura.esquemas import esquema_avro
+from seedwork.infraestructura.procesamiento import ProcesadorOrdenado
+from seedwork.infraestructura.suscripciones import ConsumidorCompartido
+from config.idempotencia import almacen_idempotencia
 
 # Importar configuración de Pulsar
 from config.pulsar_config import pulsar_config
 
-def suscribirse_a_eventos_tracking():
-    """
-    Consumidor principal: Escucha EventoRegistrado del tópico comando-referido
-    Según especificación del Microservicio 2: Seguimiento de Referidos
-    """
-    cliente = None
+# Procesamiento concurrente de los tópicos de referidos (orden garantizado por idSocio)
+REFERIDOS_WORKERS = int(os.getenv('REFERIDOS_WORKERS', 8))
+REFERIDOS_MAX_EN_VUELO = int(os.getenv('REFERIDOS_MAX_EN_VUELO', 200))
+
+def procesar_evento_tracking(consumidor, mensaje, evento_data, idempotencia):
+    """Genera el referido de un EventoRegistrado y confirma el mensaje al terminar."""
     try:
-        cliente = pulsar.Client(**pulsar_config.client_config)
-        consumidor = cliente.subscribe(
-            'comando-referido',  # Tópico según especificación
-            consumer_type=_pulsar.ConsumerType.Shared,
-            subscription_name='referidos-sub-comando-referido',
-            schema=AvroSchema(ReferidoProcesado),
-            receiver_queue_size=1000,
-            max_total_receiver_queue_size_across_partitions=50000,
-            consumer_name='referidos-consumer'
+        print(f"📨 EventoRegistrado recibido: {evento_data.data.__dict__}")
+
+        llave = llave_mensaje('referidos-sub-comando-referido', mensaje, evento_data.idTransaction, evento_data.data.estadoEvento)
+        if idempotencia.ya_procesado(llave):
+            print(f"⏭️ Referido de la transacción {evento_data.idTransaction} ya procesado, se omite")
+            consumidor.acknowledge(mensaje)
+            return
+
+        # Crear comando para generar referido
+        comando = GenerarReferidoCommand(
+            idEvento=evento_data.data.idEvento,
+            tipoEvento=evento_data.data.tipoEvento,
+            idReferido=evento_data.data.idReferido,
+            idSocio=evento_data.data.idSocio,
+            monto=evento_data.data.monto,
+            estado=evento_data.data.estadoEvento,
+            fechaEvento=evento_data.data.fechaEvento,
+            idTransaction=evento_data.idTransaction
         )
+        # Ejecutar comando
+        ejecutar_commando(comando)
+        idempotencia.marcar_procesado(llave, 'referidos-sub-comando-referido')
+        print(f"✅ Referido generado para evento: {evento_data.data.idEvento}")
+
+        consumidor.acknowledge(mensaje)
 
-        print("🔄 Consumidor de comando-referido iniciado para referidos")
-        
-        while True:
-            mensaje = consumidor.receive()
-            try:
-                evento_data = mensaje.value()
-                print(f"📨 EventoRegistrado recibido: {evento_data}")     
-                print(f"📨 EventoRegistrado recibido: {evento_data.data.__dict__}")     
-                
-                    # Crear comando para generar referido
-                comando = GenerarReferidoCommand(
-                    idEvento=evento_data.data.idEvento,
-                    tipoEvento=evento_data.data.tipoEvento,
-                    idReferido=evento_data.data.idReferido,
-                    idSocio=evento_data.data.idSocio,
-                    monto=evento_data.data.monto,
-                    estado=evento_data.data.estadoEvento,
-                    fechaEvento=evento_data.data.fechaEvento,
-                    idTransaction=evento_data.idTransaction
-                )
-                # Ejecutar comando
-                ejecutar_commando(comando)
-                print(f"✅ Referido generado para evento: {evento_data.data.idEvento}")
-                
-                consumidor.acknowledge(mensaje)
-                
-            except Exception as e:
-                print(f"❌ Error procesando evento: {str(e)}")
-                traceback.print_exc()
-                consumidor.acknowledge(mensaje)  # Acknowledge para evitar reintento infinito
-                
-        cliente.close()
     except Exception as e:
-        logging.error('ERROR: Suscribiéndose al tópico comando-referido')
+        print(f"❌ Error procesando evento: {str(e)}")
         traceback.print_exc()
-        if cliente:
-            cliente.close()
+        consumidor.acknowledge(mensaje)  # Acknowledge para evitar reintento infinito
 
-def suscribirse_a_comandos_eventos():
-    """
-    Consumidor legacy: mantiene compatibilidad con comandos-eventos
-    """
+
+def suscribirse_a_eventos_referidos():
     cliente = None
     try:
         cliente = pulsar.Client(**pulsar_config.client_config)
         consumidor = cliente.subscribe(
-            'comandos-eventos',
+            'eventos-referido', # <--- TÓPICO DE COMANDOS DE REFERIDOS
             consumer_type=_pulsar.ConsumerType.Shared,
-            subscription_name='referidos-sub-comandos-eventos',
-            schema=AvroSchema(EventoReferidoCreado),
-            receiver_queue_size=1000,
-            max_total_receiver_queue_size_across_partitions=50000,
-            consumer_name='referidos-consumer'
+            subscription_name='referidos-sub-eventos-referidos', # Nombre único
+            schema=esquema_avro(ComandoCrearReferido) # Schema de comandos de referido
         )
 
         while True:
             mensaje = consumidor.receive()
-            print(f'📜 Comando de EVENTO legacy recibido: {mensaje.value().data}')
+            # Opcional: imprimir para ver que el servicio principal recibe comandos
+            print(f'evento de referidos recibido: {mensaje.value().data}')
             consumidor.acknowledge(mensaje)     
+            
         cliente.close()
     except:
-        logging.error('ERROR: Suscribiéndose al tópico comandos-eventos legacy')
+        logging.error('ERROR: Suscribiéndose al tópico de eventos de referidos!')
         traceback.print_exc()
         if cliente:
             cliente.close()
 
-def suscribirse_a_comandos_referidos():
+
+# ------------------ Coreografía (SAGA_MODO=coreografia) ------------------ #
+def procesar_evento_tracking_coreografia(consumidor, mensaje, evento, idempotencia):
     """
-    Consumidor legacy: mantiene compatibilidad con comandos-referidos
+    Reacciona directamente al EventoRegistrado que publica eventosMS en
+    eventos-tracking, sin esperar el comando-referido del orquestador.
     """
-    cliente = None
     try:
-        cliente = pulsar.Client(**pulsar_config.client_config)
-        consumidor = cliente.subscribe(
-            'comandos-referidos',
-            consumer_type=_pulsar.ConsumerType.Shared,
-            subscription_name='referidos-sub-comandos-referidos',
-            schema=AvroSchema(ComandoCrearReferido),
-            receiver_queue_size=1000,
-            max_total_receiver_queue_size_across_partitions=50000,
-            consumer_name='referidos-consumer'
-        )
+        datos = evento.data
+        llave = llave_mensaje('referidos-sub-eventos-tracking', mensaje, datos.idTransaction, datos.estado)
+        if idempotencia.ya_procesado(llave):
+            consumidor.acknowledge(mensaje)
+            return
 
-        while True:
-            mensaje = consumidor.receive()
-            print(f'📜 Comando de referidos legacy recibido: {mensaje.value().data}')
-            consumidor.acknowledge(mensaje)     
-            
-        cliente.close()
-    except:
-        logging.error('ERROR: Suscribiéndose al tópico comandos-referidos legacy')
-        traceback.print_exc()
-        if cliente:
-            cliente.close()
-        logging.error('ERROR: Suscribiéndose al tópico de comandos de referidos!')
+        ejecutar_commando(GenerarReferidoCommand(
+            idEvento=datos.idEvento,
+            tipoEvento=datos.tipoEvento,
+            idReferido=datos.idReferido,
+            idSocio=datos.idSocio,
+            monto=datos.monto,
+            estado=datos.estado,
+            fechaEvento=datos.fechaEvento,
+            idTransaction=datos.idTransaction
+        ))
+        idempotencia.marcar_procesado(llave, 'referidos-sub-eventos-tracking')
+        print(f"✅ Referido generado para evento: {datos.idEvento}")
+    except Exception as e:
+        print(f"❌ Error procesando eventos-tracking: {str(e)}")
         traceback.print_exc()
-        if cliente:
-            cliente.close()
+    consumidor.acknowledge(mensaje)
 
-def suscribirse_a_eventos_referidos():
-    cliente = None
+def procesar_evento_pago_coreografia(consumidor, mensaje, datos, idempotencia):
+    """
+    Compensación del paso de referidos: si pagos rechaza el pago, el referido
+    del evento pasa a rechazado. Sólo se actualiza un referido existente; si
+    la base de datos falla se hace nack para que Pulsar reentregue el evento.
+    """
     try:
-        cliente = pulsar.Client(**pulsar_config.client_config)
-        consumidor = cliente.subscribe(
-            'eventos-referido', # <--- TÓPICO DE COMANDOS DE REFERIDOS
-            consumer_type=_pulsar.ConsumerType.Shared,
-            subscription_name='referidos-sub-eventos-referidos', # Nombre único
-            schema=AvroSchema(ComandoCrearReferido) # Schema de comandos de referido
-        )
+        if (datos.estado or '').lower() != 'rechazado':
+            consumidor.acknowledge(mensaje)
+            return
 
-        while True:
-            mensaje = consumidor.receive()
-            # Opcional: imprimir para ver que el servicio principal recibe comandos
-            print(f'evento de referidos recibido: {mensaje.value().data}')
-            consumidor.acknowledge(mensaje)     
-            
-        cliente.close()
-    except:
-        logging.error('ERROR: Suscribiéndose al tópico de eventos de referidos!')
+        llave = llave_mensaje('referidos-sub-eventos-pago', mensaje, datos.idTransaction, 'Compensar')
+        if idempotencia.ya_procesado(llave):
+            consumidor.acknowledge(mensaje)
+            return
+
+        if ejecutar_commando(CompensarReferidoCommand(idEvento=datos.idEvento, idTransaction=datos.idTransaction)):
+            print(f"↩️ Referido del evento {datos.idEvento} compensado por pago rechazado")
+        idempotencia.marcar_procesado(llave, 'referidos-sub-eventos-pago')
+    except Exception as e:
+        print(f"❌ Error compensando referido, se reentregará: {str(e)}")
         traceback.print_exc()
-        if cliente:
-            cliente.close()
\ No newline at end of file
+        consumidor.negative_acknowledge(mensaje)
+        return
+    consumidor.acknowledge(mensaje)
+
+
+# ------------------ Consumidor compartido ------------------ #
+def crear_consumidor(app, coreografia: bool = False) -> ConsumidorCompartido:
+    """
+    Un solo cliente de Pulsar para todos los tópicos de referidos. Los mensajes
+    se reparten entre los workers del ProcesadorOrdenado por idSocio, cada uno
+    con su propio app context (y su propia sesión de BD).
+    """
+    idempotencia = almacen_idempotencia()
+    procesador = ProcesadorOrdenado(REFERIDOS_WORKERS, REFERIDOS_MAX_EN_VUELO,
+                                    contexto=app.app_context, nombre='referidos')
+    consumidor = ConsumidorCompartido(
+        lambda: pulsar.Client(**pulsar_config.client_config),
+        procesador,
+        dict(receiver_queue_size=1000,
+             max_total_receiver_queue_size_across_partitions=50000,
+             consumer_name='referidos-consumer')
+    )
+
+    # Tópico según especificación del Microservicio 2: Seguimiento de Referidos
+    consumidor.registrar('comando-referido', 'referidos-sub-comando-referido', ReferidoProcesado,
+                         partial(procesar_evento_tracking, idempotencia=idempotencia),
+                         llave=lambda evento: evento.data.idSocio)
+    if coreografia:
+        consumidor.registrar('eventos-tracking', 'referidos-sub-eventos-tracking', EventoEventoRegistrado,
+                             partial(procesar_evento_tracking_coreografia, idempotencia=idempotencia),
+                             llave=lambda evento: evento.data.idSocio)
+        consumidor.registrar('eventos-pago', 'referidos-sub-eventos-pago', PagoProcesado,
+                             partial(procesar_evento_pago_coreografia, idempotencia=idempotencia),
+                             llave=lambda evento: evento.idSocio)
+
+    # Tópicos legacy: sólo se drenan para que no acumulen backlog
+    consumidor.drenar('comandos-eventos', 'referidos-sub-comandos-eventos')
+    consumidor.drenar('comandos-referidos', 'referidos-sub-comandos-referidos')
+    return consumidor
@@ -0,0 +1,98 @@
+"""Contadores de referidos por socio
+
+En este archivo usted encontrará el mantenimiento y las consultas de la tabla
+``contadores_referidos``: por cada (socio, periodo, estado) la cantidad de
+referidos y la suma de su monto. El periodo es el mes de ``fechaEvento``
+('YYYY-MM') y además se lleva el acumulado histórico en el periodo 'total'.
+
+- Los contadores cambian en la misma transacción que los referidos: tras
+  insertarlos se suman sus filas y alrededor de un cambio de estado se resta
+  la fila anterior y se suma la nueva, con un único INSERT ... SELECT ...
+  ON CONFLICT agregado por tanda, sin traer las filas a Python.
+- El ranking de un periodo y estado recorre el índice ordenado por cantidad
+  o por monto y se detiene en el top-K, sin importar cuántos referidos haya.
+
+"""
+
+from sqlalchemy import delete, func, literal, select, tuple_, union_all
+
+from .dto import ContadorReferidos, Referido
+
+PERIODO_TOTAL = 'total'
+ORDENES = ('referidos', 'monto')
+
+
+def _dialecto(ejecutor) -> str:
+    return ejecutor.get_bind().dialect.name if hasattr(ejecutor, 'get_bind') else ejecutor.dialect.name
+
+
+def _insert(dialecto):
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _mes(dialecto):
+    if dialecto == 'postgresql':
+        return func.to_char(Referido.fechaEvento, 'YYYY-MM')
+    return func.strftime('%Y-%m', Referido.fechaEvento)
+
+
+def periodo(fecha) -> str:
+    return fecha.strftime('%Y-%m')
+
+
+def _acumular(ejecutor, llaves: list = None, signo: int = 1):
+    """Suma (o resta, con signo -1) a los contadores los referidos con esas llaves primarias; todos si no hay llaves."""
+    dialecto = _dialecto(ejecutor)
+    estado = func.lower(Referido.estado)
+
+    def agregado(columna_periodo, *agrupar):
+        consulta = select(Referido.idSocio, columna_periodo.label('periodo'), estado.label('estado'),
+                          (func.count() * signo).label('referidos'), (func.sum(Referido.monto) * signo).label('monto'))
+        if llaves is not None:
+            consulta = consulta.where(tuple_(Referido.idSocio, Referido.idReferido, Referido.idEvento).in_(llaves))
+        return consulta.group_by(Referido.idSocio, estado, *agrupar)
+
+    mes = _mes(dialecto)
+    filas = union_all(agregado(mes, mes), agregado(literal(PERIODO_TOTAL)))
+    tabla = ContadorReferidos.__table__
+    sentencia = _insert(dialecto)(tabla).from_select(['idSocio', 'periodo', 'estado', 'referidos', 'monto'], filas)
+    ejecutor.execute(sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.idSocio, tabla.c.periodo, tabla.c.estado],
+        set_=dict(referidos=tabla.c.referidos + sentencia.excluded.referidos,
+                  monto=tabla.c.monto + sentencia.excluded.monto)
+    ))
+
+
+def sumar(ejecutor, llaves: list):
+    if llaves:
+        _acumular(ejecutor, llaves, 1)
+
+
+def restar(ejecutor, llaves: list):
+    if llaves:
+        _acumular(ejecutor, llaves, -1)
+
+
+def ranking(ejecutor, periodo: str, estado: str, orden: str = 'referidos', limite: int = 10):
+    """Top-K de socios del periodo y estado, de mayor a menor cantidad o monto."""
+    if orden not in ORDENES:
+        raise ValueError(f"orden debe ser uno de {ORDENES}")
+    columna = getattr(ContadorReferidos, orden)
+    filas = ejecutor.execute(
+        select(ContadorReferidos.idSocio, ContadorReferidos.referidos, ContadorReferidos.monto)
+        .where(ContadorReferidos.periodo == periodo, ContadorReferidos.estado == estado.lower(), columna > 0)
+        .order_by(columna.desc(), ContadorReferidos.idSocio.desc())
+        .limit(limite)
+    ).all()
+    # Un contador que volvió a cero puede conservar un residuo de monto por redondeo: queda al final y se omite
+    return [fila for fila in filas if fila.referidos > 0]
+
+
+def reconstruir(ejecutor):
+    """Recalcula todos los contadores desde los referidos existentes."""
+    ejecutor.execute(delete(ContadorReferidos))
+    _acumular(ejecutor)
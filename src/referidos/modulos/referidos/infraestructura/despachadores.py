@@ -1,4 +1,3 @@
-import pulsar
 from pulsar.schema import *
 import datetime
 
@@ -10,8 +9,8 @@ from modulos.referidos.infraestructura.schema.v2.eventos_tracking import Referid
 
 
 
-# Importar configuración de Pulsar
-from config.pulsar_config import pulsar_config
+# Pool de productores del proceso
+from config.productores import productores
 
 from seedwork.infraestructura import utils
 
@@ -23,12 +22,8 @@ def unix_time_millis(dt):
 
 class Despachador:
     def _publicar_mensaje(self, mensaje, topico):
-        # Usar configuración de Pulsar
-        cliente = pulsar.Client(**pulsar_config.client_config)
-        # Obtenemos el schema del propio objeto del mensaje
-        publicador = cliente.create_producer(topico, schema=AvroSchema(mensaje.__class__), **pulsar_config.producer_config)
-        publicador.send(mensaje)
-        cliente.close()
+        # Producer compartido del proceso (por tópico y schema del propio mensaje)
+        productores().publicar(mensaje, topico)
 
     
 
@@ -53,7 +48,7 @@ class Despachador:
             )
             print(f"📤 [DESPACHADOR] Publicando ReferidoProcesado {evento.__dict__}")
             self._publicar_mensaje(evento, 'eventos-referido')
-            print(f"✅ [DESPACHADOR] Evento ReferidoProcesado publicado exitosamente!")
+            print(f"✅ [DESPACHADOR] Evento ReferidoProcesado encolado para publicación")
             
         except Exception as e:
             print(f"❌ [DESPACHADOR] Error publicando ReferidoProcesado: {e}")
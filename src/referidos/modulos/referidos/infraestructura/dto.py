@@ -9,7 +9,14 @@ import datetime
 
 class Referido(db.Model):
     __tablename__ = "referidos"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # La PK empieza por idSocio: las búsquedas sólo por idEvento o idReferido necesitan su propio índice
+        db.Index('ix_referidos_id_evento', 'idEvento'),
+        db.Index('ix_referidos_id_referido', 'idReferido'),
+        # Paginación por keyset de GET /referidos/<idSocio>: orden (fechaEvento, idEvento) sin sort
+        db.Index('ix_referidos_socio_fecha', 'idSocio', 'fechaEvento', 'idEvento'),
+        {'extend_existing': True}
+    )
     idSocio = db.Column(db.String, primary_key=True, nullable=False)
     idReferido = db.Column(db.String, primary_key=True, nullable=False)
     estado = db.Column(db.String, nullable=False)
@@ -19,3 +26,35 @@ class Referido(db.Model):
     fechaEvento = db.Column(db.DateTime, nullable=False)
     fecha_creacion = db.Column(db.DateTime, nullable=False)
     fecha_actualizacion = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+
+
+class RedReferidos(db.Model):
+    """Closure table de la red de referidos: un camino ancestro -> descendiente por fila."""
+    __tablename__ = "red_referidos"
+    __table_args__ = (
+        db.Index('ix_red_referidos_ancestro', 'ancestro', 'profundidad', 'descendiente'),
+        db.Index('ix_red_referidos_descendiente', 'descendiente', 'profundidad'),
+        # Cada referido cuelga de un único socio: a lo sumo un camino de profundidad 1 por descendiente
+        db.Index('ux_red_referidos_padre', 'descendiente', unique=True,
+                 postgresql_where=db.text('profundidad = 1'), sqlite_where=db.text('profundidad = 1')),
+        {'extend_existing': True}
+    )
+    ancestro = db.Column(db.String, primary_key=True, nullable=False)
+    descendiente = db.Column(db.String, primary_key=True, nullable=False)
+    profundidad = db.Column(db.Integer, nullable=False)
+
+
+class ContadorReferidos(db.Model):
+    """Cantidad y monto de referidos por socio, periodo ('YYYY-MM' o 'total') y estado."""
+    __tablename__ = "contadores_referidos"
+    __table_args__ = (
+        # Ranking top-K: recorrido del índice en orden descendente, sin sort
+        db.Index('ix_contadores_ranking_referidos', 'periodo', 'estado', 'referidos', 'idSocio'),
+        db.Index('ix_contadores_ranking_monto', 'periodo', 'estado', 'monto', 'idSocio'),
+        {'extend_existing': True}
+    )
+    idSocio = db.Column(db.String, primary_key=True, nullable=False)
+    periodo = db.Column(db.String(7), primary_key=True, nullable=False)
+    estado = db.Column(db.String, primary_key=True, nullable=False)
+    referidos = db.Column(db.Integer, nullable=False, default=0)
+    monto = db.Column(db.Float, nullable=False, default=0.0)
@@ -0,0 +1,146 @@
+"""Red de referidos (closure table)
+
+En este archivo usted encontrará el mantenimiento y las consultas de la red
+multinivel de referidos sobre la tabla ``red_referidos``: una fila
+(ancestro, descendiente, profundidad) por cada camino del árbol, incluida la
+fila (socio, socio, 0) de cada nodo.
+
+- Al crear un referido activo socio -> referido se agregan, en una sola
+  sentencia, los caminos de cada ancestro del socio a cada descendiente del
+  referido. Cada referido cuelga de un único socio (el primero que lo
+  refirió) y no se aceptan ciclos. El índice único parcial
+  ``ux_red_referidos_padre`` lo garantiza en la base, y los nodos del lote se
+  bloquean para que dos transacciones concurrentes no lo violen.
+- Al rechazarse el último referido activo del par se quitan esos caminos.
+- Listar o agregar la red de un socio hasta cierta profundidad es una sola
+  consulta indexada por ancestro, sin importar la profundidad del árbol.
+
+Las funciones reciben la sesión o conexión de la transacción en curso, así la
+red cambia en la misma transacción que el referido.
+
+"""
+
+from sqlalchemy import bindparam, delete, exists, func, literal, select, true, tuple_
+from sqlalchemy.orm import aliased
+
+from .dto import Referido, RedReferidos
+
+ESTADO_RECHAZADO = 'rechazado'
+
+
+def _insert(ejecutor):
+    dialecto = ejecutor.get_bind().dialect.name if hasattr(ejecutor, 'get_bind') else ejecutor.dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _activo():
+    return func.lower(Referido.estado) != ESTADO_RECHAZADO
+
+
+def rechazado(estado) -> bool:
+    """El estado llega como 'rechazado' desde los comandos o como EstadoReferido.RECHAZADO desde el dominio."""
+    return str(getattr(estado, 'value', estado)).lower() == ESTADO_RECHAZADO
+
+
+def conectar(ejecutor, idSocio: str, idReferido: str):
+    conectar_lote(ejecutor, [(idSocio, idReferido)])
+
+
+def conectar_lote(ejecutor, pares: list):
+    """Cuelga cada referido (con su subárbol) de su socio, en orden.
+
+    Se omiten los pares cuyo referido ya tenía socio o que formarían un
+    ciclo. Las verificaciones van dentro del mismo INSERT ... SELECT, que se
+    ejecuta una vez por par con executemany: cada par ve los caminos que
+    agregaron los anteriores.
+    """
+    pares = [(idSocio, idReferido) for idSocio, idReferido in pares if idSocio != idReferido]
+    if not pares:
+        return
+    insert = _insert(ejecutor)
+    nodos = sorted(dict.fromkeys(nodo for par in pares for nodo in par))
+    ejecutor.execute(insert(RedReferidos.__table__).values([
+        dict(ancestro=nodo, descendiente=nodo, profundidad=0) for nodo in nodos
+    ]).on_conflict_do_nothing())
+    # Bloquea la fila propia de cada nodo (en orden, sin deadlocks): otra transacción que
+    # conecte los mismos socios espera al commit de ésta, y sus verificaciones ven sus caminos
+    ejecutor.execute(select(RedReferidos.ancestro).where(
+        RedReferidos.ancestro.in_(nodos), RedReferidos.descendiente == RedReferidos.ancestro
+    ).order_by(RedReferidos.ancestro).with_for_update())
+
+    socio, referido = bindparam('socio'), bindparam('referido')
+    arriba, abajo, padre, ciclo = (aliased(RedReferidos) for _ in range(4))
+    # Producto cruzado intencional: cada ancestro del socio con cada descendiente del referido
+    caminos = select(arriba.ancestro, abajo.descendiente, arriba.profundidad + abajo.profundidad + literal(1)) \
+        .select_from(arriba).join(abajo, true()) \
+        .where(arriba.descendiente == socio, abajo.ancestro == referido,
+               ~exists().where(padre.descendiente == referido, padre.profundidad == 1),
+               ~exists().where(ciclo.ancestro == referido, ciclo.descendiente == socio))
+    ejecutor.execute(
+        # Sólo se toleran caminos repetidos: un segundo padre viola ux_red_referidos_padre
+        insert(RedReferidos.__table__).from_select(['ancestro', 'descendiente', 'profundidad'], caminos)
+        .on_conflict_do_nothing(index_elements=['ancestro', 'descendiente']),
+        [dict(socio=idSocio, referido=idReferido) for idSocio, idReferido in pares]
+    )
+
+
+def desconectar(ejecutor, idSocio: str, idReferido: str) -> bool:
+    """Quita el subárbol del referido de la red del socio si ya no queda ningún referido activo del par."""
+    activo = ejecutor.execute(select(exists().where(
+        Referido.idSocio == idSocio, Referido.idReferido == idReferido, _activo()
+    ))).scalar()
+    enlazado = ejecutor.execute(select(exists().where(
+        RedReferidos.ancestro == idSocio, RedReferidos.descendiente == idReferido, RedReferidos.profundidad == 1
+    ))).scalar()
+    if activo or not enlazado:
+        return False
+
+    arriba, abajo = aliased(RedReferidos), aliased(RedReferidos)
+    caminos = select(arriba.ancestro, abajo.descendiente) \
+        .select_from(arriba).join(abajo, true()) \
+        .where(arriba.descendiente == idSocio, abajo.ancestro == idReferido)
+    ejecutor.execute(delete(RedReferidos).where(
+        tuple_(RedReferidos.ancestro, RedReferidos.descendiente).in_(caminos)
+    ))
+    return True
+
+
+def descendientes(ejecutor, idSocio: str, profundidad: int = None):
+    """Socios de la red de idSocio en orden (profundidad, idSocio)."""
+    consulta = select(RedReferidos.descendiente, RedReferidos.profundidad) \
+        .where(RedReferidos.ancestro == idSocio, RedReferidos.profundidad > 0)
+    if profundidad:
+        consulta = consulta.where(RedReferidos.profundidad <= profundidad)
+    return ejecutor.execute(consulta.order_by(RedReferidos.profundidad, RedReferidos.descendiente)).all()
+
+
+def resumen(ejecutor, idSocio: str, profundidad: int = None):
+    """Referidos activos y monto por nivel de la red (nivel 1 = referidos directos del socio)."""
+    nivel = (RedReferidos.profundidad + 1).label('nivel')
+    consulta = select(
+        nivel,
+        func.count(func.distinct(Referido.idSocio)).label('socios'),
+        func.count().label('referidos'),
+        func.coalesce(func.sum(Referido.monto), 0.0).label('monto')
+    ).select_from(RedReferidos).join(Referido, Referido.idSocio == RedReferidos.descendiente) \
+        .where(RedReferidos.ancestro == idSocio, _activo())
+    if profundidad:
+        consulta = consulta.where(RedReferidos.profundidad < profundidad)
+    return ejecutor.execute(consulta.group_by(RedReferidos.profundidad).order_by(RedReferidos.profundidad)).all()
+
+
+def reconstruir(ejecutor) -> int:
+    """Arma la red desde cero con los referidos activos, en orden de creación. Retorna los pares procesados."""
+    ejecutor.execute(delete(RedReferidos))
+    pares = ejecutor.execute(
+        select(Referido.idSocio, Referido.idReferido)
+        .where(_activo())
+        .group_by(Referido.idSocio, Referido.idReferido)
+        .order_by(func.min(Referido.fecha_creacion))
+    ).all()
+    conectar_lote(ejecutor, [(par.idSocio, par.idReferido) for par in pares])
+    return len(pares)
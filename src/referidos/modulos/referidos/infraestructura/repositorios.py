@@ -3,8 +3,33 @@ from modulos.referidos.dominio.fabricas import FabricaReferidos
 from modulos.referidos.dominio.repositorio import RepositorioReferidos
 from modulos.referidos.infraestructura.dto import Referido
 from modulos.referidos.infraestructura.mapeadores import MapeadorReferido
+from modulos.referidos.infraestructura import red, contadores
 from config.db import db
+from sqlalchemy import func, insert, select, tuple_, update
+from seedwork.infraestructura.lecturas import sesion_lectura
 from uuid import UUID
+import datetime
+
+# Columnas que expone GET /referidos/<idSocio>; se proyectan sin pasar por la entidad
+COLUMNAS_LISTADO = (Referido.idEvento, Referido.idReferido, Referido.tipoEvento, Referido.monto,
+                    Referido.estado, Referido.fechaEvento)
+
+
+def _fila(dto: Referido) -> dict:
+    fila = {columna.key: getattr(dto, columna.key) for columna in Referido.__table__.columns}
+    fila['fecha_actualizacion'] = fila['fecha_actualizacion'] or datetime.datetime.utcnow()
+    return fila
+
+
+def _pares(dtos) -> list:
+    """Pares (idSocio, idReferido) distintos, en orden de llegada."""
+    return list(dict.fromkeys((dto.idSocio, dto.idReferido) for dto in dtos))
+
+
+def _llaves(dtos) -> list:
+    """Llaves primarias (idSocio, idReferido, idEvento) de los referidos."""
+    return [(str(dto.idSocio), str(dto.idReferido), str(dto.idEvento)) for dto in dtos]
+
 
 class RepositorioReferidosPostgreSQL(RepositorioReferidos):
     def __init__(self):
@@ -15,16 +40,37 @@ class RepositorioReferidosPostgreSQL(RepositorioReferidos):
         return self._fabrica_referidos
 
     def obtener_por_id(self, id: UUID) -> Referido:
-        referido_dto = db.session.query(Referido).filter_by(id=str(id)).one()
+        referido_dto = sesion_lectura(db.session).query(Referido).filter_by(id=str(id)).one()
         print(f"Referido DTO from DB: {referido_dto.__dict__}")
         return self.fabrica_referidos.crear_objeto(referido_dto, MapeadorReferido())
 
     def obtener_por_socio(self, idSocio: UUID) -> list:
         """Obtener todos los referidos de un socio específico"""
-        referidos_dto = db.session.query(Referido).filter_by(idSocio=str(idSocio)).all()
+        referidos_dto = sesion_lectura(db.session).query(Referido).filter_by(idSocio=str(idSocio)).all()
         print(f"Referidos DTO from DB para socio {idSocio}: {len(referidos_dto)} encontrados")
         return [self.fabrica_referidos.crear_objeto(dto, MapeadorReferido()) for dto in referidos_dto]
 
+    def iterar_por_socio(self, idSocio: UUID, estado: str = None, desde=None, hasta=None,
+                         despues: tuple = None, limite: int = None, lote: int = 1000):
+        """Filas proyectadas del socio en orden (fechaEvento, idEvento), leídas con un cursor del servidor.
+
+        ``despues`` es la llave (fechaEvento, idEvento) de la última fila de la página anterior.
+        """
+        consulta = select(*COLUMNAS_LISTADO).where(Referido.idSocio == str(idSocio))
+        if estado:
+            # El dominio guarda EstadoReferido ('CONFIRMADO') y los comandos 'confirmado'
+            consulta = consulta.where(func.lower(Referido.estado) == estado.lower())
+        if desde:
+            consulta = consulta.where(Referido.fechaEvento >= desde)
+        if hasta:
+            consulta = consulta.where(Referido.fechaEvento < hasta)
+        if despues:
+            consulta = consulta.where(tuple_(Referido.fechaEvento, Referido.idEvento) > tuple_(*despues))
+        consulta = consulta.order_by(Referido.fechaEvento, Referido.idEvento)
+        if limite:
+            consulta = consulta.limit(limite)
+        yield from sesion_lectura(db.session).execute(consulta.execution_options(yield_per=lote))
+
     def obtener_por_id_referido(self, idReferido: UUID) -> Referido:
         """Obtener un referido específico por su idReferido"""
         referido_dto = db.session.query(Referido).filter_by(idReferido=str(idReferido)).first()
@@ -56,30 +102,40 @@ class RepositorioReferidosPostgreSQL(RepositorioReferidos):
         return [self.fabrica_referidos.crear_objeto(dto, MapeadorReferido()) for dto in referidos_dto]
 
     def agregar(self, referido: Referido):
-        print("======================")
-        print(f"💾 [REPO] RepositorioReferidosPostgreSQL.agregar - Referido: {referido}")
-        print(f"💾 [REPO] ID: {referido.id}, idSocio: {referido.idSocio}, idReferido: {referido.idReferido}")
-        print("======================")
-        
-        try:
-            referido_dto = self.fabrica_referidos.crear_objeto(referido, MapeadorReferido())
-            print(f"🔄 [REPO] DTO creado: {referido_dto}")
-            print(f"🔄 [REPO] DTO.__dict__: {referido_dto.__dict__}")
-            
-            db.session.add(referido_dto)
-            print("✅ [REPO] Referido agregado a la sesión de BD")
-            
-        except Exception as e:
-            print(f"❌ [REPO] Error agregando referido: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
+        self.agregar_lote([referido])
+
+    def agregar_lote(self, referidos: list):
+        """Un solo INSERT masivo; la UoW agrupa aquí los agregar consecutivos."""
+        dtos = [self.fabrica_referidos.crear_objeto(referido, MapeadorReferido()) for referido in referidos]
+        db.session.execute(insert(Referido), [_fila(dto) for dto in dtos])
+        contadores.sumar(db.session, _llaves(dtos))
+        red.conectar_lote(db.session, _pares(dto for dto in dtos if not red.rechazado(dto.estado)))
 
     def actualizar(self, referido: Referido):
-        print(f"💾 [REPO] Actualizando referido: {referido}")
-        referido_dto = self.fabrica_referidos.crear_objeto(referido, MapeadorReferido())
-        print(f"💾 [REPO] DTO para actualizar: {referido_dto}")
-        db.session.merge(referido_dto) # Merge para actualizar
+        self.actualizar_lote([referido])
+
+    def actualizar_lote(self, referidos: list):
+        """UPDATE masivo por llave primaria, sin el SELECT previo de merge."""
+        dtos = [self.fabrica_referidos.crear_objeto(referido, MapeadorReferido()) for referido in referidos]
+        ahora = datetime.datetime.utcnow()
+        # Los contadores salen de las filas: se resta el estado anterior y se suma el nuevo
+        contadores.restar(db.session, _llaves(dtos))
+        db.session.execute(update(Referido), [{**_fila(dto), 'fecha_actualizacion': ahora} for dto in dtos])
+        contadores.sumar(db.session, _llaves(dtos))
+        for idSocio, idReferido in _pares(dto for dto in dtos if red.rechazado(dto.estado)):
+            red.desconectar(db.session, idSocio, idReferido)
+
+    def obtener_red(self, idSocio: str, profundidad: int = None) -> list:
+        """Socios de la red de idSocio hasta la profundidad dada, en orden (profundidad, idSocio)."""
+        return red.descendientes(sesion_lectura(db.session), str(idSocio), profundidad)
+
+    def resumir_red(self, idSocio: str, profundidad: int = None) -> list:
+        """Referidos activos y monto por nivel de la red de idSocio."""
+        return red.resumen(sesion_lectura(db.session), str(idSocio), profundidad)
+
+    def obtener_ranking(self, periodo: str, estado: str, orden: str = 'referidos', limite: int = 10) -> list:
+        """Top-K de socios por cantidad o monto de referidos del periodo y estado."""
+        return contadores.ranking(sesion_lectura(db.session), periodo, estado, orden, limite)
 
     def eliminar(self, referido_id: UUID):
         # Implementar lógica de eliminación si es necesario
@@ -39,6 +39,14 @@ class EventoRegistrado(EventoIntegracion):
     """
     data = EventoRegistradoPayload()
 
+class EventoEventoRegistrado(EventoIntegracion):
+    """
+    EventoRegistrado tal como lo publica eventosMS en el tópico eventos-tracking
+    (coreografía). El nombre del record debe ser el mismo del productor para
+    que Avro resuelva el esquema.
+    """
+    data = EventoRegistradoPayload()
+
 class VentaReferidaConfirmada(Record):
     """
     Evento publicado cuando una venta referida es confirmada
@@ -84,4 +84,17 @@ class ReferidoProcesado(EventoIntegracion):
     Tópico: comandos-transaccion
     """
     idTransaction = String(required=False)
-    data = ReferidoCommandPayload()
\ No newline at end of file
+    data = ReferidoCommandPayload()
+
+class PagoProcesado(Record):
+    """
+    Evento que publica pagos en el tópico eventos-pago.
+    En coreografía referidos lo oye para compensar su paso si el pago se rechaza.
+    """
+    idTransaction = String()
+    idPago = String()
+    idEvento = String()
+    idSocio = String()
+    monto = Float()
+    estado = String()
+    fechaEvento = String()
@@ -0,0 +1,190 @@
+"""Bus de eventos tipado del seedwork
+
+En este archivo usted encontrará el bus que reemplaza a pydispatcher para
+enrutar eventos de dominio e integración publicados por la unidad de trabajo.
+
+Los handlers se registran por tipo de evento y fase. La tabla tipo -> handlers
+se resuelve una sola vez por tipo (recorriendo el MRO) y se invalida al
+registrar un nuevo handler, de modo que publicar es una búsqueda en un dict.
+
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Fase(Enum):
+    DOMINIO = 'Dominio'
+    INTEGRACION = 'Integracion'
+
+
+@dataclass(frozen=True)
+class Suscripcion:
+    handler: Callable
+    asincrono: bool = False
+    en_segundo_plano: bool = False
+
+    @property
+    def nombre(self) -> str:
+        modulo = getattr(self.handler, '__module__', '')
+        return f"{modulo}.{getattr(self.handler, '__qualname__', repr(self.handler))}"
+
+
+@dataclass
+class MetricaHandler:
+    invocaciones: int = 0
+    errores: int = 0
+    tiempo_total_ms: float = 0.0
+    tiempo_max_ms: float = 0.0
+
+    def registrar(self, duracion_ms: float, error: bool = False):
+        self.invocaciones += 1
+        self.errores += int(error)
+        self.tiempo_total_ms += duracion_ms
+        self.tiempo_max_ms = max(self.tiempo_max_ms, duracion_ms)
+
+    def a_dict(self) -> dict:
+        promedio = self.tiempo_total_ms / self.invocaciones if self.invocaciones else 0.0
+        return dict(
+            invocaciones=self.invocaciones,
+            errores=self.errores,
+            tiempo_total_ms=round(self.tiempo_total_ms, 3),
+            tiempo_promedio_ms=round(promedio, 3),
+            tiempo_max_ms=round(self.tiempo_max_ms, 3),
+        )
+
+
+class BusEventos:
+    """Bus de eventos con tabla de despacho precalculada.
+
+    - Handlers síncronos y asíncronos (``async def``).
+    - Publicación por lotes de todos los eventos recolectados en una UoW.
+    - Descarga opcional a un pool de workers para que el fan-out no sume
+      su costo completo a la latencia del comando.
+    - Tiempos por handler disponibles en ``metricas()``. Los handlers en
+      segundo plano los registran desde varios hilos, así que se actualizan
+      y se leen bajo su propio lock.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._suscripciones: dict[tuple[type, Fase], list[Suscripcion]] = dict()
+        self._tabla: dict[tuple[type, Fase], tuple[Suscripcion, ...]] = dict()
+        self._metricas: dict[str, MetricaHandler] = dict()
+        self._lock = threading.Lock()
+        self._lock_metricas = threading.Lock()
+        self._max_workers = max_workers
+        self._pool: ThreadPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def suscribir(self, tipo_evento: type, handler, fase: Fase = Fase.INTEGRACION, en_segundo_plano: bool = False):
+        suscripcion = Suscripcion(
+            handler=handler,
+            asincrono=inspect.iscoroutinefunction(handler),
+            en_segundo_plano=en_segundo_plano
+        )
+        with self._lock:
+            self._suscripciones.setdefault((tipo_evento, fase), list()).append(suscripcion)
+            self._tabla = dict()
+
+    def handlers(self, tipo_evento: type, fase: Fase) -> tuple[Suscripcion, ...]:
+        llave = (tipo_evento, fase)
+        try:
+            return self._tabla[llave]
+        except KeyError:
+            pass
+
+        with self._lock:
+            resueltos = list()
+            for clase in inspect.getmro(tipo_evento):
+                resueltos.extend(self._suscripciones.get((clase, fase), ()))
+            self._tabla[llave] = tuple(resueltos)
+            return self._tabla[llave]
+
+    def publicar(self, evento, fase: Fase = Fase.INTEGRACION):
+        for suscripcion in self.handlers(type(evento), fase):
+            if suscripcion.en_segundo_plano:
+                self._obtener_pool().submit(self._ejecutar, suscripcion, evento)
+            else:
+                self._ejecutar(suscripcion, evento)
+
+    def publicar_lote(self, eventos: list, fase: Fase = Fase.INTEGRACION):
+        en_linea = list()
+        en_segundo_plano = list()
+        for evento in eventos:
+            for suscripcion in self.handlers(type(evento), fase):
+                destino = en_segundo_plano if suscripcion.en_segundo_plano else en_linea
+                destino.append((suscripcion, evento))
+
+        if en_segundo_plano:
+            self._obtener_pool().submit(self._ejecutar_lote, en_segundo_plano)
+        self._ejecutar_lote(en_linea)
+
+    def metricas(self) -> dict:
+        with self._lock_metricas:
+            return {nombre: metrica.a_dict() for nombre, metrica in self._metricas.items()}
+
+    def limpiar(self):
+        with self._lock:
+            self._suscripciones = dict()
+            self._tabla = dict()
+        with self._lock_metricas:
+            self._metricas = dict()
+
+    def cerrar(self):
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    def _ejecutar_lote(self, pendientes: list):
+        for suscripcion, evento in pendientes:
+            self._ejecutar(suscripcion, evento)
+
+    def _ejecutar(self, suscripcion: Suscripcion, evento):
+        inicio = time.perf_counter()
+        error = False
+        try:
+            if suscripcion.asincrono:
+                asyncio.run_coroutine_threadsafe(suscripcion.handler(evento), self._obtener_loop()).result()
+            else:
+                suscripcion.handler(evento)
+        except Exception:
+            error = True
+            logger.exception(f'ERROR: handler {suscripcion.nombre} falló con {type(evento).__name__}')
+            if not suscripcion.en_segundo_plano:
+                raise
+        finally:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            with self._lock_metricas:
+                self._metricas.setdefault(suscripcion.nombre, MetricaHandler()).registrar(duracion_ms, error)
+
+    def _obtener_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='bus-eventos')
+        return self._pool
+
+    def _obtener_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='bus-eventos-loop', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+
+bus = BusEventos(max_workers=int(os.getenv('BUS_EVENTOS_WORKERS', 4)))
@@ -0,0 +1,45 @@
+"""Caché LRU en memoria del seedwork
+
+En este archivo usted encontrará el LRU acotado y thread-safe que comparten
+la idempotencia de los consumidores y el enrutamiento de lecturas.
+
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    def __init__(self, capacidad: int = 10_000):
+        self._capacidad = capacidad
+        self._datos: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, llave, por_defecto=None):
+        with self._lock:
+            if llave not in self._datos:
+                return por_defecto
+            self._datos.move_to_end(llave)
+            return self._datos[llave]
+
+    def guardar(self, llave, valor=True):
+        with self._lock:
+            self._datos[llave] = valor
+            self._datos.move_to_end(llave)
+            if len(self._datos) > self._capacidad:
+                self._datos.popitem(last=False)
+
+    def eliminar(self, llave):
+        with self._lock:
+            self._datos.pop(llave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __contains__(self, llave) -> bool:
+        with self._lock:
+            return llave in self._datos
+
+    def __len__(self) -> int:
+        return len(self._datos)
@@ -0,0 +1,54 @@
+"""Caché de esquemas Avro del seedwork
+
+En este archivo usted encontrará el caché de esquemas Avro por clase Record,
+compartido por despachadores y consumidores.
+
+``AvroSchema(Record)`` recorre la clase para generar el esquema y fastavro lo
+vuelve a parsear en cada ``schemaless_writer``/``schemaless_reader``. Aquí el
+esquema se genera y se parsea una sola vez por clase, y los esquemas de
+escritura descargados del broker se parsean una sola vez por versión.
+
+"""
+
+import io
+from functools import lru_cache
+
+import fastavro
+from pulsar.schema import AvroSchema
+
+
+class AvroSchemaCompilado(AvroSchema):
+
+    def __init__(self, record_cls):
+        super().__init__(record_cls)
+        self._parseado = fastavro.parse_schema(self._schema)
+        self._escritores_parseados = dict()
+
+    def encode(self, obj):
+        self._validate_object_type(obj)
+        buffer = io.BytesIO()
+        fastavro.schemaless_writer(buffer, self._parseado, self.encode_dict(obj.__dict__))
+        return buffer.getvalue()
+
+    def _decode_bytes(self, data: bytes, writer_schema: dict):
+        buffer = io.BytesIO(data)
+        if writer_schema is self._schema:
+            d = fastavro.schemaless_reader(buffer, self._parseado, None)
+        else:
+            d = fastavro.schemaless_reader(buffer, self._escritor_parseado(writer_schema), self._parseado)
+        return self._record_cls(**d)
+
+    def _escritor_parseado(self, writer_schema: dict):
+        # Los esquemas de escritura quedan cacheados por tópico y versión en
+        # AvroSchema, así que su identidad es estable
+        parseado = self._escritores_parseados.get(id(writer_schema))
+        if parseado is None:
+            writer_schema['name'] = self._schema['name']
+            parseado = fastavro.parse_schema(writer_schema)
+            self._escritores_parseados[id(writer_schema)] = parseado
+        return parseado
+
+
+@lru_cache(maxsize=None)
+def esquema_avro(record_cls) -> AvroSchemaCompilado:
+    return AvroSchemaCompilado(record_cls)
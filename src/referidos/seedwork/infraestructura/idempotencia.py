@@ -0,0 +1,77 @@
+"""Idempotencia del lado del consumidor
+
+En este archivo usted encontrará el almacén que evita re-ejecutar mensajes
+redespachados por Pulsar (redeliveries, redeploys o suscripciones nuevas que
+arrancan con InitialPosition.Earliest).
+
+La llave de un mensaje es (suscripción, idTransaction + paso) cuando el mensaje
+trae una transacción de negocio, o (suscripción, messageId) en caso contrario.
+
+Orden de consulta:
+1. LRU en memoria con las llaves procesadas recientemente. Al arrancar se
+   calienta con las llaves más recientes de la tabla, que son las que un
+   redespacho tiene más probabilidad de repetir.
+2. Tabla de mensajes procesados (repositorio concreto de cada servicio). Un
+   "no está" del LRU siempre se confirma aquí: con suscripciones Shared el
+   mensaje pudo procesarlo otra réplica.
+
+"""
+
+import logging
+from abc import ABC, abstractmethod
+
+from seedwork.infraestructura.cache import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+
+def llave_mensaje(suscripcion: str, mensaje=None, id_transaction: str = None, paso: str = None) -> str:
+    if id_transaction and paso:
+        return f'{suscripcion}|{id_transaction}|{paso}'
+    return f'{suscripcion}|{mensaje.message_id()}'
+
+
+class RepositorioMensajesProcesados(ABC):
+
+    @abstractmethod
+    def existe(self, llave: str) -> bool:
+        ...
+
+    @abstractmethod
+    def registrar(self, llave: str, suscripcion: str) -> bool:
+        """Registra la llave. Retorna False si ya estaba registrada."""
+        ...
+
+    @abstractmethod
+    def llaves(self, limite: int) -> list[str]:
+        """Las ``limite`` llaves más recientes, de la más nueva a la más antigua."""
+        ...
+
+
+class AlmacenIdempotencia:
+
+    def __init__(self, repositorio: RepositorioMensajesProcesados, capacidad_lru: int = 10_000):
+        self._repositorio = repositorio
+        self._capacidad_lru = capacidad_lru
+        self._lru = CacheLRU(capacidad_lru)
+
+    def calentar(self):
+        """Carga en el LRU las llaves procesadas más recientes."""
+        llaves = self._repositorio.llaves(self._capacidad_lru)
+        # De la más antigua a la más nueva: la más reciente es la última en salir del LRU
+        for llave in reversed(llaves):
+            self._lru.guardar(llave)
+        logger.info(f'Idempotencia: {len(llaves)} llaves recientes cargadas en el LRU')
+
+    def ya_procesado(self, llave: str) -> bool:
+        if llave in self._lru:
+            return True
+        if self._repositorio.existe(llave):
+            self._lru.guardar(llave)
+            return True
+        return False
+
+    def marcar_procesado(self, llave: str, suscripcion: str) -> bool:
+        nuevo = self._repositorio.registrar(llave, suscripcion)
+        self._lru.guardar(llave)
+        return nuevo
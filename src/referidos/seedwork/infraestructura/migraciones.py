@@ -0,0 +1,81 @@
+"""Migraciones de esquema del seedwork
+
+En este archivo usted encontrará el migrador que aplica, en orden y una sola
+vez, los cambios de esquema que ``create_all`` no hace sobre tablas que ya
+existen (índices nuevos, columnas, backfills).
+
+- Cada migración tiene una versión entera y corre en su propia transacción
+  junto con el registro de su versión en ``esquema_migraciones``.
+- En PostgreSQL se toma un advisory lock de la transacción, así varias
+  réplicas que arrancan a la vez no aplican la misma migración dos veces.
+- Las migraciones deben ser idempotentes (``IF NOT EXISTS``/``checkfirst``):
+  en una base nueva ``create_all`` ya creó lo que declaran los modelos.
+
+"""
+
+import logging
+import datetime
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+LOCK_MIGRACIONES = 0x6d696772  # 'migr'
+
+_metadata = MetaData()
+esquema_migraciones = Table(
+    'esquema_migraciones', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('descripcion', String(255), nullable=False),
+    Column('fecha_aplicada', DateTime, nullable=False)
+)
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: int
+    descripcion: str
+    aplicar: Callable[[Connection], None]
+
+
+class Migrador:
+
+    def __init__(self, engine: Engine, migraciones: list[Migracion]):
+        versiones = [migracion.version for migracion in migraciones]
+        if len(set(versiones)) != len(versiones):
+            raise ValueError(f'Versiones de migración repetidas: {versiones}')
+        self._engine = engine
+        self._migraciones = sorted(migraciones, key=lambda migracion: migracion.version)
+
+    def aplicadas(self) -> set[int]:
+        _metadata.create_all(self._engine)
+        with self._engine.connect() as conexion:
+            return set(conexion.execute(select(esquema_migraciones.c.version)).scalars())
+
+    def pendientes(self) -> list[Migracion]:
+        aplicadas = self.aplicadas()
+        return [migracion for migracion in self._migraciones if migracion.version not in aplicadas]
+
+    def migrar(self) -> list[int]:
+        """Aplica las migraciones pendientes. Retorna las versiones aplicadas."""
+        aplicadas = []
+        for migracion in self.pendientes():
+            with self._engine.begin() as conexion:
+                if conexion.dialect.name == 'postgresql':
+                    conexion.execute(text('SELECT pg_advisory_xact_lock(:lock)'), {'lock': LOCK_MIGRACIONES})
+                    # Otra réplica pudo aplicarla mientras se esperaba el lock
+                    if conexion.execute(select(esquema_migraciones.c.version)
+                                        .where(esquema_migraciones.c.version == migracion.version)).first():
+                        continue
+                migracion.aplicar(conexion)
+                conexion.execute(esquema_migraciones.insert().values(
+                    version=migracion.version,
+                    descripcion=migracion.descripcion,
+                    fecha_aplicada=datetime.datetime.utcnow()
+                ))
+            logger.info(f'Migración {migracion.version} aplicada: {migracion.descripcion}')
+            aplicadas.append(migracion.version)
+        return aplicadas
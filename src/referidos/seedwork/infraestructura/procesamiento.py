@@ -0,0 +1,83 @@
+"""Procesamiento concurrente y ordenado de mensajes del seedwork
+
+En este archivo usted encontrará el procesador que reparte los mensajes de un
+consumidor entre un pool de hilos sin perder el orden por llave de negocio.
+
+- Cada llave (p.ej. idSocio) se asigna siempre al mismo hilo, que procesa su
+  cola en orden de llegada: dos mensajes del mismo socio nunca corren en
+  paralelo ni se reordenan. Llaves distintas avanzan en paralelo.
+- Esto ordena dentro de un proceso. Entre réplicas el orden lo da la
+  suscripción Key_Shared (ver seedwork.infraestructura.suscripciones), que
+  entrega cada llave a una sola réplica.
+- El trabajo en vuelo está acotado: ``enviar`` bloquea al hilo receptor
+  cuando se alcanza el máximo, así el prefetch del consumidor hace de buffer
+  y la memoria no crece sin límite.
+- La tarea confirma (ack) su mensaje al terminar; el procesador sólo libera
+  el cupo.
+
+"""
+
+import zlib
+import queue
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Optional
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+class ProcesadorOrdenado:
+
+    def __init__(self, workers: int = 8, max_en_vuelo: int = 100,
+                 contexto: Callable[[], ContextManager] = nullcontext, nombre: str = 'procesador'):
+        self._colas = [queue.Queue() for _ in range(max(1, workers))]
+        self._cupos = threading.BoundedSemaphore(max(1, max_en_vuelo))
+        self._contexto = contexto
+        self._hilos = [
+            threading.Thread(target=self._trabajar, args=(cola,), daemon=True, name=f'{nombre}-{i}')
+            for i, cola in enumerate(self._colas)
+        ]
+        self.metricas = {'procesados': 0, 'fallidos': 0}
+        self._lock_metricas = threading.Lock()
+
+    def iniciar(self):
+        for hilo in self._hilos:
+            hilo.start()
+        return self
+
+    def _cola(self, llave: Optional[str]) -> queue.Queue:
+        if not llave:
+            return min(self._colas, key=queue.Queue.qsize)  # Sin llave no hay orden que preservar
+        return self._colas[zlib.crc32(llave.encode('utf-8')) % len(self._colas)]
+
+    def enviar(self, llave: Optional[str], tarea: Callable[[], None]):
+        """Encola la tarea en el hilo de su llave; bloquea si no hay cupo en vuelo."""
+        self._cupos.acquire()
+        self._cola(llave).put(tarea)
+
+    def _trabajar(self, cola: queue.Queue):
+        with self._contexto():
+            while True:
+                tarea = cola.get()
+                if tarea is _FIN:
+                    return
+                try:
+                    tarea()
+                    resultado = 'procesados'
+                except Exception as e:
+                    resultado = 'fallidos'
+                    logger.error(f'Error procesando mensaje: {e}')
+                finally:
+                    self._cupos.release()
+                with self._lock_metricas:
+                    self.metricas[resultado] += 1
+
+    def cerrar(self, timeout_segundos: float = 30.0):
+        """Termina lo encolado y detiene los hilos."""
+        for cola in self._colas:
+            cola.put(_FIN)
+        for hilo in self._hilos:
+            hilo.join(timeout_segundos)
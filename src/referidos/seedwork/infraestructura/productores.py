@@ -0,0 +1,218 @@
+"""Pool de productores Pulsar del seedwork
+
+En este archivo usted encontrará el pool de productores de larga vida que
+comparten los despachadores de un proceso: un solo cliente y un producer por
+(tópico, clase Record), creados la primera vez que se usan.
+
+Los mensajes salen con ``send_async``: el despachador no espera el handshake
+ni la confirmación del broker, y el batching del producer agrupa los envíos
+de varios despachos.
+
+Un envío fallido no se pierde:
+- Si ``send_async`` lo rechaza o el callback reporta error, el mensaje queda
+  en una cola en memoria. El callback corre en un hilo del cliente de Pulsar
+  y no toca la base de datos.
+- Un hilo de reenvío pasa esa cola al almacén de desborde (outbox del
+  servicio), reenvía lo desbordado y lo confirma en el almacén sólo cuando el
+  broker lo acepta.
+
+"""
+
+import logging
+import queue
+import threading
+from abc import ABC, abstractmethod
+from itertools import count
+from typing import Any, Callable
+
+from pulsar import Result
+
+from seedwork.infraestructura.esquemas import esquema_avro
+
+logger = logging.getLogger(__name__)
+
+
+class AlmacenDesborde(ABC):
+
+    @abstractmethod
+    def guardar(self, topico: str, mensaje):
+        ...
+
+    @abstractmethod
+    def pendientes(self, limite: int) -> list[tuple[Any, str, Any]]:
+        """Retorna tuplas (id, tópico, mensaje) en orden de llegada."""
+        ...
+
+    @abstractmethod
+    def confirmar(self, id_desborde):
+        ...
+
+
+class DesbordeEnMemoria(AlmacenDesborde):
+    """Desborde del proceso: reintenta, pero no sobrevive a un reinicio."""
+
+    def __init__(self):
+        self._mensajes = dict()
+        self._ids = count()
+        self._lock = threading.Lock()
+
+    def guardar(self, topico, mensaje):
+        with self._lock:
+            self._mensajes[next(self._ids)] = (topico, mensaje)
+
+    def pendientes(self, limite):
+        with self._lock:
+            return [(id_desborde, topico, mensaje)
+                    for id_desborde, (topico, mensaje) in list(self._mensajes.items())[:limite]]
+
+    def confirmar(self, id_desborde):
+        with self._lock:
+            self._mensajes.pop(id_desborde, None)
+
+    def __len__(self) -> int:
+        return len(self._mensajes)
+
+
+class PoolProductores:
+
+    def __init__(self, crear_cliente: Callable, producer_config: dict, desborde: AlmacenDesborde = None,
+                 intervalo_reenvio_segundos: float = 5.0, lote_reenvio: int = 100):
+        self._crear_cliente = crear_cliente
+        self._producer_config = producer_config
+        self._desborde = desborde if desborde is not None else DesbordeEnMemoria()
+        self._intervalo_reenvio = intervalo_reenvio_segundos
+        self._lote_reenvio = lote_reenvio
+        self._cliente = None
+        self._productores = dict()
+        self._fallidos = queue.SimpleQueue()  # (tópico, mensaje) por desbordar
+        self._confirmados = queue.SimpleQueue()  # ids del desborde aceptados por el broker
+        self._reenviando = set()
+        self._lock = threading.Lock()
+        self._lock_reenvio = threading.Lock()
+        self._lock_metricas = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self.metricas = {'enviados': 0, 'fallidos': 0, 'desbordados': 0, 'reenviados': 0}
+
+    def _contar(self, metrica: str, cantidad: int = 1):
+        with self._lock_metricas:
+            self.metricas[metrica] += cantidad
+
+    def producer(self, topico: str, record_cls):
+        llave = (topico, record_cls)
+        producer = self._productores.get(llave)
+        if producer is None:
+            with self._lock:
+                producer = self._productores.get(llave)
+                if producer is None:
+                    if self._cliente is None:
+                        self._cliente = self._crear_cliente()
+                    producer = self._cliente.create_producer(
+                        topico, schema=esquema_avro(record_cls), **self._producer_config
+                    )
+                    self._productores[llave] = producer
+        return producer
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._ciclo_reenvio, daemon=True, name='reenvio-productores')
+            self._hilo.start()
+        return self
+
+    def publicar(self, mensaje, topico: str):
+        self._enviar(topico, mensaje, al_fallar=lambda: self._fallidos.put((topico, mensaje)))
+
+    def _enviar(self, topico: str, mensaje, al_fallar: Callable, al_confirmar: Callable = None) -> bool:
+        def callback(resultado, _id_mensaje):
+            if resultado == Result.Ok:
+                self._contar('enviados')
+                if al_confirmar:
+                    al_confirmar()
+            else:
+                self._contar('fallidos')
+                logger.error(f'Envío fallido a {topico} ({resultado}): {mensaje.__class__.__name__}')
+                al_fallar()
+
+        try:
+            self.producer(topico, mensaje.__class__).send_async(mensaje, callback)
+            return True
+        except Exception as e:
+            self._contar('fallidos')
+            logger.error(f'send_async rechazado para {topico}: {e}')
+            al_fallar()
+            return False
+
+    def _desbordar_fallidos(self):
+        while True:
+            try:
+                topico, mensaje = self._fallidos.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._desborde.guardar(topico, mensaje)
+                self._contar('desbordados')
+            except Exception as e:
+                logger.error(f'No se pudo guardar en el desborde {topico}: {e}')
+                self._fallidos.put((topico, mensaje))
+                return
+
+    def _confirmar_reenviados(self):
+        while True:
+            try:
+                id_desborde = self._confirmados.get_nowait()
+            except queue.Empty:
+                return
+            self._desborde.confirmar(id_desborde)
+            self._contar('reenviados')
+            with self._lock_reenvio:
+                self._reenviando.discard(id_desborde)
+
+    def reenviar_desborde(self) -> int:
+        """Un ciclo del hilo de reenvío: desborda, confirma y reenvía."""
+        self._desbordar_fallidos()
+        self._confirmar_reenviados()
+        reenviados = 0
+        for id_desborde, topico, mensaje in self._desborde.pendientes(self._lote_reenvio):
+            with self._lock_reenvio:
+                if id_desborde in self._reenviando:
+                    continue
+                self._reenviando.add(id_desborde)
+
+            def liberar(id_desborde=id_desborde):
+                with self._lock_reenvio:
+                    self._reenviando.discard(id_desborde)
+
+            if not self._enviar(topico, mensaje, al_fallar=liberar,
+                                al_confirmar=lambda id_desborde=id_desborde: self._confirmados.put(id_desborde)):
+                break
+            reenviados += 1
+        return reenviados
+
+    def _ciclo_reenvio(self):
+        while not self._detener.wait(self._intervalo_reenvio):
+            try:
+                self.reenviar_desborde()
+            except Exception as e:
+                logger.error(f'Error reenviando desborde: {e}')
+
+    def flush(self):
+        for producer in list(self._productores.values()):
+            try:
+                producer.flush()
+            except Exception as e:
+                logger.warning(f'Error en flush del producer: {e}')
+
+    def cerrar(self):
+        self._detener.set()
+        # El flush espera los callbacks del cliente; no se hace bajo el lock
+        self.flush()
+        with self._lock:
+            for producer in self._productores.values():
+                producer.close()
+            self._productores.clear()
+            if self._cliente is not None:
+                self._cliente.close()
+                self._cliente = None
+        # Lo que falló hasta el cierre queda en el desborde para el próximo arranque
+        self._desbordar_fallidos()
+        self._confirmar_reenviados()
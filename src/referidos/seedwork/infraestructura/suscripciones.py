@@ -0,0 +1,136 @@
+"""Suscripciones compartidas del seedwork
+
+En este archivo usted encontrará el consumidor que atiende todos los tópicos de
+un servicio con un solo cliente de Pulsar y sin un hilo bloqueado por tópico.
+
+- Cada tópico se registra con su clase Record, su manejador y la llave de
+  orden (p.ej. idSocio). Los mensajes llegan por ``message_listener`` a los
+  hilos del propio cliente, se decodifican con el esquema del tópico y se
+  entregan al ProcesadorOrdenado, que los ejecuta y los confirma.
+- Los tópicos con llave se consumen con Key_Shared: el broker entrega todos
+  los mensajes de una llave a la misma réplica, así el orden por llave del
+  ProcesadorOrdenado se mantiene entre réplicas. Requiere que el productor
+  publique con esa llave (``partition_key``) y, si agrupa en lotes, con
+  batching por llave.
+- Los tópicos legacy se drenan sin deserializar ni imprimir: consumidor
+  Failover con acks acumulativos, que el cliente agrupa en un solo ack por
+  intervalo, y un prefetch pequeño.
+- Cada tópico conserva su propia suscripción, así no quedan cursores ni
+  backlog huérfanos al migrar.
+
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import _pulsar
+from pulsar import ConsumerKeySharedPolicy, KeySharedMode
+
+from seedwork.infraestructura.esquemas import esquema_avro
+from seedwork.infraestructura.procesamiento import ProcesadorOrdenado
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_LEGACY = 100
+REINTENTO_SEGUNDOS = 30.0
+
+
+@dataclass
+class Registro:
+    topico: str
+    suscripcion: str
+    record_cls: Optional[type] = None
+    manejador: Optional[Callable] = None  # (consumidor, mensaje, valor)
+    llave: Optional[Callable] = None  # valor -> llave de orden
+
+    @property
+    def legacy(self) -> bool:
+        return self.manejador is None
+
+
+class ConsumidorCompartido:
+
+    def __init__(self, crear_cliente: Callable, procesador: ProcesadorOrdenado, opciones_consumidor: dict = None):
+        self._crear_cliente = crear_cliente
+        self._procesador = procesador
+        self._opciones = opciones_consumidor or dict()
+        self._registros: list[Registro] = list()
+        self._consumidores = dict()
+        self._cliente = None
+        self._lock = threading.Lock()
+
+    def registrar(self, topico: str, suscripcion: str, record_cls, manejador: Callable, llave: Callable = None):
+        self._registros.append(Registro(topico, suscripcion, record_cls, manejador, llave))
+
+    def drenar(self, topico: str, suscripcion: str):
+        self._registros.append(Registro(topico, suscripcion))
+
+    def iniciar(self):
+        self._procesador.iniciar()
+        self._cliente = self._crear_cliente()
+        for registro in self._registros:
+            self._suscribir(registro)
+        return self
+
+    def _suscribir(self, registro: Registro):
+        try:
+            if registro.legacy:
+                consumidor = self._cliente.subscribe(
+                    registro.topico, registro.suscripcion,
+                    consumer_type=_pulsar.ConsumerType.Failover,
+                    receiver_queue_size=PREFETCH_LEGACY,
+                    message_listener=lambda consumidor, mensaje: consumidor.acknowledge_cumulative(mensaje)
+                )
+            elif registro.llave:
+                consumidor = self._cliente.subscribe(
+                    registro.topico, registro.suscripcion,
+                    consumer_type=_pulsar.ConsumerType.KeyShared,
+                    key_shared_policy=ConsumerKeySharedPolicy(KeySharedMode.AutoSplit,
+                                                              allow_out_of_order_delivery=False),
+                    schema=esquema_avro(registro.record_cls),
+                    message_listener=self._escuchar(registro),
+                    **self._opciones
+                )
+            else:
+                consumidor = self._cliente.subscribe(
+                    registro.topico, registro.suscripcion,
+                    consumer_type=_pulsar.ConsumerType.Shared,
+                    schema=esquema_avro(registro.record_cls),
+                    message_listener=self._escuchar(registro),
+                    **self._opciones
+                )
+        except Exception as e:
+            # p.ej. réplicas anteriores aún conectadas a la suscripción con otro tipo
+            logger.error(f'No se pudo suscribir a {registro.topico} ({registro.suscripcion}), '
+                         f'reintento en {REINTENTO_SEGUNDOS:.0f}s: {e}')
+            temporizador = threading.Timer(REINTENTO_SEGUNDOS, self._suscribir, args=(registro,))
+            temporizador.daemon = True
+            temporizador.start()
+            return
+        with self._lock:
+            self._consumidores[registro.topico] = consumidor
+        print(f"🔄 Suscrito a {registro.topico} ({registro.suscripcion}{', drenado' if registro.legacy else ''})")
+
+    def _escuchar(self, registro: Registro):
+        def listener(consumidor, mensaje):
+            try:
+                valor = mensaje.value()
+            except Exception as e:
+                logger.error(f'Mensaje de {registro.topico} no decodificable, se descarta: {e}')
+                consumidor.acknowledge(mensaje)
+                return
+            llave = registro.llave(valor) if registro.llave else None
+            self._procesador.enviar(llave, lambda: registro.manejador(consumidor, mensaje, valor))
+        return listener
+
+    def cerrar(self):
+        self._procesador.cerrar()
+        with self._lock:
+            for consumidor in self._consumidores.values():
+                consumidor.close()
+            self._consumidores.clear()
+        if self._cliente is not None:
+            self._cliente.close()
+            self._cliente = None
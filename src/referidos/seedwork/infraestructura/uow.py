@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from enum import Enum
 
 from seedwork.dominio.entidades import AgregacionRaiz
-from pydispatch import dispatcher
+from seedwork.infraestructura.bus import bus, Fase
 
 import pickle
 
@@ -28,11 +28,15 @@ class UnidadTrabajo(ABC):
 
     def _obtener_eventos(self, batches=None):
         batches = self.batches if batches is None else batches
+        eventos = list()
+        # Un agregado registrado en varios batches publica sus eventos una sola vez
+        agregados = set()
         for batch in batches:
             for arg in batch.args:
-                if isinstance(arg, AgregacionRaiz):
-                    return arg.eventos
-        return list()
+                if isinstance(arg, AgregacionRaiz) and id(arg) not in agregados:
+                    agregados.add(id(arg))
+                    eventos += arg.eventos
+        return eventos
 
     @abstractmethod
     def _limpiar_batches(self):
@@ -64,12 +68,10 @@ class UnidadTrabajo(ABC):
         self._publicar_eventos_dominio(batch)
 
     def _publicar_eventos_dominio(self, batch):
-        for evento in self._obtener_eventos(batches=[batch]):
-            dispatcher.send(signal=f'{type(evento).__name__}Dominio', evento=evento)
+        bus.publicar_lote(self._obtener_eventos(batches=[batch]), Fase.DOMINIO)
 
     def _publicar_eventos_post_commit(self):
-        for evento in self._obtener_eventos():
-            dispatcher.send(signal=f'{type(evento).__name__}Integracion', evento=evento)
+        bus.publicar_lote(self._obtener_eventos(), Fase.INTEGRACION)
 
 def is_flask():
     try:
@@ -0,0 +1,147 @@
+"""
+Consumidor de referidos: el módulo importa, el consumidor compartido se arma
+con todos los tópicos sobre un cliente falso y la compensación por pago
+rechazado sólo actualiza referidos existentes.
+"""
+import datetime
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+
+from config.db import db
+import config.idempotencia
+import modulos.referidos.infraestructura.consumidores as consumidores
+from modulos.referidos.infraestructura.schema.v1.eventos_tracking import EventoEventoRegistrado, EventoRegistradoPayload
+from modulos.referidos.dominio.entidades import Referido
+from modulos.referidos.infraestructura.despachadores import Despachador
+from modulos.referidos.infraestructura.dto import Referido as ReferidoDTO
+from modulos.referidos.infraestructura.repositorios import RepositorioReferidosPostgreSQL
+from seedwork.infraestructura.esquemas import esquema_avro
+
+
+class ClienteFalso:
+    def __init__(self):
+        self.suscripciones = {}
+        self.cerrado = False
+
+    def subscribe(self, topico, suscripcion, **opciones):
+        consumidor = ConsumidorFalso()
+        self.suscripciones[topico] = (suscripcion, opciones, consumidor)
+        return consumidor
+
+    def close(self):
+        self.cerrado = True
+
+
+class ConsumidorFalso:
+    def __init__(self):
+        self.acks, self.acks_acumulativos, self.cerrado = [], [], False
+
+    def acknowledge(self, mensaje):
+        self.acks.append(mensaje)
+
+    def acknowledge_cumulative(self, mensaje):
+        self.acks_acumulativos.append(mensaje)
+
+    def close(self):
+        self.cerrado = True
+
+
+@pytest.fixture
+def app(app, monkeypatch):
+    # Cada prueba arma su propio almacén de idempotencia sobre la base de la prueba
+    monkeypatch.setattr(config.idempotencia, '_almacen', None)
+    return app
+
+
+def test_evento_registrado_coincide_con_el_productor():
+    # eventosMS publica eventos-tracking con el record EventoEventoRegistrado
+    esquema = esquema_avro(EventoEventoRegistrado)
+    assert EventoEventoRegistrado.schema()['name'] == 'EventoEventoRegistrado'
+    evento = EventoEventoRegistrado(data=EventoRegistradoPayload(idTransaction='t-1', idEvento='e-1', tipoEvento='venta_creada',
+                                                                 idReferido='r-1', idSocio='s-1', monto=10.0,
+                                                                 estado='pendiente', fechaEvento='2025-01-01T00:00:00Z'))
+    assert esquema.decode(esquema.encode(evento)).data.idSocio == 's-1'
+
+
+@pytest.mark.parametrize('coreografia, topicos', [
+    (False, {'comando-referido', 'comandos-eventos', 'comandos-referidos'}),
+    (True, {'comando-referido', 'eventos-tracking', 'eventos-pago', 'comandos-eventos', 'comandos-referidos'}),
+])
+def test_crear_consumidor(app, monkeypatch, coreografia, topicos):
+    cliente = ClienteFalso()
+    monkeypatch.setattr(consumidores.pulsar, 'Client', lambda **_: cliente)
+
+    consumidor = consumidores.crear_consumidor(app, coreografia=coreografia).iniciar()
+    try:
+        assert set(cliente.suscripciones) == topicos
+        assert cliente.suscripciones['comando-referido'][0] == 'referidos-sub-comando-referido'
+        # Orden por idSocio entre réplicas: Key_Shared en los tópicos con llave
+        assert cliente.suscripciones['comando-referido'][1]['consumer_type'] == consumidores._pulsar.ConsumerType.KeyShared
+        assert cliente.suscripciones['comandos-eventos'][1]['consumer_type'] == consumidores._pulsar.ConsumerType.Failover
+    finally:
+        consumidor.cerrar()
+    assert cliente.cerrado
+
+
+class MensajeFalso:
+    def message_id(self):
+        return 'm-1'
+
+
+def _pago_rechazado(idEvento):
+    from modulos.referidos.infraestructura.schema.v2.eventos_tracking import PagoProcesado
+    return PagoProcesado(idTransaction='t-1', idPago='p-1', idEvento=idEvento, idSocio=str(uuid.uuid4()), monto=10.0,
+                         fechaEvento='2025-01-01T00:00:00Z', estado='rechazado')
+
+
+@pytest.fixture
+def compensacion(app, monkeypatch):
+    publicados = []
+    monkeypatch.setattr(Despachador, 'publicar_referido_procesado',
+                        lambda self, datos, estado: publicados.append(estado))
+    consumidor = MagicMock()
+    return consumidor, publicados
+
+
+def test_pago_rechazado_compensa_el_referido_existente(compensacion):
+    consumidor, publicados = compensacion
+    referido = Referido(idSocio=uuid.uuid4(), idReferido=uuid.uuid4(), idEvento=uuid.uuid4(), monto=10.0,
+                        estado='pendiente', fechaEvento=datetime.datetime(2025, 1, 1), tipoEvento='venta_creada')
+    RepositorioReferidosPostgreSQL().agregar(referido)
+    db.session.commit()
+
+    consumidores.procesar_evento_pago_coreografia(consumidor, MensajeFalso(), _pago_rechazado(str(referido.idEvento)),
+                                                  MagicMock(ya_procesado=lambda _: False))
+
+    assert db.session.query(ReferidoDTO.estado).scalar() == 'RECHAZADO'
+    assert publicados == []
+    consumidor.acknowledge.assert_called_once()
+
+
+def test_pago_rechazado_sin_referido_no_crea_ni_confirma(compensacion):
+    consumidor, publicados = compensacion
+
+    consumidores.procesar_evento_pago_coreografia(consumidor, MensajeFalso(), _pago_rechazado(str(uuid.uuid4())),
+                                                  MagicMock(ya_procesado=lambda _: False))
+
+    assert db.session.query(ReferidoDTO).count() == 0
+    assert publicados == []
+    consumidor.acknowledge.assert_called_once()
+
+
+def test_pago_rechazado_con_falla_de_bd_se_reentrega(compensacion, monkeypatch):
+    consumidor, publicados = compensacion
+    monkeypatch.setattr(RepositorioReferidosPostgreSQL, 'obtener_por_id_evento',
+                        MagicMock(side_effect=RuntimeError('conexión perdida')))
+    idempotencia = MagicMock(ya_procesado=lambda _: False)
+
+    consumidores.procesar_evento_pago_coreografia(consumidor, MensajeFalso(), _pago_rechazado(str(uuid.uuid4())),
+                                                  idempotencia)
+
+    assert db.session.query(ReferidoDTO).count() == 0
+    assert publicados == []
+    consumidor.negative_acknowledge.assert_called_once()
+    consumidor.acknowledge.assert_not_called()
+    idempotencia.marcar_procesado.assert_not_called()
@@ -0,0 +1,64 @@
+"""
+Contadores por socio: se mantienen en la misma transacción que los referidos
+y el ranking top-K sale del índice ordenado.
+"""
+import datetime
+import uuid
+import pytest
+from sqlalchemy import text
+
+from config.db import db
+from config.uow import UnidadTrabajoSQLAlchemy
+from modulos.referidos.dominio.entidades import Referido
+from modulos.referidos.dominio.objetos_valor import EstadoReferido
+from modulos.referidos.infraestructura import contadores
+from modulos.referidos.infraestructura.repositorios import RepositorioReferidosPostgreSQL
+
+
+def _referidos(idSocio, montos, mes=1):
+    return [Referido(idSocio=idSocio, idReferido=uuid.uuid4(), idEvento=uuid.uuid4(), monto=monto, estado='confirmado',
+                     fechaEvento=datetime.datetime(2025, mes, 10), tipoEvento='venta_creada') for monto in montos]
+
+
+def _commit(operacion, referidos):
+    uow = UnidadTrabajoSQLAlchemy()
+    with uow:
+        for referido in referidos:
+            uow.registrar_batch(operacion, referido)
+        uow.commit()
+
+
+def _ranking(repositorio, periodo='2025-01', orden='referidos'):
+    return [(fila.idSocio, fila.referidos, fila.monto) for fila in repositorio.obtener_ranking(periodo, 'CONFIRMADO', orden)]
+
+
+def test_contadores_y_ranking(app):
+    repositorio = RepositorioReferidosPostgreSQL()
+    a, b = str(uuid.uuid4()), str(uuid.uuid4())
+    referidos_a = _referidos(a, [10.0, 10.0, 10.0])
+    _commit(repositorio.agregar, referidos_a + _referidos(b, [100.0]) + _referidos(b, [5.0], mes=2))
+
+    assert _ranking(repositorio) == [(a, 3, 30.0), (b, 1, 100.0)]
+    assert _ranking(repositorio, orden='monto') == [(b, 1, 100.0), (a, 3, 30.0)]
+    assert _ranking(repositorio, periodo='total') == [(a, 3, 30.0), (b, 2, 105.0)]
+
+    # Un cambio de estado mueve el referido de contador en la misma transacción
+    referidos_a[0].estado = EstadoReferido.RECHAZADO
+    referidos_a[1].estado = EstadoReferido.RECHAZADO
+    _commit(repositorio.actualizar, referidos_a[:2])
+    assert sorted(_ranking(repositorio)) == sorted([(a, 1, 10.0), (b, 1, 100.0)])
+    assert [(f.idSocio, f.referidos) for f in repositorio.obtener_ranking('2025-01', 'rechazado')] == [(a, 2)]
+
+    # La reconstrucción desde los referidos da los mismos contadores
+    antes = db.session.execute(text('SELECT * FROM contadores_referidos WHERE referidos > 0 ORDER BY 1, 2, 3')).all()
+    contadores.reconstruir(db.session)
+    assert db.session.execute(text('SELECT * FROM contadores_referidos ORDER BY 1, 2, 3')).all() == antes
+
+
+def test_ranking_usa_el_indice_ordenado(app):
+    for orden in contadores.ORDENES:
+        plan = ' '.join(str(fila[-1]) for fila in db.session.execute(text(
+            f'EXPLAIN QUERY PLAN SELECT "idSocio" FROM contadores_referidos '
+            f"WHERE periodo = '2025-01' AND estado = 'confirmado' AND {orden} > 0 "
+            f'ORDER BY {orden} DESC, "idSocio" DESC LIMIT 10')))
+        assert f'ix_contadores_ranking_{orden}' in plan and 'TEMP B-TREE' not in plan
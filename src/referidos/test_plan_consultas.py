@@ -0,0 +1,81 @@
+"""
+Regresión de planes de consulta: cada búsqueda del repositorio de referidos
+debe resolverse con un índice, nunca con un recorrido completo de la tabla.
+"""
+import datetime
+import pytest
+
+from config.db import db
+from config.migraciones import MIGRACIONES, aplicar_migraciones
+from modulos.referidos.infraestructura.dto import Referido
+from modulos.referidos.infraestructura.repositorios import RepositorioReferidosPostgreSQL
+
+
+@pytest.fixture
+def app(app):
+    # Base previa a los índices: los agrega la migración
+    for indice in ('ix_referidos_id_evento', 'ix_referidos_id_referido'):
+        db.session.execute(db.text(f'DROP INDEX {indice}'))
+    db.session.commit()
+    return app
+
+
+@pytest.fixture
+def planes(capturar_sentencias, plan_sqlite):
+    """Ejecuta la consulta y retorna el plan de cada SELECT sobre referidos que emitió."""
+    def planes(consulta) -> list[str]:
+        with capturar_sentencias() as sentencias:
+            try:
+                consulta()
+            except ValueError:
+                pass  # No encontrado: sólo interesa el plan
+        selects = [(sentencia, parametros) for sentencia, parametros in sentencias
+                   if sentencia.lstrip().upper().startswith('SELECT') and 'referidos' in sentencia]
+        assert selects
+        return [plan_sqlite(sentencia, parametros) for sentencia, parametros in selects]
+    return planes
+
+
+@pytest.mark.parametrize('metodo, argumentos', [
+    ('obtener_por_id_evento', ('e-1',)),
+    ('obtener_por_id_referido', ('r-1',)),
+    ('obtener_por_socio', ('s-1',)),
+    ('obtener_por_socio_referido_evento', ('s-1', 'r-1', 'e-1')),
+])
+def test_busquedas_de_referidos_usan_indice(app, planes, metodo, argumentos):
+    assert aplicar_migraciones() == [migracion.version for migracion in MIGRACIONES]
+    repositorio = RepositorioReferidosPostgreSQL()
+
+    for plan in planes(lambda: getattr(repositorio, metodo)(*argumentos)):
+        assert 'SCAN referidos' not in plan, plan
+        assert 'USING' in plan and 'INDEX' in plan, plan
+
+
+def test_migraciones_se_aplican_una_sola_vez(app):
+    assert aplicar_migraciones()
+    assert aplicar_migraciones() == []
+
+
+def test_pagina_de_referidos_por_socio_sigue_el_indice_sin_ordenar(app, planes):
+    aplicar_migraciones()
+    repositorio = RepositorioReferidosPostgreSQL()
+    despues = (datetime.datetime(2025, 1, 1), 'e-1')
+
+    for plan in planes(lambda: list(repositorio.iterar_por_socio('s-1', despues=despues, limite=50))):
+        assert 'ix_referidos_socio_fecha' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan  # Sin sort: la primera fila sale sin leer todo el socio
+
+
+def test_filtro_por_estado_no_distingue_mayusculas_y_sigue_el_indice(app, planes):
+    aplicar_migraciones()
+    repositorio = RepositorioReferidosPostgreSQL()
+    db.session.execute(db.insert(Referido), [
+        dict(idSocio='s-1', idReferido=f'r-{i}', idEvento=f'e-{i}', monto=10.0, estado=estado, tipoEvento='venta',
+             fechaEvento=datetime.datetime(2025, 1, i + 1), fecha_creacion=datetime.datetime(2025, 1, 1))
+        for i, estado in enumerate(('CONFIRMADO', 'confirmado', 'RECHAZADO'))
+    ])
+    db.session.commit()
+
+    assert [fila.idEvento for fila in repositorio.iterar_por_socio('s-1', estado='confirmado')] == ['e-0', 'e-1']
+    for plan in planes(lambda: list(repositorio.iterar_por_socio('s-1', estado='Confirmado'))):
+        assert 'ix_referidos_socio_fecha' in plan, plan
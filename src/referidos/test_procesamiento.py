@@ -0,0 +1,59 @@
+"""
+ProcesadorOrdenado: orden por llave, llaves distintas en paralelo y trabajo en
+vuelo acotado.
+"""
+import threading
+import time
+
+from seedwork.infraestructura.procesamiento import ProcesadorOrdenado
+
+
+def test_cada_llave_se_procesa_en_orden():
+    procesados = {f's-{i}': [] for i in range(10)}
+    procesador = ProcesadorOrdenado(workers=4, max_en_vuelo=50).iniciar()
+    for n in range(200):
+        for llave, lista in procesados.items():
+            procesador.enviar(llave, lambda lista=lista, n=n: lista.append(n))
+    procesador.cerrar()
+
+    assert all(lista == list(range(200)) for lista in procesados.values())
+    assert procesador.metricas == {'procesados': 2000, 'fallidos': 0}
+
+
+def test_llaves_distintas_avanzan_en_paralelo():
+    # a y b caen en hilos distintos: b termina aunque a esté bloqueada
+    procesador = ProcesadorOrdenado(workers=2, max_en_vuelo=10).iniciar()
+    llaves = [f's-{i}' for i in range(50)]
+    a = llaves[0]
+    b = next(llave for llave in llaves if procesador._cola(llave) is not procesador._cola(a))
+    liberar, hecho_b = threading.Event(), threading.Event()
+    procesador.enviar(a, liberar.wait)
+    procesador.enviar(b, hecho_b.set)
+    assert hecho_b.wait(2)
+    liberar.set()
+    procesador.cerrar()
+
+
+def test_enviar_bloquea_al_llegar_al_maximo_en_vuelo():
+    procesador = ProcesadorOrdenado(workers=2, max_en_vuelo=3).iniciar()
+    liberar = threading.Event()
+    for i in range(3):
+        procesador.enviar(f's-{i}', liberar.wait)
+
+    enviado = threading.Event()
+    hilo = threading.Thread(target=lambda: (procesador.enviar('s-3', lambda: None), enviado.set()))
+    hilo.start()
+    assert not enviado.wait(0.2)  # Sin cupo: el receptor espera
+
+    liberar.set()
+    assert enviado.wait(2)
+    hilo.join()
+    procesador.cerrar()
+
+
+def test_un_error_libera_el_cupo_y_se_cuenta():
+    procesador = ProcesadorOrdenado(workers=1, max_en_vuelo=1).iniciar()
+    procesador.enviar('s', lambda: 1 / 0)
+    procesador.enviar('s', lambda: None)  # Bloquearía si el error no liberara el cupo
+    procesador.cerrar()
+    assert procesador.metricas == {'procesados': 1, 'fallidos': 1}
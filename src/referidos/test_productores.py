@@ -0,0 +1,142 @@
+"""
+Pool de productores: un producer por (tópico, Record), y los envíos fallidos
+pasan por el desborde y se reenvían desde el hilo de reenvío, no desde el
+callback del cliente.
+"""
+import threading
+
+import pytest
+from flask import Flask
+from pulsar import Result
+
+from config.db import db, init_db
+from config.productores import OutboxReferidos, OutboxReferidosSQLAlchemy
+from modulos.referidos.infraestructura.schema.v2.eventos_tracking import ReferidoProcesado, ReferidoCommandPayload
+from seedwork.infraestructura.productores import PoolProductores, DesbordeEnMemoria
+
+
+class ProducerFalso:
+    def __init__(self, resultado=Result.Ok, error=None):
+        self.resultado, self.error = resultado, error
+        self.enviados, self.callbacks = [], []
+
+    def send_async(self, mensaje, callback):
+        if self.error:
+            raise self.error
+        self.enviados.append(mensaje)
+        self.callbacks.append(lambda: callback(self.resultado, None))
+
+    def responder(self):
+        # El cliente de Pulsar llama los callbacks desde sus propios hilos
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            hilo = threading.Thread(target=callback)
+            hilo.start()
+            hilo.join()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ClienteFalso:
+    def __init__(self, producer):
+        self.producer, self.creados = producer, []
+
+    def create_producer(self, topico, schema=None, **opciones):
+        self.creados.append(topico)
+        return self.producer
+
+    def close(self):
+        pass
+
+
+class DesbordeQueVeHilos(DesbordeEnMemoria):
+    def __init__(self):
+        super().__init__()
+        self.hilos = set()
+
+    def guardar(self, topico, mensaje):
+        self.hilos.add(threading.current_thread().name)
+        super().guardar(topico, mensaje)
+
+
+def _evento(id_socio='s-1'):
+    return ReferidoProcesado(idTransaction='t-1', data=ReferidoCommandPayload(
+        idEvento='e-1', idSocio=id_socio, monto=10.0, estadoEvento='pendiente', fechaEvento='2025-01-01'))
+
+
+def _pool(producer, desborde=None):
+    cliente = ClienteFalso(producer)
+    return PoolProductores(lambda: cliente, {}, desborde=desborde), cliente
+
+
+def test_un_producer_por_topico_y_record():
+    producer = ProducerFalso()
+    pool, cliente = _pool(producer)
+    for _ in range(3):
+        pool.publicar(_evento(), 'eventos-referido')
+    producer.responder()
+    assert cliente.creados == ['eventos-referido']
+    assert pool.metricas['enviados'] == 3 and pool.metricas['fallidos'] == 0
+
+
+def test_envio_fallido_se_desborda_fuera_del_callback_y_se_reenvia():
+    producer, desborde = ProducerFalso(resultado=Result.Timeout), DesbordeQueVeHilos()
+    pool, _ = _pool(producer, desborde)
+    pool.publicar(_evento(), 'eventos-referido')
+    producer.responder()
+    assert pool.metricas['fallidos'] == 1 and len(desborde) == 0
+
+    producer.resultado = Result.Ok
+    assert pool.reenviar_desborde() == 1
+    assert desborde.hilos == {threading.current_thread().name} and len(desborde) == 1
+    # Mientras el reenvío está en vuelo no se vuelve a enviar
+    assert pool.reenviar_desborde() == 0
+
+    producer.responder()
+    pool.reenviar_desborde()
+    assert len(desborde) == 0 and pool.metricas['reenviados'] == 1
+    assert [m.idTransaction for m in producer.enviados] == ['t-1', 't-1']
+
+
+def test_reenvio_fallido_queda_pendiente():
+    producer, desborde = ProducerFalso(resultado=Result.Timeout), DesbordeEnMemoria()
+    pool, _ = _pool(producer, desborde)
+    desborde.guardar('eventos-referido', _evento())
+    assert pool.reenviar_desborde() == 1
+    producer.responder()
+    assert pool.reenviar_desborde() == 1 and len(desborde) == 1
+
+
+def test_send_async_rechazado_va_al_desborde():
+    desborde = DesbordeEnMemoria()
+    pool, _ = _pool(ProducerFalso(error=RuntimeError('producer cerrado')), desborde)
+    pool.publicar(_evento(), 'eventos-referido')
+    pool.cerrar()
+    assert len(desborde) == 1 and pool.metricas['desbordados'] == 1
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    init_db(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_outbox_guarda_y_restaura_el_record(app):
+    outbox = OutboxReferidosSQLAlchemy(app)
+    outbox.guardar('eventos-referido', _evento('s-9'))
+    [(id_desborde, topico, evento)] = outbox.pendientes(10)
+    assert topico == 'eventos-referido' and isinstance(evento, ReferidoProcesado)
+    assert evento.idTransaction == 't-1' and evento.data.idSocio == 's-9'
+
+    outbox.confirmar(id_desborde)
+    assert outbox.pendientes(10) == []
+    with app.app_context():
+        assert db.session.get(OutboxReferidos, id_desborde).status == 'SENT'
@@ -0,0 +1,78 @@
+"""
+Red multinivel de referidos sobre la closure table red_referidos.
+"""
+import datetime
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from config.db import db
+from modulos.referidos.infraestructura import red
+from modulos.referidos.infraestructura.dto import Referido, RedReferidos
+
+# a -> b -> c -> d, a -> e
+ARBOL = [('a', 'b'), ('b', 'c'), ('c', 'd'), ('a', 'e')]
+
+
+def _referido(idSocio, idReferido, monto=100.0, estado='pendiente', i=0):
+    fecha = datetime.datetime(2025, 1, 1) + datetime.timedelta(minutes=i)
+    db.session.add(Referido(idSocio=idSocio, idReferido=idReferido, idEvento=f'e-{idSocio}-{idReferido}-{i}',
+                            estado=estado, monto=monto, tipoEvento='venta_creada', fechaEvento=fecha,
+                            fecha_creacion=fecha))
+    red.conectar(db.session, idSocio, idReferido)
+
+
+def _caminos():
+    return {(fila.ancestro, fila.descendiente, fila.profundidad) for fila in db.session.query(RedReferidos)}
+
+
+def test_red_por_profundidad_y_monto_por_nivel(app):
+    for i, (socio, referido) in enumerate(ARBOL):
+        _referido(socio, referido, i=i)
+    _referido('a', 'b', monto=50.0, i=10)  # Segunda venta del mismo par: no cambia la red
+    _referido('d', 'a', i=11)  # Ciclo: no se conecta
+    db.session.commit()
+
+    assert [(f.descendiente, f.profundidad) for f in red.descendientes(db.session, 'a')] == \
+        [('b', 1), ('e', 1), ('c', 2), ('d', 3)]
+    assert [f.descendiente for f in red.descendientes(db.session, 'a', profundidad=2)] == ['b', 'e', 'c']
+
+    niveles = [(f.nivel, f.referidos, f.monto) for f in red.resumen(db.session, 'a', profundidad=2)]
+    assert niveles == [(1, 3, 250.0), (2, 1, 100.0)]
+
+
+def test_rechazo_quita_el_subarbol_y_reconstruir_coincide(app):
+    for i, (socio, referido) in enumerate(ARBOL):
+        _referido(socio, referido, i=i)
+    db.session.commit()
+
+    db.session.query(Referido).filter_by(idSocio='a', idReferido='b').update({'estado': 'rechazado'})
+    assert red.desconectar(db.session, 'a', 'b')
+    assert [f.descendiente for f in red.descendientes(db.session, 'a')] == ['e']
+    assert [f.descendiente for f in red.descendientes(db.session, 'b')] == ['c', 'd']
+
+    incremental = _caminos()
+    red.reconstruir(db.session)
+    assert _caminos() - {(n, n, 0) for n in 'abcde'} == incremental - {(n, n, 0) for n in 'abcde'}
+
+
+def test_consultas_de_red_usan_el_indice_por_ancestro(app, capturar_sentencias, plan_sqlite):
+    with capturar_sentencias() as sentencias:
+        red.descendientes(db.session, 'a', profundidad=3)
+        red.resumen(db.session, 'a', profundidad=3)
+
+    for sentencia, parametros in sentencias:
+        plan = plan_sqlite(sentencia, parametros)
+        assert 'SEARCH red_referidos USING' in plan and 'ix_red_referidos_ancestro' in plan, plan
+        assert 'SCAN' not in plan, plan
+
+
+def test_la_base_rechaza_un_segundo_padre(app):
+    _referido('a', 'b')
+    _referido('x', 'b')  # b ya cuelga de a: no se conecta
+    db.session.commit()
+    assert [f.descendiente for f in red.descendientes(db.session, 'x')] == []
+
+    # Aunque una transacción concurrente se salte la verificación, el índice único lo impide
+    db.session.add(RedReferidos(ancestro='x', descendiente='b', profundidad=1))
+    with pytest.raises(IntegrityError):
+        db.session.flush()
@@ -0,0 +1,121 @@
+"""
+ConsumidorCompartido sobre un cliente falso: registro por tópico, drenado de
+tópicos legacy y reintento de suscripción.
+"""
+import threading
+import time
+
+import _pulsar
+import pytest
+from pulsar.schema import Record, String
+
+from seedwork.infraestructura import suscripciones
+from seedwork.infraestructura.procesamiento import ProcesadorOrdenado
+from seedwork.infraestructura.suscripciones import ConsumidorCompartido
+from test_consumidores import ClienteFalso, ConsumidorFalso
+
+
+class MensajeFalso:
+    def __init__(self, valor=None, error=None):
+        self._valor, self._error = valor, error
+        self.decodificado = False
+
+    def value(self):
+        self.decodificado = True
+        if self._error:
+            raise self._error
+        return self._valor
+
+
+class Valor(Record):
+    idSocio = String()
+
+
+@pytest.fixture
+def cliente():
+    return ClienteFalso()
+
+
+def _consumidor(cliente):
+    return ConsumidorCompartido(lambda: cliente, ProcesadorOrdenado(2, 10), dict(receiver_queue_size=1000))
+
+
+def _escuchar(cliente, topico, mensaje):
+    _, opciones, consumidor = cliente.suscripciones[topico]
+    opciones['message_listener'](consumidor, mensaje)
+    return consumidor
+
+
+def test_cada_topico_va_a_su_manejador_con_su_llave(cliente):
+    recibidos, hecho = [], threading.Event()
+
+    def manejador(consumidor, mensaje, valor):
+        recibidos.append(valor.idSocio)
+        consumidor.acknowledge(mensaje)
+        hecho.set()
+
+    consumidor = _consumidor(cliente)
+    consumidor.registrar('comando-referido', 'sub-a', Valor, manejador, llave=lambda valor: valor.idSocio)
+    consumidor.registrar('eventos-pago', 'sub-b', Valor, lambda *_: pytest.fail('tópico equivocado'))
+    consumidor.iniciar()
+
+    mensaje = MensajeFalso(Valor(idSocio='s-1'))
+    consumidor_pulsar = _escuchar(cliente, 'comando-referido', mensaje)
+    assert hecho.wait(2)
+    consumidor.cerrar()
+
+    assert recibidos == ['s-1'] and consumidor_pulsar.acks == [mensaje]
+    _, opciones, _ = cliente.suscripciones['comando-referido']
+    assert opciones['consumer_type'] == _pulsar.ConsumerType.KeyShared and opciones['receiver_queue_size'] == 1000
+    assert cliente.suscripciones['eventos-pago'][1]['consumer_type'] == _pulsar.ConsumerType.Shared
+    assert all(c.cerrado for _, _, c in cliente.suscripciones.values()) and cliente.cerrado
+
+
+def test_mensaje_no_decodificable_se_confirma_sin_manejarlo(cliente):
+    consumidor = _consumidor(cliente)
+    consumidor.registrar('comando-referido', 'sub-a', Valor, lambda *_: pytest.fail('no debe manejarse'))
+    consumidor.iniciar()
+    mensaje = MensajeFalso(error=ValueError('esquema'))
+    assert _escuchar(cliente, 'comando-referido', mensaje).acks == [mensaje]
+    consumidor.cerrar()
+
+
+def test_topico_legacy_se_drena_sin_deserializar(cliente):
+    consumidor = _consumidor(cliente)
+    consumidor.drenar('comandos-referidos', 'sub-legacy')
+    consumidor.iniciar()
+
+    _, opciones, _ = cliente.suscripciones['comandos-referidos']
+    assert opciones['consumer_type'] == _pulsar.ConsumerType.Failover and 'schema' not in opciones
+    assert opciones['receiver_queue_size'] == suscripciones.PREFETCH_LEGACY
+
+    mensajes = [MensajeFalso() for _ in range(3)]
+    for mensaje in mensajes:
+        consumidor_pulsar = _escuchar(cliente, 'comandos-referidos', mensaje)
+    assert consumidor_pulsar.acks_acumulativos == mensajes and consumidor_pulsar.acks == []
+    assert not any(mensaje.decodificado for mensaje in mensajes)
+    consumidor.cerrar()
+
+
+def test_reintenta_la_suscripcion_que_falla(cliente, monkeypatch):
+    monkeypatch.setattr(suscripciones, 'REINTENTO_SEGUNDOS', 0.05)
+    subscribe, intentos = cliente.subscribe, []
+
+    def subscribe_que_falla_una_vez(topico, suscripcion, **opciones):
+        intentos.append(topico)
+        if len(intentos) == 1:
+            raise Exception('Subscription is of different type')
+        return subscribe(topico, suscripcion, **opciones)
+
+    cliente.subscribe = subscribe_que_falla_una_vez
+    consumidor = _consumidor(cliente)
+    consumidor.drenar('comandos-eventos', 'sub-legacy')
+    consumidor.iniciar()
+    assert 'comandos-eventos' not in cliente.suscripciones
+
+    limite = time.monotonic() + 2
+    while 'comandos-eventos' not in cliente.suscripciones and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert intentos == ['comandos-eventos', 'comandos-eventos']
+    consumidor.cerrar()
+    assert cliente.suscripciones['comandos-eventos'][2].cerrado
@@ -0,0 +1,46 @@
+"""
+UoW masiva: los agregar/actualizar consecutivos se ejecutan como una sola
+sentencia masiva dentro de la misma transacción.
+"""
+import datetime
+import uuid
+import pytest
+
+from config.db import db
+from config.uow import UnidadTrabajoSQLAlchemy
+from modulos.referidos.dominio.entidades import Referido
+from modulos.referidos.dominio.objetos_valor import EstadoReferido
+from modulos.referidos.infraestructura.dto import Referido as ReferidoDTO
+from modulos.referidos.infraestructura.repositorios import RepositorioReferidosPostgreSQL
+
+
+def _referidos(n):
+    socio = uuid.uuid4()
+    return [Referido(idSocio=socio, idReferido=uuid.uuid4(), idEvento=uuid.uuid4(), monto=10.0, estado='pendiente',
+                     fechaEvento=datetime.datetime(2025, 1, 1), tipoEvento='venta_creada') for _ in range(n)]
+
+
+def _commit(capturar_sentencias, batches) -> list[str]:
+    """Tipo de cada sentencia (INSERT, UPDATE, ...) que emitió el commit de la UoW."""
+    with capturar_sentencias() as sentencias:
+        uow = UnidadTrabajoSQLAlchemy()
+        with uow:
+            for operacion, referido in batches:
+                uow.registrar_batch(operacion, referido)
+            uow.commit()
+    return [sentencia.split()[0].upper() for sentencia, _ in sentencias]
+
+
+def test_agregar_y_actualizar_en_sentencias_masivas(app, capturar_sentencias):
+    repositorio = RepositorioReferidosPostgreSQL()
+    referidos = _referidos(500)
+
+    sentencias = _commit(capturar_sentencias, [(repositorio.agregar, referido) for referido in referidos])
+    assert db.session.query(ReferidoDTO).count() == 500
+    assert sentencias.count('INSERT') <= 4  # referidos, contadores, nodos y caminos de la red
+
+    for referido in referidos[:100]:
+        referido.estado = EstadoReferido.CONFIRMADO
+    sentencias = _commit(capturar_sentencias, [(repositorio.actualizar, referido) for referido in referidos[:100]])
+    assert sentencias.count('UPDATE') == 1 and 'SELECT' not in sentencias
+    assert db.session.query(ReferidoDTO).filter_by(estado='CONFIRMADO').count() == 100